@@ -0,0 +1,50 @@
+"""add_full_text_search_vectors
+
+Revision ID: 3f7b8d2a6c14
+Revises: e2a9b4d61c05
+Create Date: 2026-10-18 19:42:31.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7b8d2a6c14'
+down_revision: Union[str, Sequence[str], None] = 'e2a9b4d61c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Stored generated columns: kept up to date by PostgreSQL on every write.
+# Material text is capped so the tsvector of long textbooks stays under 1 MB.
+SEARCH_VECTORS = {
+    'flashcards': (
+        "setweight(to_tsvector('spanish'::regconfig, question), 'A') || "
+        "setweight(to_tsvector('spanish'::regconfig, answer), 'B') || "
+        "setweight(to_tsvector('spanish'::regconfig, coalesce(explanation, '')), 'C')"
+    ),
+    'material_contents': "to_tsvector('spanish'::regconfig, left(extracted_text, 500000))",
+    # Legacy materials with inline text (NULL for shared content)
+    'study_materials': "to_tsvector('spanish'::regconfig, left(extracted_text, 500000))",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, expression in SEARCH_VECTORS.items():
+        op.add_column(
+            table,
+            sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(expression, persisted=True), nullable=True)
+        )
+        op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(list(SEARCH_VECTORS)):
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.drop_column(table, 'search_vector')
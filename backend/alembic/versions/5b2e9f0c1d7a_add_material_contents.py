@@ -0,0 +1,58 @@
+"""add_material_contents
+
+Revision ID: 5b2e9f0c1d7a
+Revises: 847a663da170
+Create Date: 2026-10-18 14:03:27.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9f0c1d7a'
+down_revision: Union[str, Sequence[str], None] = '847a663da170'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'material_contents',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('source', sa.String(length=10), nullable=False),
+        sa.Column('extracted_text', sa.Text(), nullable=False),
+        sa.Column('word_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.CheckConstraint("source IN ('pdf', 'text')", name='check_source'),
+        sa.PrimaryKeyConstraint('content_hash')
+    )
+
+    # Materials reference shared content; existing rows keep their inline text
+    op.add_column('study_materials', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'fk_study_materials_content_hash', 'study_materials', 'material_contents',
+        ['content_hash'], ['content_hash']
+    )
+    op.create_index('ix_study_materials_content_hash', 'study_materials', ['content_hash'])
+    op.alter_column('study_materials', 'extracted_text', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Copy shared text back into each material before dropping the store
+    op.execute("""
+        UPDATE study_materials AS m
+        SET extracted_text = c.extracted_text
+        FROM material_contents AS c
+        WHERE m.content_hash = c.content_hash
+    """)
+    op.execute("UPDATE study_materials SET extracted_text = '' WHERE extracted_text IS NULL")
+    op.alter_column('study_materials', 'extracted_text', existing_type=sa.Text(), nullable=False)
+    op.drop_index('ix_study_materials_content_hash', table_name='study_materials')
+    op.drop_constraint('fk_study_materials_content_hash', 'study_materials', type_='foreignkey')
+    op.drop_column('study_materials', 'content_hash')
+    op.drop_table('material_contents')
@@ -0,0 +1,63 @@
+"""add_generation_jobs
+
+Revision ID: 7c5e1a9d3b48
+Revises: 3f7b8d2a6c14
+Create Date: 2026-10-18 21:10:44.318027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c5e1a9d3b48'
+down_revision: Union[str, Sequence[str], None] = '3f7b8d2a6c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'generation_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('material_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('params', postgresql.JSONB(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('card_ids', postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=True),
+        sa.Column('cards_created', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.CheckConstraint(
+            "status IN ('queued', 'running', 'completed', 'failed', 'cancelled')", name='check_generation_job_status'
+        ),
+        sa.ForeignKeyConstraint(['material_id'], ['study_materials.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Claiming scans only queued jobs, oldest due first
+    op.create_index(
+        'ix_generation_jobs_queued', 'generation_jobs', ['run_after', 'created_at'],
+        postgresql_where=sa.text("status = 'queued'")
+    )
+    op.create_index('ix_generation_jobs_user_status', 'generation_jobs', ['user_id', 'status'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_generation_jobs_user_status', table_name='generation_jobs')
+    op.drop_index('ix_generation_jobs_queued', table_name='generation_jobs')
+    op.drop_table('generation_jobs')
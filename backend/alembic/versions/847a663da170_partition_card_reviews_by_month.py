@@ -0,0 +1,128 @@
+"""partition_card_reviews_by_month
+
+Revision ID: 847a663da170
+Revises: cbdefb7ce683
+Create Date: 2026-10-18 09:12:41.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '847a663da170'
+down_revision: Union[str, Sequence[str], None] = 'cbdefb7ce683'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = (
+    "id, card_id, user_id, rating, previous_interval_days, new_interval_days, "
+    "previous_ease_factor, new_ease_factor, time_spent_seconds, due_date, "
+    "session_id, reviewed_at"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Move the existing table out of the way (constraint/index names must be free)
+    op.execute("ALTER TABLE card_reviews RENAME TO card_reviews_unpartitioned")
+    op.execute("ALTER TABLE card_reviews_unpartitioned RENAME CONSTRAINT card_reviews_pkey TO card_reviews_unpartitioned_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_card_reviews_card_id")
+    op.execute("DROP INDEX IF EXISTS ix_card_reviews_user_id")
+    op.execute("DROP INDEX IF EXISTS ix_card_reviews_session_id")
+
+    # Partitioned parent: the partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE card_reviews (
+            id UUID NOT NULL,
+            card_id UUID NOT NULL REFERENCES flashcards(id) ON DELETE CASCADE,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            rating INTEGER NOT NULL CONSTRAINT check_rating CHECK (rating IN (1, 2, 3, 4)),
+            previous_interval_days INTEGER,
+            new_interval_days INTEGER,
+            previous_ease_factor FLOAT,
+            new_ease_factor FLOAT,
+            time_spent_seconds INTEGER,
+            due_date DATE,
+            session_id UUID REFERENCES study_sessions(id) ON DELETE SET NULL,
+            reviewed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, reviewed_at)
+        ) PARTITION BY RANGE (reviewed_at)
+    """)
+
+    # Indexes on the parent cascade to every partition
+    op.create_index('ix_card_reviews_card_id', 'card_reviews', ['card_id'])
+    op.create_index('ix_card_reviews_user_id', 'card_reviews', ['user_id'])
+    op.create_index('ix_card_reviews_session_id', 'card_reviews', ['session_id'])
+    op.create_index('ix_card_reviews_user_id_reviewed_at', 'card_reviews', ['user_id', 'reviewed_at'])
+
+    # One partition per month from the oldest review through 3 months ahead
+    op.execute("""
+        DO $$
+        DECLARE
+            first_month DATE;
+            month DATE;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(MIN(reviewed_at), now()))::date
+            INTO first_month
+            FROM card_reviews_unpartitioned;
+
+            FOR month IN
+                SELECT generate_series(first_month, date_trunc('month', now())::date + INTERVAL '3 months', INTERVAL '1 month')::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF card_reviews FOR VALUES FROM (%L) TO (%L)',
+                    'card_reviews_' || to_char(month, 'YYYY_MM'),
+                    month,
+                    (month + INTERVAL '1 month')::date
+                );
+            END LOOP;
+        END $$;
+    """)
+    op.execute("CREATE TABLE card_reviews_default PARTITION OF card_reviews DEFAULT")
+
+    op.execute(
+        f"INSERT INTO card_reviews ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM card_reviews_unpartitioned WHERE reviewed_at IS NOT NULL"
+    )
+    op.execute("DROP TABLE card_reviews_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE card_reviews RENAME TO card_reviews_partitioned")
+    op.execute("ALTER TABLE card_reviews_partitioned RENAME CONSTRAINT card_reviews_pkey TO card_reviews_partitioned_pkey")
+    op.drop_index('ix_card_reviews_card_id', table_name='card_reviews_partitioned')
+    op.drop_index('ix_card_reviews_user_id', table_name='card_reviews_partitioned')
+    op.drop_index('ix_card_reviews_session_id', table_name='card_reviews_partitioned')
+    op.drop_index('ix_card_reviews_user_id_reviewed_at', table_name='card_reviews_partitioned')
+
+    op.execute("""
+        CREATE TABLE card_reviews (
+            id UUID PRIMARY KEY,
+            card_id UUID NOT NULL REFERENCES flashcards(id) ON DELETE CASCADE,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            rating INTEGER NOT NULL CONSTRAINT check_rating CHECK (rating IN (1, 2, 3, 4)),
+            previous_interval_days INTEGER,
+            new_interval_days INTEGER,
+            previous_ease_factor FLOAT,
+            new_ease_factor FLOAT,
+            time_spent_seconds INTEGER,
+            due_date DATE,
+            session_id UUID REFERENCES study_sessions(id) ON DELETE SET NULL,
+            reviewed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+    """)
+    op.create_index('ix_card_reviews_card_id', 'card_reviews', ['card_id'])
+    op.create_index('ix_card_reviews_user_id', 'card_reviews', ['user_id'])
+    op.create_index('ix_card_reviews_session_id', 'card_reviews', ['session_id'])
+
+    op.execute(
+        f"INSERT INTO card_reviews ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM card_reviews_partitioned"
+    )
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE card_reviews_partitioned")
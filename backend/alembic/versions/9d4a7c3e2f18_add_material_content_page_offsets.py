@@ -0,0 +1,29 @@
+"""add_material_content_page_offsets
+
+Revision ID: 9d4a7c3e2f18
+Revises: 5b2e9f0c1d7a
+Create Date: 2026-10-18 15:21:09.733610
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4a7c3e2f18'
+down_revision: Union[str, Sequence[str], None] = '5b2e9f0c1d7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Character offset where each PDF page starts in extracted_text (NULL for pasted text)
+    op.add_column('material_contents', sa.Column('page_offsets', sa.ARRAY(sa.Integer()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('material_contents', 'page_offsets')
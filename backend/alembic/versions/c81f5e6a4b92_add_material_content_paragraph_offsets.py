@@ -0,0 +1,29 @@
+"""add_material_content_paragraph_offsets
+
+Revision ID: c81f5e6a4b92
+Revises: 9d4a7c3e2f18
+Create Date: 2026-10-18 16:40:52.114387
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5e6a4b92'
+down_revision: Union[str, Sequence[str], None] = '9d4a7c3e2f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Character offset where each paragraph starts, computed during normalization
+    op.add_column('material_contents', sa.Column('paragraph_offsets', sa.ARRAY(sa.Integer()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('material_contents', 'paragraph_offsets')
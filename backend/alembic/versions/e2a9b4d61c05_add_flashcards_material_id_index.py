@@ -0,0 +1,29 @@
+"""add_flashcards_material_id_index
+
+Revision ID: e2a9b4d61c05
+Revises: c81f5e6a4b92
+Create Date: 2026-10-18 18:05:13.927541
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9b4d61c05'
+down_revision: Union[str, Sequence[str], None] = 'c81f5e6a4b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-material flashcard lookups and grouped counts (also covers the FK for cascading deletes)
+    op.create_index('ix_flashcards_material_id', 'flashcards', ['material_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_flashcards_material_id', table_name='flashcards')
@@ -27,6 +27,14 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 10
     DB_ECHO: bool = False  # Log SQL queries
 
+    # Review log partitioning (card_reviews is range-partitioned by month)
+    REVIEW_PARTITION_MONTHS_AHEAD: int = 3  # Future monthly partitions to keep ready
+    REVIEW_HOT_MONTHS: int = 12  # Months kept in Postgres before archiving
+    REVIEW_ARCHIVE_DIR: str = "archive/card_reviews"  # Compressed columnar archives
+
+    # UserStats rollup job
+    STATS_ROLLUP_BATCH_SIZE: int = 500  # Users per grouped aggregate
+
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
@@ -34,9 +42,49 @@ class Settings(BaseSettings):
 
     # Anthropic Claude
     ANTHROPIC_API_KEY: str = ""
-    ANTHROPIC_MODEL: str = "claude-sonnet-4-20250514"
-    ANTHROPIC_MAX_TOKENS: int = 4000
+    ANTHROPIC_MODEL: str = "claude-sonnet-4-20250514"  # Large tier: long inputs and many cards
+    ANTHROPIC_MAX_TOKENS: int = 16000  # Cap on max_tokens for the large tier
     ANTHROPIC_TEMPERATURE: float = 0.7
+    ANTHROPIC_BASE_URL: str = ""  # Empty = Anthropic's API (set to a local fake server for tests)
+    ANTHROPIC_TIMEOUT_SECONDS: float = 120.0  # Per request attempt
+
+    # Anthropic client limits (per API process; 0 disables a limit)
+    ANTHROPIC_MAX_CONCURRENCY: int = 8  # Requests in flight
+    ANTHROPIC_REQUESTS_PER_MINUTE: int = 50
+    ANTHROPIC_INPUT_TOKENS_PER_MINUTE: int = 40000  # Estimated from the prompt
+    ANTHROPIC_MAX_RETRIES: int = 4  # Retries of 429, 5xx and connection errors
+    ANTHROPIC_RETRY_BASE_SECONDS: float = 1.0  # Backoff cap doubles per retry (full jitter)
+    ANTHROPIC_RETRY_MAX_SECONDS: float = 30.0
+    ANTHROPIC_CIRCUIT_FAILURES: int = 5  # Consecutive failures that open the circuit
+    ANTHROPIC_CIRCUIT_RESET_SECONDS: float = 30.0  # Calls fail fast this long before a trial call
+
+    # Model routing by request size (see OpenAIService.route)
+    ANTHROPIC_FAST_MODEL: str = "claude-3-5-haiku-20241022"  # Fast tier; empty = always ANTHROPIC_MODEL
+    ANTHROPIC_FAST_MAX_TOKENS: int = 8192  # Cap on max_tokens for the fast tier
+    ANTHROPIC_FAST_MAX_INPUT_TOKENS: int = 3000  # Largest source text (estimated) for the fast tier
+    ANTHROPIC_FAST_MAX_CARDS: int = 20  # Most cards per request for the fast tier
+    ANTHROPIC_OUTPUT_TOKENS_PER_CARD: int = 120  # Estimated response size per card, with margin
+
+    # Flashcard generation input
+    GENERATION_CONTEXT_TOKENS: int = 200000  # Model context window
+    GENERATION_CHUNK_TOKENS: int = 8000  # Largest chunk of material per request
+    GENERATION_CHUNK_OVERLAP_TOKENS: int = 200  # Repeated between consecutive chunks
+    GENERATION_CONCURRENCY: int = 4  # Chunk requests in flight per generation
+
+    # Flashcard generation cache (local SQLite file, LRU-evicted)
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_PATH: str = "generation_cache.sqlite3"
+    GENERATION_CACHE_MAX_MB: int = 256
+
+    # Flashcard generation jobs (generation_jobs table, claimed by workers in any API process)
+    GENERATION_WORKERS: int = 2  # Jobs run concurrently per API process
+    GENERATION_JOBS_PER_USER: int = 1  # Running jobs per user across all processes
+    GENERATION_MAX_PENDING_PER_USER: int = 5  # Queued + running jobs before requests get 429
+    GENERATION_JOB_MAX_ATTEMPTS: int = 3  # Attempts before a job fails
+    GENERATION_JOB_RETRY_SECONDS: int = 10  # Retry delay, doubled after each failed attempt
+    GENERATION_JOB_POLL_SECONDS: float = 2.0  # Idle workers check for new jobs this often
+    GENERATION_JOB_HEARTBEAT_SECONDS: int = 10  # Running jobs are marked alive this often
+    GENERATION_JOB_STALE_SECONDS: int = 120  # Requeue running jobs without a heartbeat this long
 
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -63,6 +111,20 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE_MB: int = 10
     ALLOWED_FILE_EXTENSIONS: list[str] = [".pdf"]
 
+    # PDF extraction worker pool
+    PDF_WORKERS: int = 2  # Worker processes (0 = extract in a thread, no isolation)
+    PDF_EXTRACTION_TIMEOUT_SECONDS: int = 60  # Wall-clock limit per PDF
+    PDF_WORKER_MEMORY_LIMIT_MB: int = 1024  # RLIMIT_AS per worker process (0 = unlimited)
+    PDF_WORKER_MAX_TASKS: int = 50  # Recycle a worker after this many jobs
+    PDF_PARALLEL_PAGE_THRESHOLD: int = 50  # Split PDFs with at least this many pages
+    PDF_PARALLEL_RANGE_WORKERS: int = 0  # Page ranges per large PDF (0 = PDF_WORKERS)
+
+    # Material ingestion (background processing of uploads)
+    INGESTION_WORKERS: int = 4  # Materials processed concurrently per API process
+    INGESTION_QUEUE_SIZE: int = 100  # Pending materials before uploads get 503
+    INGESTION_STALE_MINUTES: int = 30  # Fail pending/processing materials untouched this long
+    INGESTION_HEARTBEAT_SECONDS: int = 60  # How often a process touches its materials (well below the above)
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "app.log"
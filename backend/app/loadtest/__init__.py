@@ -0,0 +1,3 @@
+"""
+Load-testing tools: a local fake of the Anthropic API and a generation load driver.
+"""
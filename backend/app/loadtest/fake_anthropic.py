@@ -0,0 +1,267 @@
+"""
+Local stand-in for the Anthropic Messages API.
+
+Answers POST /v1/messages, plain or streaming (SSE, the same event
+sequence as the real API), with canned flashcards, so the generation
+pipeline can be exercised and load-tested without API costs or provider
+limits. Point the backend at it with ANTHROPIC_BASE_URL.
+
+Behaviour is configurable:
+- latency: time to first byte, from a distribution
+  (fixed:S, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA, in seconds)
+- output speed: streamed tokens per second
+- errors: a fraction of requests fail with one of the given statuses
+  (429 responses carry retry-after)
+- cards: as many as the prompt asks for ("EXACTAMENTE N flashcards"),
+  distinct per prompt, or taken in turn from a JSON file
+
+Run:
+    python -m app.loadtest.fake_anthropic --port 8089 --latency lognormal:1.5,0.4 --error-rate 0.05
+"""
+
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional, Sequence
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+STREAM_PIECE_CHARS = 24  # Characters per content_block_delta
+
+_REQUESTED_COUNT = re.compile(r"EXACTAMENTE (\d+) flashcards")
+
+_ERROR_TYPES = {
+    429: "rate_limit_error",
+    500: "api_error",
+    503: "api_error",
+    529: "overloaded_error",
+}
+
+
+class LatencyDistribution:
+    """Random delays described by a spec: fixed:S, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA."""
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, args = spec.partition(":")
+        try:
+            values = [float(value) for value in args.split(",")] if args else []
+        except ValueError as e:
+            raise ValueError(f"Invalid latency spec {spec!r}") from e
+
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(values) != expected[kind] or any(value < 0 for value in values):
+            raise ValueError(f"Invalid latency spec {spec!r} (expected fixed:S, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA)")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.values)
+        median, sigma = self.values
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+@dataclass
+class FakeAnthropicConfig:
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    tokens_per_second: float = 0.0  # Streaming speed (0 = as fast as possible)
+    error_rate: float = 0.0  # Fraction of requests that fail
+    error_statuses: Sequence[int] = (429, 529)
+    retry_after_seconds: float = 1.0  # Sent with 429 responses
+    cards: Optional[List[dict]] = None  # Canned cards to serve in turn (None = synthesized)
+    seed: Optional[int] = None
+
+
+def synthesize_cards(prompt: str, count: int) -> List[dict]:
+    """
+    count distinct cards for a prompt.
+
+    Questions include a tag derived from the prompt, so chunks of one
+    material get different cards (as a real model would) and deduplication
+    only drops what it should.
+    """
+    section = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+    return [
+        {
+            "question": f"¿Qué establece el punto {i + 1} de la sección {section}?",
+            "answer": f"El punto {i + 1} resume una idea clave de la sección {section} del material.",
+            "difficulty": i % 5 + 1,
+            "tags": ["prueba", f"seccion-{section}"],
+        }
+        for i in range(count)
+    ]
+
+
+def _prompt_text(body: dict) -> str:
+    parts = []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+    return "\n".join(parts)
+
+
+def _tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _message(message_id: str, model: str, text: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "id": message_id,
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": text}] if text else [],
+        "stop_reason": "end_turn" if text else None,
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def create_app(config: Optional[FakeAnthropicConfig] = None) -> FastAPI:
+    """Build the fake API application."""
+    config = config or FakeAnthropicConfig()
+    rng = random.Random(config.seed)
+    state = {"requests": 0, "errors": 0, "next_card": 0}
+
+    app = FastAPI(title="Fake Anthropic Messages API")
+    app.state.config = config
+    app.state.stats = state
+
+    def canned_cards(prompt: str, count: int) -> List[dict]:
+        if not config.cards:
+            return synthesize_cards(prompt, count)
+        start = state["next_card"]
+        state["next_card"] = start + count
+        return [config.cards[(start + i) % len(config.cards)] for i in range(count)]
+
+    @app.post("/v1/messages")
+    async def create_message(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        message_id = f"msg_fake_{state['requests']:08d}"
+        model = body.get("model", "fake-model")
+
+        await asyncio.sleep(config.latency.sample(rng))
+
+        if config.error_rate and rng.random() < config.error_rate:
+            state["errors"] += 1
+            status_code = rng.choice(list(config.error_statuses))
+            headers = {"retry-after": str(config.retry_after_seconds)} if status_code == 429 else {}
+            return JSONResponse(
+                status_code=status_code,
+                headers=headers,
+                content={
+                    "type": "error",
+                    "error": {"type": _ERROR_TYPES.get(status_code, "api_error"), "message": "Injected failure"},
+                },
+            )
+
+        prompt = _prompt_text(body)
+        requested = _REQUESTED_COUNT.search(prompt)
+        cards = canned_cards(prompt, int(requested.group(1)) if requested else 5)
+        text = json.dumps(cards, ensure_ascii=False, indent=2)
+        input_tokens = _tokens(prompt)
+
+        if not body.get("stream"):
+            return JSONResponse(_message(message_id, model, text, input_tokens, _tokens(text)))
+
+        return StreamingResponse(
+            _stream_events(message_id, model, text, input_tokens, config.tokens_per_second),
+            media_type="text/event-stream",
+        )
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    return app
+
+
+async def _stream_events(
+    message_id: str,
+    model: str,
+    text: str,
+    input_tokens: int,
+    tokens_per_second: float
+) -> AsyncIterator[str]:
+    """The SSE events of a streamed message, paced at tokens_per_second."""
+    yield _sse("message_start", {
+        "type": "message_start", "message": _message(message_id, model, "", input_tokens, 1)
+    })
+    yield _sse("content_block_start", {
+        "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}
+    })
+    yield _sse("ping", {"type": "ping"})
+
+    delay = STREAM_PIECE_CHARS / CHARS_PER_TOKEN / tokens_per_second if tokens_per_second > 0 else 0
+    for start in range(0, len(text), STREAM_PIECE_CHARS):
+        if delay:
+            await asyncio.sleep(delay)
+        yield _sse("content_block_delta", {
+            "type": "content_block_delta",
+            "index": 0,
+            "delta": {"type": "text_delta", "text": text[start:start + STREAM_PIECE_CHARS]},
+        })
+
+    yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield _sse("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+        "usage": {"output_tokens": _tokens(text)},
+    })
+    yield _sse("message_stop", {"type": "message_stop"})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local fake Anthropic Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0.5", help="fixed:S, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Streaming speed (0 = unthrottled)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-statuses", default="429,529", help="Comma-separated statuses of injected failures")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+    parser.add_argument("--cards-file", help="JSON array of cards to serve instead of synthesized ones")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    cards = None
+    if args.cards_file:
+        with open(args.cards_file, encoding="utf-8") as f:
+            cards = json.load(f)
+
+    app = create_app(FakeAnthropicConfig(
+        latency=LatencyDistribution(args.latency),
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_statuses=[int(status) for status in args.error_statuses.split(",")],
+        retry_after_seconds=args.retry_after,
+        cards=cards,
+        seed=args.seed,
+    ))
+    logging.basicConfig(level=logging.INFO)
+    print(f"Fake Anthropic API on http://{args.host}:{args.port} - set ANTHROPIC_BASE_URL to use it")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,210 @@
+"""
+Load test of flashcard generation.
+
+Two modes, both meant to run against the fake API (fake_anthropic) so that
+what is measured is our own pipeline rather than the provider:
+- pipeline (default): generations run in this process through the real
+  FlashcardGenerator -> OpenAIService -> LLMClient path (chunking,
+  concurrency limits, pacing, retries, parsing, deduplication), with the
+  generation cache off
+- api: drive a running backend over HTTP - queue jobs with
+  POST /flashcards/generate, poll them and fetch their results - which
+  adds the job queue, workers and card inserts
+
+Pipeline mode refuses to run without ANTHROPIC_BASE_URL unless
+--allow-real-api is given. In api mode, the backend must be started with
+ANTHROPIC_BASE_URL pointing at the fake server.
+
+Run:
+    python -m app.loadtest.fake_anthropic --port 8089 --latency lognormal:1.5,0.4 &
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8089 python -m app.loadtest.generate --generations 200 --concurrency 20
+    python -m app.loadtest.generate --mode api --api-url http://localhost:8000 --token ... --material-id ...
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Sequence
+import asyncio
+import logging
+import math
+import random
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.flashcard_generation import flashcard_generator
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_JOB_STATUSES = ("completed", "failed", "cancelled")
+
+_WORDS = (
+    "célula membrana energía proceso sistema estructura función molécula proteína enzima "
+    "reacción equilibrio historia revolución economía sociedad gobierno territorio cultura "
+    "ecuación variable función derivada integral límite vector matriz probabilidad muestra"
+).split()
+
+
+@dataclass
+class LoadTestResult:
+    latencies: List[float] = field(default_factory=list)  # Seconds per successful generation
+    errors: List[str] = field(default_factory=list)
+    cards: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> dict:
+        succeeded = len(self.latencies)
+        return {
+            "generations": succeeded + len(self.errors),
+            "succeeded": succeeded,
+            "failed": len(self.errors),
+            "cards": self.cards,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "generations_per_second": round(succeeded / self.elapsed, 3) if self.elapsed else 0.0,
+            "cards_per_second": round(self.cards / self.elapsed, 3) if self.elapsed else 0.0,
+            "latency_p50": round(percentile(self.latencies, 50), 3),
+            "latency_p95": round(percentile(self.latencies, 95), 3),
+            "latency_p99": round(percentile(self.latencies, 99), 3),
+            "latency_max": round(max(self.latencies, default=0.0), 3),
+            "errors": sorted(set(self.errors)),
+        }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def synthetic_text(chars: int, seed: int) -> str:
+    """Study-material-like text of about chars characters (sentences and paragraphs)."""
+    rng = random.Random(seed)
+    paragraphs, length = [], 0
+    while length < chars:
+        sentences = [
+            " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(3, 6))
+        ]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:chars]
+
+
+async def run_pipeline(
+    generations: int,
+    concurrency: int,
+    card_count: int = 20,
+    text_chars: int = 20000
+) -> LoadTestResult:
+    """Run generations in this process through FlashcardGenerator."""
+    result = LoadTestResult()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(index: int) -> None:
+        text = synthetic_text(text_chars, seed=index)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                cards = await flashcard_generator.generate(text=text, count=card_count, use_cache=False)
+            except Exception as e:
+                result.errors.append(f"{type(e).__name__}: {e}")
+                return
+            result.latencies.append(time.perf_counter() - started)
+            result.cards += len(cards)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(generate(i) for i in range(generations)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def run_api(
+    api_url: str,
+    token: str,
+    material_id: str,
+    generations: int,
+    concurrency: int,
+    card_count: int = 20,
+    poll_seconds: float = 0.5
+) -> LoadTestResult:
+    """Queue generation jobs on a running backend and wait for their results."""
+    result = LoadTestResult()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=api_url, headers={"Authorization": f"Bearer {token}"}, timeout=30
+    ) as client:
+
+        async def generate(index: int) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/flashcards/generate", json={
+                    "material_id": material_id, "card_count": card_count, "force_refresh": True,
+                })
+                if response.status_code != 202:
+                    result.errors.append(f"HTTP {response.status_code}")
+                    return
+
+                job = response.json()
+                while job["status"] not in TERMINAL_JOB_STATUSES:
+                    await asyncio.sleep(poll_seconds)
+                    job = (await client.get(f"/flashcards/jobs/{job['id']}")).json()
+
+                if job["status"] != "completed":
+                    result.errors.append(f"{job['status']}: {job.get('error_message')}")
+                    return
+
+                results = (await client.get(f"/flashcards/jobs/{job['id']}/results")).json()
+                result.latencies.append(time.perf_counter() - started)
+                result.cards += results["count"]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(generate(i) for i in range(generations)))
+        result.elapsed = time.perf_counter() - started
+
+    return result
+
+
+def _metric_lines(prefixes: Sequence[str]) -> List[str]:
+    return [
+        line for line in metrics.render().splitlines()
+        if line.startswith(tuple(prefixes)) and not line.startswith("#")
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Load test flashcard generation")
+    parser.add_argument("--mode", choices=("pipeline", "api"), default="pipeline")
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--card-count", type=int, default=20)
+    parser.add_argument("--text-chars", type=int, default=20000, help="Material size (pipeline mode)")
+    parser.add_argument("--api-url", default="http://localhost:8000", help="Backend URL (api mode)")
+    parser.add_argument("--token", help="Bearer token of a test user (api mode)")
+    parser.add_argument("--material-id", help="Completed material of that user (api mode)")
+    parser.add_argument("--allow-real-api", action="store_true", help="Run pipeline mode without ANTHROPIC_BASE_URL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.mode == "pipeline":
+        if not settings.ANTHROPIC_BASE_URL and not args.allow_real_api:
+            raise SystemExit("ANTHROPIC_BASE_URL is not set: this would call the real API (use --allow-real-api)")
+        outcome = asyncio.run(run_pipeline(args.generations, args.concurrency, args.card_count, args.text_chars))
+    else:
+        if not args.token or not args.material_id:
+            raise SystemExit("api mode needs --token and --material-id")
+        outcome = asyncio.run(run_api(
+            args.api_url, args.token, args.material_id, args.generations, args.concurrency, args.card_count
+        ))
+
+    print(json.dumps(outcome.summary(), indent=2, ensure_ascii=False))
+    if args.mode == "pipeline":
+        print("\n".join(_metric_lines(("llm_requests_total", "llm_tokens_total", "generation_chunk_requests_total"))))
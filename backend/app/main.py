@@ -5,14 +5,19 @@ Main entry point for the backend API.
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.config import settings
+from app.utils.uploads import FORM_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+from app.utils.metrics import metrics
+from app.services.pdf_extraction_pool import pdf_extraction_pool
+from app.services.ingestion import ingestion_service
+from app.services.generation_jobs import generation_job_service
 
 # Import routes
-from app.routes import auth, materials, flashcards, study, stats, goals
+from app.routes import auth, materials, flashcards, study, stats, goals, search
 
 
 @asynccontextmanager
@@ -24,11 +29,17 @@ async def lifespan(app: FastAPI):
     print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"📝 Environment: {settings.ENVIRONMENT}")
     print(f"🔧 Debug mode: {settings.DEBUG}")
+    pdf_extraction_pool.start()
+    await ingestion_service.start()
+    await generation_job_service.start()
 
     yield
 
     # Shutdown
     print(f"👋 Shutting down {settings.APP_NAME}")
+    await generation_job_service.stop()
+    await ingestion_service.stop()
+    pdf_extraction_pool.shutdown()
 
 
 # Initialize FastAPI app
@@ -42,6 +53,14 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Reject oversized uploads while the body is still streaming in
+# (added first so CORS headers still wrap its 413 responses)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.MAX_FILE_SIZE_MB * 1024 * 1024 + FORM_OVERHEAD_BYTES,
+    paths=["/materials/upload"],
+)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -76,6 +95,15 @@ async def health_check():
     )
 
 
+# Metrics endpoint
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Process metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
@@ -97,6 +125,7 @@ app.include_router(flashcards.router, prefix="/flashcards", tags=["Flashcards"])
 app.include_router(study.router, prefix="/study", tags=["Study"])
 app.include_router(stats.router, prefix="/stats", tags=["Stats"])
 app.include_router(goals.router, prefix="/goals", tags=["Goals"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
 
 
 # Global exception handler
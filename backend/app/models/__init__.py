@@ -4,20 +4,24 @@ Models package - SQLAlchemy ORM models.
 
 from app.models.user import User
 from app.models.study_material import StudyMaterial
+from app.models.material_content import MaterialContent
 from app.models.flashcard import Flashcard
 from app.models.card_stats import CardStats
 from app.models.card_review import CardReview
 from app.models.study_session import StudySession
 from app.models.user_stats import UserStats
 from app.models.user_goal import UserGoal
+from app.models.generation_job import GenerationJob
 
 __all__ = [
     "User",
     "StudyMaterial",
+    "MaterialContent",
     "Flashcard",
     "CardStats",
     "CardReview",
     "StudySession",
     "UserStats",
     "UserGoal",
+    "GenerationJob",
 ]
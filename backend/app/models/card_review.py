@@ -2,10 +2,11 @@
 CardReview model - History of all card reviews for analytics.
 """
 
-from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 
 from app.utils.database import Base
@@ -15,6 +16,9 @@ class CardReview(Base):
     """
     CardReview model.
     History of all card reviews for analytics and algorithm tuning.
+
+    The table is range-partitioned by month on reviewed_at (see
+    app.services.review_partitions), so reviewed_at is part of the primary key.
     """
     __tablename__ = "card_reviews"
 
@@ -49,8 +53,14 @@ class CardReview(Base):
     # Context
     session_id = Column(UUID(as_uuid=True), ForeignKey("study_sessions.id", ondelete="SET NULL"), nullable=True, index=True)
 
-    # Timestamp
-    reviewed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Timestamp (partition key)
+    reviewed_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False
+    )
 
     # Relationships
     # card = relationship("Flashcard", back_populates="reviews")
@@ -59,6 +69,8 @@ class CardReview(Base):
 
     __table_args__ = (
         CheckConstraint("rating IN (1, 2, 3, 4)", name="check_rating"),
+        Index("ix_card_reviews_user_id_reviewed_at", "user_id", "reviewed_at"),
+        {"postgresql_partition_by": "RANGE (reviewed_at)"},
     )
 
     def __repr__(self):
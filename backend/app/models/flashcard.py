@@ -2,9 +2,9 @@
 Flashcard model - Individual flashcards generated from study materials.
 """
 
-from sqlalchemy import Column, String, Text, Integer, Boolean, Float, DateTime, ForeignKey, ARRAY, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Integer, Boolean, Float, DateTime, ForeignKey, ARRAY, CheckConstraint, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 import uuid
 
@@ -23,13 +23,21 @@ class Flashcard(Base):
 
     # Foreign keys
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    material_id = Column(UUID(as_uuid=True), ForeignKey("study_materials.id", ondelete="CASCADE"), nullable=True)
+    material_id = Column(UUID(as_uuid=True), ForeignKey("study_materials.id", ondelete="CASCADE"), nullable=True, index=True)
 
     # Content
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
     explanation = Column(Text, nullable=True)
 
+    # Full-text search document (Spanish): question > answer > explanation
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('spanish'::regconfig, question), 'A') || "
+        "setweight(to_tsvector('spanish'::regconfig, answer), 'B') || "
+        "setweight(to_tsvector('spanish'::regconfig, coalesce(explanation, '')), 'C')",
+        persisted=True
+    )))
+
     # Metadata
     tags = Column(ARRAY(String), default=[])
     difficulty = Column(Integer, CheckConstraint("difficulty BETWEEN 1 AND 5"), default=3)
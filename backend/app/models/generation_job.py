@@ -0,0 +1,74 @@
+"""
+GenerationJob model - Persistent record of a background flashcard generation.
+"""
+
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, ARRAY, CheckConstraint, Index, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.utils.database import Base
+
+
+class GenerationJob(Base):
+    """
+    GenerationJob model.
+    One requested generation, moving through
+
+        queued -> running -> completed | failed | cancelled
+
+    Workers in any API process claim queued jobs with SELECT ... FOR UPDATE
+    SKIP LOCKED; failed attempts go back to queued (with a delay) until
+    max_attempts is reached.
+    """
+    __tablename__ = "generation_jobs"
+
+    # Primary key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Foreign keys
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    material_id = Column(UUID(as_uuid=True), ForeignKey("study_materials.id", ondelete="CASCADE"), nullable=False)
+
+    # Request: card_count, difficulty, page_start, page_end, force_refresh
+    params = Column(JSONB, nullable=False)
+
+    # State
+    status = Column(
+        String(20),
+        CheckConstraint("status IN ('queued', 'running', 'completed', 'failed', 'cancelled')"),
+        nullable=False,
+        default="queued"
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    error_message = Column(Text, nullable=True)
+
+    # Scheduling and ownership
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Retry backoff
+    locked_by = Column(String(100), nullable=True)  # Worker running the job
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Refreshed while running
+
+    # Results
+    card_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=True)
+    cards_created = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'running', 'completed', 'failed', 'cancelled')", name="check_generation_job_status"
+        ),
+        # Claiming: oldest due queued job
+        Index("ix_generation_jobs_queued", "run_after", "created_at", postgresql_where=text("status = 'queued'")),
+        # Per-user caps and listing
+        Index("ix_generation_jobs_user_status", "user_id", "status"),
+    )
+
+    def __repr__(self):
+        return f"<GenerationJob(id={self.id}, status={self.status}, attempts={self.attempts})>"
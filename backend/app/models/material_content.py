@@ -0,0 +1,56 @@
+"""
+MaterialContent model - Content-addressed store of extracted material text.
+"""
+
+from sqlalchemy import Column, String, Text, Integer, DateTime, ARRAY, CheckConstraint, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func
+from typing import Optional
+
+from app.utils.database import Base
+
+
+class MaterialContent(Base):
+    """
+    MaterialContent model.
+    One row per distinct uploaded document, keyed by SHA-256: of the raw
+    bytes for PDFs, of the normalized text for pasted content. Study
+    materials reference it instead of storing their own copy of the text.
+    """
+    __tablename__ = "material_contents"
+
+    # Primary key (hex SHA-256)
+    content_hash = Column(String(64), primary_key=True)
+
+    # Content
+    source = Column(String(10), nullable=False)  # pdf, text
+    extracted_text = Column(Text, nullable=False)
+    word_count = Column(Integer, nullable=False)
+
+    # Page index (PDFs only): page i is extracted_text[page_offsets[i]:page_offsets[i + 1]]
+    page_offsets = Column(ARRAY(Integer), nullable=True)
+
+    # Character offset where each paragraph starts
+    paragraph_offsets = Column(ARRAY(Integer), nullable=True)
+
+    # Full-text search document (Spanish) over the first 500,000 characters,
+    # which keeps the tsvector of long textbooks under PostgreSQL's 1 MB limit
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "to_tsvector('spanish'::regconfig, left(extracted_text, 500000))", persisted=True
+    )))
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("source IN ('pdf', 'text')", name="check_source"),
+    )
+
+    @property
+    def page_count(self) -> Optional[int]:
+        """Number of PDF pages, or None for pasted text."""
+        return len(self.page_offsets) - 1 if self.page_offsets else None
+
+    def __repr__(self):
+        return f"<MaterialContent(hash={self.content_hash[:12]}, source={self.source}, words={self.word_count})>"
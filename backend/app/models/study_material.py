@@ -2,10 +2,11 @@
 StudyMaterial model - Stores extracted text from PDFs or pasted content.
 """
 
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, ARRAY, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, ARRAY, CheckConstraint, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
+from typing import Optional
 import uuid
 
 from app.utils.database import Base
@@ -16,6 +17,10 @@ class StudyMaterial(Base):
     StudyMaterial model.
     Stores extracted text from uploaded PDFs or pasted content.
     NOTE: Original PDF files are NOT stored to save storage costs.
+
+    Text of uploads lives in the shared, content-addressed material_contents
+    table (see content_hash); older materials keep it inline. Read it via
+    the extracted_text property, which resolves either.
     """
     __tablename__ = "study_materials"
 
@@ -27,8 +32,16 @@ class StudyMaterial(Base):
 
     # Content
     filename = Column(String(500), nullable=False)
-    extracted_text = Column(Text, nullable=False)
+    # Legacy per-material copy; deferred so listing materials never loads it
+    inline_text = deferred(Column("extracted_text", Text, nullable=True))
+    content_hash = Column(
+        String(64), ForeignKey("material_contents.content_hash"), nullable=True, index=True
+    )
     word_count = Column(Integer)
+    # Full-text search document of the legacy inline text (NULL for shared content)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "to_tsvector('spanish'::regconfig, left(extracted_text, 500000))", persisted=True
+    )))
 
     # Categorization
     subject_category = Column(String(100), nullable=True)
@@ -49,6 +62,7 @@ class StudyMaterial(Base):
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
+    content = relationship("MaterialContent")  # Loaded on access; text can be large
     # user = relationship("User", back_populates="study_materials")
     # flashcards = relationship("Flashcard", back_populates="material", cascade="all, delete-orphan")
 
@@ -56,6 +70,22 @@ class StudyMaterial(Base):
         CheckConstraint("status IN ('pending', 'processing', 'completed', 'failed')", name="check_status"),
     )
 
+    @property
+    def extracted_text(self) -> str:
+        """Text of the material, from the shared content store or the inline copy."""
+        if self.content is not None:
+            return self.content.extracted_text
+        return self.inline_text or ""
+
+    @extracted_text.setter
+    def extracted_text(self, value: str) -> None:
+        self.inline_text = value
+
+    @property
+    def page_count(self) -> Optional[int]:
+        """Number of PDF pages with a page index, or None."""
+        return self.content.page_count if self.content is not None else None
+
     def __repr__(self):
         return f"<StudyMaterial(id={self.id}, filename={self.filename}, status={self.status})>"
 
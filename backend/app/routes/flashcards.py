@@ -3,8 +3,10 @@ Flashcards routes - CRUD operations for flashcards.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import json
 import uuid
 from datetime import datetime, date
 
@@ -16,19 +18,38 @@ from app.schemas.flashcard import (
     FlashcardConfirmRequest,
     FlashcardGenerateRequest,
     FlashcardGenerateResponse,
+    GenerationJobResponse,
 )
 from app.utils.database import get_db
 from app.utils.auth import get_current_user_id
 from app.models.flashcard import Flashcard
 from app.models.card_stats import CardStats
 from app.models.study_material import StudyMaterial
-from app.services.openai_service import openai_service
+from app.models.generation_job import GenerationJob
+from app.services.flashcard_generation import flashcard_generator
+from app.services.generation_jobs import (
+    BASE_AI_CONFIDENCE,
+    GenerationQueueFullError,
+    GenerationSourceError,
+    count_created_cards,
+    difficulty_name,
+    generation_job_service,
+    load_generation_source,
+    persist_generated_cards,
+)
+from app.services.stats_rollup import apply_mastery_delta
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+SOURCE_ERROR_STATUS = {
+    "not_found": status.HTTP_404_NOT_FOUND,
+    "not_ready": status.HTTP_409_CONFLICT,
+    "invalid": status.HTTP_400_BAD_REQUEST,
+}
+
 
 @router.post("", response_model=FlashcardResponse, status_code=status.HTTP_201_CREATED)
 async def create_flashcard(
@@ -218,7 +239,18 @@ async def update_flashcard(
     if request.difficulty is not None:
         flashcard.difficulty = request.difficulty
 
-    if request.status is not None:
+    if request.status is not None and request.status != flashcard.status:
+        # Keep the mastery breakdown in step with the set of active cards
+        if "active" in (request.status, flashcard.status):
+            from app.models.user_stats import UserStats
+            user_stats = db.query(UserStats).filter(UserStats.user_id == uuid.UUID(user_id)).first()
+            card_stats = db.query(CardStats).filter(CardStats.card_id == flashcard.id).first()
+            if user_stats:
+                level = card_stats.mastery_level if card_stats else "new"
+                if request.status == "active":
+                    apply_mastery_delta(user_stats, None, level)
+                else:
+                    apply_mastery_delta(user_stats, level, None)
         flashcard.status = request.status
 
     # Mark as edited if content changed
@@ -256,151 +288,293 @@ async def delete_flashcard(
 
     # Soft delete
     flashcard.deleted_at = datetime.utcnow()
+
+    # Active cards leave the user's mastery breakdown
+    if flashcard.status == "active":
+        from app.models.user_stats import UserStats
+        user_stats = db.query(UserStats).filter(UserStats.user_id == uuid.UUID(user_id)).first()
+        card_stats = db.query(CardStats).filter(CardStats.card_id == flashcard.id).first()
+        if user_stats:
+            apply_mastery_delta(user_stats, card_stats.mastery_level if card_stats else "new", None)
+
     db.commit()
 
     return None
 
 
-@router.post("/generate", response_model=FlashcardGenerateResponse)
+@router.post("/generate", response_model=GenerationJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def generate_flashcards(
     request: FlashcardGenerateRequest,
     user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
-    Generate flashcards from a study material using AI.
+    Queue a background job generating flashcards from a study material using AI.
 
     - **material_id**: ID of the source material
     - **card_count**: Number of flashcards to generate (default: 20, max: 100)
     - **difficulty**: Optional difficulty filter (1-5)
+    - **page_start** / **page_end**: Optional page range (1-based, inclusive) of a PDF material
+    - **force_refresh**: Generate new cards even if the same request was generated before
 
-    Generated cards are created with status "draft" for preview.
-    Use POST /flashcards/confirm to activate them.
+    Returns 202 with the job. Follow it with GET /flashcards/jobs/{id}
+    (or the /events SSE stream) and fetch the cards from
+    GET /flashcards/jobs/{id}/results once it is completed.
+    Generated cards are created with status "active".
 
     Requires authentication and ownership of the material.
+    Returns 429 if the user already has too many jobs queued or running.
     """
-    print(f"🎯 [GENERATE] Starting generation for material {request.material_id}")
     user_uuid = uuid.UUID(user_id)
 
-    # Get the material
-    print(f"📚 [GENERATE] Fetching material from database...")
-    material = db.query(StudyMaterial).filter(
-        StudyMaterial.id == request.material_id,
-        StudyMaterial.user_id == user_uuid,
-        StudyMaterial.deleted_at.is_(None)
-    ).first()
+    # Reject unusable materials now rather than in a failed job
+    _load_generation_source(db, request, user_uuid)
 
-    if not material:
-        print(f"❌ [GENERATE] Material not found")
+    try:
+        job = generation_job_service.enqueue(
+            db,
+            user_uuid,
+            request.material_id,
+            params={
+                "card_count": request.card_count,
+                "difficulty": request.difficulty,
+                "page_start": request.page_start,
+                "page_end": request.page_end,
+                "force_refresh": request.force_refresh,
+            }
+        )
+    except GenerationQueueFullError:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Study material not found"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many flashcard generations in progress. Please wait for one to finish."
         )
 
-    print(f"✅ [GENERATE] Material found: {material.filename}, {len(material.extracted_text)} chars")
+    logger.info(f"Queued generation job {job.id}: {request.card_count} flashcards for material {request.material_id}")
+    return GenerationJobResponse.model_validate(job)
+
+
+@router.get("/jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_generation_job(
+    job_id: uuid.UUID,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the status of a generation job (poll until completed, failed or cancelled).
+
+    Requires authentication and ownership.
+    """
+    return GenerationJobResponse.model_validate(_get_owned_job(db, job_id, uuid.UUID(user_id)))
+
 
-    # Validate material has text
-    if not material.extracted_text or len(material.extracted_text.strip()) < 50:
-        print(f"❌ [GENERATE] Insufficient text")
+@router.get("/jobs/{job_id}/results", response_model=FlashcardGenerateResponse)
+async def get_generation_job_results(
+    job_id: uuid.UUID,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the flashcards created by a completed generation job, in generation
+    order (cards deleted since are left out).
+
+    Returns 409 while the job is not completed.
+
+    Requires authentication and ownership.
+    """
+    job = _get_owned_job(db, job_id, uuid.UUID(user_id))
+
+    if job.status != "completed":
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Material does not contain sufficient text for generation"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=job.error_message if job.status == "failed" and job.error_message
+            else f"Generation job is not completed (status: {job.status})"
         )
 
-    try:
-        # Map difficulty number to difficulty string for OpenAI service
-        difficulty_map = {1: "easy", 2: "easy", 3: "medium", 4: "hard", 5: "hard"}
-        difficulty_str = difficulty_map.get(request.difficulty) if request.difficulty else None
-
-        # Generate flashcards using OpenAI
-        print(f"🤖 [GENERATE] Calling Claude API for {request.card_count} cards...")
-        logger.info(
-            f"Generating {request.card_count} flashcards for material {request.material_id}"
-        )
+    card_ids = job.card_ids or []
+    flashcards = db.query(Flashcard).filter(
+        Flashcard.id.in_(card_ids),
+        Flashcard.deleted_at.is_(None)
+    ).all() if card_ids else []
+    position = {card_id: i for i, card_id in enumerate(card_ids)}
+    flashcards.sort(key=lambda flashcard: position[flashcard.id])
+
+    return FlashcardGenerateResponse(
+        cards=[FlashcardResponse.model_validate(f) for f in flashcards],
+        material_id=job.material_id,
+        count=len(flashcards),
+        status="success"
+    )
 
-        generated_cards = await openai_service.generate_flashcards(
-            text=material.extracted_text,
-            count=request.card_count,
-            difficulty=difficulty_str,
-            subject=material.subject_category,
-            ai_confidence=0.85  # Base confidence score
-        )
 
-        print(f"✅ [GENERATE] Claude returned {len(generated_cards)} cards")
-
-        # Create flashcards in database with "draft" status
-        print(f"💾 [GENERATE] Saving {len(generated_cards)} cards to database...")
-        created_flashcards = []
-
-        for i, card_data in enumerate(generated_cards):
-            flashcard = Flashcard(
-                user_id=user_uuid,
-                material_id=request.material_id,
-                question=card_data['question'],
-                answer=card_data['answer'],
-                explanation=card_data.get('explanation'),
-                tags=card_data.get('tags', []),
-                difficulty=card_data.get('difficulty', 3),
-                ai_confidence=card_data.get('ai_confidence', 0.85),
-                is_edited=False,
-                status="active"  # AI-generated cards are immediately active
-            )
-
-            db.add(flashcard)
-            db.flush()  # Get the ID
-
-            # Create card stats with due_date set to today (available for study immediately)
-            card_stats = CardStats(
-                card_id=flashcard.id,
-                user_id=user_uuid,
-                due_date=date.today()  # Cards available for study immediately
-            )
-            db.add(card_stats)
-
-            created_flashcards.append(flashcard)
-
-        print(f"💾 [GENERATE] Committing to database...")
-        db.commit()
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job_events(
+    job_id: uuid.UUID,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream status changes of a generation job as Server-Sent Events.
 
-        # Refresh all flashcards to get updated data
-        print(f"🔄 [GENERATE] Refreshing flashcards...")
-        for flashcard in created_flashcards:
-            db.refresh(flashcard)
+    Each event is a JSON object with job_id, status, attempts,
+    cards_created and error_message. The stream ends once the job is
+    completed, failed or cancelled.
 
-        # Update user stats
-        print(f"📊 [GENERATE] Updating user stats...")
-        from app.models.user_stats import UserStats
-        user_stats = db.query(UserStats).filter(UserStats.user_id == user_uuid).first()
-        if user_stats:
-            user_stats.total_flashcards_created += len(created_flashcards)
-            db.commit()
+    Requires authentication and ownership.
+    """
+    _get_owned_job(db, job_id, uuid.UUID(user_id))
 
-        logger.info(f"Successfully created {len(created_flashcards)} draft flashcards")
+    async def event_stream():
+        async for event in generation_job_service.subscribe(job_id):
+            yield f"data: {json.dumps(event)}\n\n"
 
-        print(f"📦 [GENERATE] Building response...")
-        response = FlashcardGenerateResponse(
-            cards=[FlashcardResponse.model_validate(f) for f in created_flashcards],
-            material_id=request.material_id,
-            count=len(created_flashcards),
-            status="success"
-        )
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=GenerationJobResponse)
+async def cancel_generation_job(
+    job_id: uuid.UUID,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel a generation job.
+
+    Queued jobs are cancelled at once; running jobs stop shortly after
+    (cancel_requested is set until then) and keep no cards. Finished jobs
+    are returned unchanged.
+
+    Requires authentication and ownership.
+    """
+    job = _get_owned_job(db, job_id, uuid.UUID(user_id))
+    return GenerationJobResponse.model_validate(generation_job_service.cancel(db, job))
+
+
+@router.post("/jobs/{job_id}/retry", response_model=GenerationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def retry_generation_job(
+    job_id: uuid.UUID,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a failed or cancelled generation job again.
 
-        print(f"✅ [GENERATE] Response ready, returning {len(response.cards)} cards")
-        return response
+    Returns 409 for jobs that are queued, running or completed.
 
+    Requires authentication and ownership.
+    """
+    job = _get_owned_job(db, job_id, uuid.UUID(user_id))
+    try:
+        job = generation_job_service.retry(db, job)
     except ValueError as e:
-        logger.error(f"Validation error during generation: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return GenerationJobResponse.model_validate(job)
+
+
+@router.post("/generate/stream")
+async def generate_flashcards_stream(
+    request: FlashcardGenerateRequest,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate flashcards and stream each one as Server-Sent Events.
+
+    Takes the same body as POST /flashcards/generate. Each card is saved
+    as soon as the model finishes writing it, then sent as a `card` event
+    (JSON of FlashcardResponse). The stream ends with a `done` event
+    (`{"count": n, "material_id": ...}`), or an `error` event
+    (`{"detail": ...}`) if generation fails. Cards already sent are kept,
+    also when the client disconnects.
+
+    Requires authentication and ownership of the material.
+    """
+    user_uuid = uuid.UUID(user_id)
+    material, source_text = _load_generation_source(db, request, user_uuid)
+
+    logger.info(f"Streaming {request.card_count} flashcards for material {request.material_id}")
+
+    async def event_stream():
+        created = 0
+        try:
+            async for card_data in flashcard_generator.stream(
+                text=source_text,
+                count=request.card_count,
+                difficulty=difficulty_name(request.difficulty),
+                subject=material.subject_category,
+                ai_confidence=BASE_AI_CONFIDENCE,
+                use_cache=not request.force_refresh
+            ):
+                flashcard, = persist_generated_cards(db, user_uuid, request.material_id, [card_data])
+                db.commit()
+                created += 1
+                card = FlashcardResponse.model_validate(flashcard)
+                yield f"event: card\ndata: {card.model_dump_json()}\n\n"
+
+            done = {"count": created, "material_id": str(request.material_id)}
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+        except Exception as e:
+            logger.error(f"Error streaming flashcards: {e}")
+            db.rollback()
+            yield f"event: error\ndata: {json.dumps({'detail': f'Failed to generate flashcards: {e}'})}\n\n"
+
+        finally:
+            # Also runs when the client disconnects mid-stream
+            if created:
+                count_created_cards(db, user_uuid, created)
+                db.commit()
+            logger.info(f"Streamed {created} flashcards for material {request.material_id}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _load_generation_source(
+    db: Session,
+    request: FlashcardGenerateRequest,
+    user_uuid: uuid.UUID
+) -> Tuple[StudyMaterial, str]:
+    """
+    Load the material to generate from and the text to use (whole text or
+    the requested page range).
+
+    Raises:
+        HTTPException: 404 if not found, 409 if not processed yet, 400 for
+            invalid page ranges or too little text
+    """
+    try:
+        material, source_text = load_generation_source(
+            db, user_uuid, request.material_id, request.page_start, request.page_end
         )
+    except GenerationSourceError as e:
+        raise HTTPException(status_code=SOURCE_ERROR_STATUS[e.reason], detail=str(e))
 
-    except Exception as e:
-        logger.error(f"Error generating flashcards: {e}")
+    return material, source_text
+
+
+def _get_owned_job(db: Session, job_id: uuid.UUID, user_uuid: uuid.UUID) -> GenerationJob:
+    """
+    Raises:
+        HTTPException: 404 if the job does not exist or belongs to another user
+    """
+    job = db.query(GenerationJob).filter(
+        GenerationJob.id == job_id,
+        GenerationJob.user_id == user_uuid
+    ).first()
+
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate flashcards: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation job not found"
         )
+    return job
 
 
 @router.post("/confirm", status_code=status.HTTP_200_OK)
@@ -442,14 +616,14 @@ async def confirm_flashcards(
                     print(f"📅 [CONFIRM] Setting due_date to today for card {flashcard_id}")
                     card_stats.due_date = date.today()  # Available for study immediately
 
-                    # Update user card counts
-                    from app.models.user_stats import UserStats
-                    user_stats = db.query(UserStats).filter(
-                        UserStats.user_id == uuid.UUID(user_id)
-                    ).first()
-                    if user_stats:
-                        user_stats.cards_new += 1
-                        print(f"📊 [CONFIRM] Updated cards_new to {user_stats.cards_new}")
+                # The card now counts towards the user's mastery breakdown
+                from app.models.user_stats import UserStats
+                user_stats = db.query(UserStats).filter(
+                    UserStats.user_id == uuid.UUID(user_id)
+                ).first()
+                if user_stats:
+                    apply_mastery_delta(user_stats, None, card_stats.mastery_level if card_stats else "new")
+                    print(f"📊 [CONFIRM] Updated mastery counts (cards_new={user_stats.cards_new})")
 
                 confirmed_count += 1
             else:
@@ -2,28 +2,60 @@
 Materials routes - CRUD operations for study materials.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, String, and_, case, func, literal, select, tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from app.schemas.material import (
     MaterialCreate,
     MaterialUpdate,
     MaterialResponse,
     MaterialListResponse,
+    MaterialSummaryResponse,
+    MaterialStatusResponse,
+    MaterialPage,
+    MaterialPagesResponse,
+    MaterialFlashcard,
+    MaterialFlashcardStats,
+    MaterialFlashcardsResponse,
 )
 from app.utils.database import get_db
 from app.utils.auth import get_current_user_id
+from app.utils.cursors import decode_cursor, encode_cursor
 from app.models.study_material import StudyMaterial
-from app.services.pdf_service import pdf_service
+from app.models.material_content import MaterialContent
+from app.services.material_content import check_page_range, material_content_store, text_content_hash
+from app.services.pdf_extraction_pool import spool_to_disk
+from app.services.text_normalizer import text_normalizer
+from app.services.ingestion import (
+    IngestionJob,
+    IngestionQueueFullError,
+    event_from_material,
+    ingestion_service,
+)
+from app.utils.uploads import UploadTooLargeError, spool_upload
+from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MATERIAL_PAGES_MAX_RANGE = 50
+MATERIAL_EXCERPT_MAX_CHARS = 1000
+MATERIAL_FLASHCARDS_PAGE_SIZE = 100
+MATERIAL_FLASHCARDS_MAX_PAGE = 500
+
+# Sort order of mastery levels for order=mastery (least mastered first)
+MASTERY_ORDER = ("new", "learning", "young", "mature", "mastered")
+
 
 @router.post("", response_model=MaterialResponse, status_code=status.HTTP_201_CREATED)
 async def create_material(
@@ -41,14 +73,21 @@ async def create_material(
 
     Requires authentication.
     """
-    # Count words
-    word_count = len(request.extracted_text.split())
+    # Reuse stored content for identical text
+    content_hash = text_content_hash(request.extracted_text)
+    content = material_content_store.get(db, content_hash)
+    if content is None:
+        document = text_normalizer.normalize(request.extracted_text)
+        material_content_store.put(db, content_hash, "text", document)
+        word_count = document.word_count
+    else:
+        word_count = content.word_count
 
     # Create material
     material = StudyMaterial(
         user_id=uuid.UUID(user_id),
         filename=request.filename,
-        extracted_text=request.extracted_text,
+        content_hash=content_hash,
         word_count=word_count,
         subject_category=request.subject_category,
         tags=request.tags,
@@ -70,7 +109,7 @@ async def create_material(
     return MaterialResponse.model_validate(material)
 
 
-@router.post("/upload", response_model=MaterialResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/upload", response_model=MaterialResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_material(
     file: Optional[UploadFile] = File(None),
     text: Optional[str] = Form(None),
@@ -87,7 +126,7 @@ async def upload_material(
     1. PDF Upload: Provide file (PDF), extracts text automatically
     2. Text Paste: Provide text directly (no file)
 
-    - **file**: Optional PDF file (max 10MB)
+    - **file**: Optional PDF file (max MAX_FILE_SIZE_MB, 10MB by default)
     - **text**: Optional text content (use if no file)
     - **filename**: Name for the material
     - **subject_category**: Optional subject category
@@ -95,6 +134,12 @@ async def upload_material(
 
     Must provide either file OR text, not both.
 
+    Returns 202 with a `pending` material right away; extraction runs in
+    the background. Follow progress with GET /materials/{id}/status or the
+    SSE stream at GET /materials/{id}/events. Content that was uploaded
+    before (same PDF bytes or same text) is reused and comes back
+    `completed` immediately.
+
     Requires authentication.
     """
     user_uuid = uuid.UUID(user_id)
@@ -112,11 +157,17 @@ async def upload_material(
             detail="Must provide either a PDF file or text content"
         )
 
+    if not ingestion_service.has_capacity():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many materials are being processed. Please try again shortly.",
+            headers={"Retry-After": "30"}
+        )
+
     # Parse tags if provided
     parsed_tags = []
     if tags:
         try:
-            import json
             parsed_tags = json.loads(tags)
             if not isinstance(parsed_tags, list):
                 raise ValueError("Tags must be an array")
@@ -124,8 +175,8 @@ async def upload_material(
             logger.warning(f"Failed to parse tags: {e}")
             parsed_tags = []
 
-    extracted_text = None
-    error_message = None
+    job = None
+    content = None
 
     try:
         # Handle PDF file upload
@@ -139,29 +190,24 @@ async def upload_material(
 
             logger.info(f"Processing PDF upload: {file.filename}")
 
-            # Read file bytes
-            file_bytes = await file.read()
-
-            # Extract text using PDF service
+            # Stream the upload in chunks, rejecting it once it crosses the size limit
             try:
-                extracted_text = pdf_service.extract_text_from_pdf(file_bytes)
-
-                # Get stats
-                stats = pdf_service.get_text_stats(extracted_text)
-                logger.info(
-                    f"Extracted {stats['word_count']} words from PDF "
-                    f"(~{stats['estimated_reading_time_minutes']} min read)"
-                )
-
-            except ValueError as e:
-                # PDF processing error (file too large, encrypted, etc.)
-                error_message = str(e)
-                logger.error(f"PDF processing error: {e}")
+                upload = await spool_upload(file, max_bytes=settings.MAX_FILE_SIZE_MB * 1024 * 1024)
+            except UploadTooLargeError as e:
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=error_message
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=str(e)
                 )
 
+            logger.info(f"Spooled {upload.size} bytes (sha256 {upload.sha256[:12]})")
+
+            content_hash = upload.sha256
+            content = material_content_store.get(db, content_hash)
+            if content is None:
+                # Keep a copy on disk for the background worker (the upload is closed with the request)
+                pdf_path = await asyncio.to_thread(spool_to_disk, upload.file)
+                job = IngestionJob(material_id=None, pdf_path=pdf_path, content_hash=content_hash)
+
         # Handle pasted text
         else:
             extracted_text = text.strip()
@@ -175,26 +221,55 @@ async def upload_material(
 
             logger.info(f"Processing pasted text: {len(extracted_text)} characters")
 
-        # Count words
-        word_count = len(extracted_text.split())
-
-        # Create material
-        material = StudyMaterial(
-            user_id=user_uuid,
-            filename=filename,
-            extracted_text=extracted_text,
-            word_count=word_count,
-            subject_category=subject_category,
-            tags=parsed_tags,
-            status="completed",
-            processed_at=datetime.utcnow(),
-            error_message=error_message
-        )
+            content_hash = text_content_hash(extracted_text)
+            content = material_content_store.get(db, content_hash)
+            if content is None:
+                job = IngestionJob(material_id=None, text=extracted_text, content_hash=content_hash)
+
+        if content is not None:
+            # Already extracted for an identical upload: reference the shared text
+            logger.info(f"Content {content_hash[:12]} already stored; skipping extraction")
+            material = StudyMaterial(
+                user_id=user_uuid,
+                filename=filename,
+                content_hash=content.content_hash,
+                word_count=content.word_count,
+                subject_category=subject_category,
+                tags=parsed_tags,
+                status="completed",
+                processed_at=datetime.utcnow()
+            )
+        else:
+            # Text and stats are filled in by the ingestion worker
+            material = StudyMaterial(
+                user_id=user_uuid,
+                filename=filename,
+                subject_category=subject_category,
+                tags=parsed_tags,
+                status="pending"
+            )
 
         db.add(material)
         db.commit()
         db.refresh(material)
 
+        if job is not None:
+            job.material_id = material.id
+            try:
+                ingestion_service.enqueue(job)
+            except IngestionQueueFullError:
+                # Refused: leave no trace of the upload
+                db.delete(material)
+                db.commit()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many materials are being processed. Please try again shortly.",
+                    headers={"Retry-After": "30"}
+                )
+
+            logger.info(f"Queued material {material.id} for processing")
+            job = None  # Owned by the ingestion worker now
+
         # Update user stats
         from app.models.user_stats import UserStats
         user_stats = db.query(UserStats).filter(
@@ -205,8 +280,6 @@ async def upload_material(
             user_stats.total_materials_uploaded += 1
             db.commit()
 
-        logger.info(f"Successfully created material {material.id} with {word_count} words")
-
         return MaterialResponse.model_validate(material)
 
     except HTTPException:
@@ -219,12 +292,130 @@ async def upload_material(
             detail=f"Failed to process material: {str(e)}"
         )
 
+    finally:
+        if job is not None and job.pdf_path and os.path.exists(job.pdf_path):
+            os.unlink(job.pdf_path)
+
+
+@router.get("/{material_id}/status", response_model=MaterialStatusResponse)
+async def get_material_status(
+    material_id: str,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the processing status of a material.
+
+    Lightweight endpoint for polling after an upload: returns status,
+    current stage, progress (0-1) and error_message, without the text.
+
+    Requires authentication and ownership.
+    """
+    material = _get_owned_material(db, material_id, user_id)
+
+    # Live stage from this process's workers if available, else the stored state
+    event = ingestion_service.latest_event(material.id) or event_from_material(material)
+    return MaterialStatusResponse(
+        id=material.id,
+        status=event["status"],
+        stage=event["stage"],
+        progress=event["progress"],
+        word_count=material.word_count,
+        error_message=material.error_message,
+        processed_at=material.processed_at
+    )
+
+
+@router.get("/{material_id}/events")
+async def stream_material_events(
+    material_id: str,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream processing progress of a material as Server-Sent Events.
+
+    Each `progress` event carries a JSON object with status, stage,
+    progress (0-1) and error_message. The stream ends after the material
+    is completed or failed.
+
+    Requires authentication and ownership.
+    """
+    material = _get_owned_material(db, material_id, user_id)
+
+    async def event_stream():
+        async for event in ingestion_service.subscribe(material.id):
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{material_id}/pages", response_model=MaterialPagesResponse)
+async def get_material_pages(
+    material_id: str,
+    start: int = Query(1, ge=1, description="First page (1-based)"),
+    end: Optional[int] = Query(None, ge=1, description="Last page, inclusive (default: start)"),
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the text of a page range of a PDF material.
+
+    Reads only the requested pages from storage, at most
+    MATERIAL_PAGES_MAX_RANGE per request.
+
+    Requires authentication and ownership.
+    """
+    material = _get_owned_material(db, material_id, user_id)
+    end = end or start
+
+    if end - start + 1 > MATERIAL_PAGES_MAX_RANGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MATERIAL_PAGES_MAX_RANGE} pages can be requested at once"
+        )
+
+    page_offsets = material_content_store.get_page_offsets(db, material.content_hash) if material.content_hash else None
+    try:
+        check_page_range(page_offsets, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    texts = material_content_store.read_pages(db, material.content_hash, page_offsets, start, end)
+    return MaterialPagesResponse(
+        material_id=material.id,
+        page_count=len(page_offsets) - 1,
+        pages=[MaterialPage(page_number=start + i, text=text) for i, text in enumerate(texts)]
+    )
+
+
+def _get_owned_material(db: Session, material_id: str, user_id: str) -> StudyMaterial:
+    """Load a material owned by the user or raise 404."""
+    material = db.query(StudyMaterial).filter(
+        StudyMaterial.id == uuid.UUID(material_id),
+        StudyMaterial.user_id == uuid.UUID(user_id),
+        StudyMaterial.deleted_at.is_(None)
+    ).first()
+
+    if not material:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Material not found"
+        )
+
+    return material
+
 
 @router.get("", response_model=MaterialListResponse)
 async def list_materials(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     subject_category: Optional[str] = None,
+    excerpt_length: int = Query(0, ge=0, le=MATERIAL_EXCERPT_MAX_CHARS),
     user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
@@ -234,11 +425,13 @@ async def list_materials(
     - **page**: Page number (default: 1)
     - **page_size**: Number of items per page (default: 20, max: 100)
     - **subject_category**: Optional filter by subject category
+    - **excerpt_length**: Characters of text to include as `excerpt` (default: 0 = none)
+
+    Returns summaries without the extracted text; fetch it with
+    GET /materials/{id} or, in ranges, GET /materials/{id}/text.
 
     Requires authentication.
     """
-    from app.models.flashcard import Flashcard
-
     # Base query
     query = db.query(StudyMaterial).filter(
         StudyMaterial.user_id == uuid.UUID(user_id),
@@ -252,31 +445,168 @@ async def list_materials(
     # Get total count
     total = query.count()
 
+    # Only small derived values of the content row are selected, never the text itself
+    page_count = func.array_length(MaterialContent.page_offsets, 1) - 1
+    excerpt = (
+        func.substr(_material_text(), 1, excerpt_length) if excerpt_length else literal(None, String)
+    )
+
     # Apply pagination
     offset = (page - 1) * page_size
-    materials = query.order_by(StudyMaterial.created_at.desc()).offset(offset).limit(page_size).all()
-
-    # Add flashcard count to each material
-    materials_with_count = []
-    for material in materials:
-        material_dict = MaterialResponse.model_validate(material).model_dump()
-        # Count active flashcards for this material
-        flashcard_count = db.query(Flashcard).filter(
-            Flashcard.material_id == material.id,
-            Flashcard.status == 'active',
-            Flashcard.deleted_at.is_(None)
-        ).count()
-        material_dict['flashcard_count'] = flashcard_count
-        materials_with_count.append(MaterialResponse(**material_dict))
+    rows = query.outerjoin(
+        MaterialContent, MaterialContent.content_hash == StudyMaterial.content_hash
+    ).add_columns(
+        page_count.label("page_count"),
+        excerpt.label("excerpt")
+    ).order_by(
+        StudyMaterial.created_at.desc()
+    ).offset(offset).limit(page_size).all()
+
+    # Active flashcard counts for the whole page in one grouped query
+    flashcard_counts = _active_flashcard_counts(db, [material.id for material, _, _ in rows])
+    summaries = [
+        _material_summary(material, flashcard_counts.get(material.id, 0), material_page_count, material_excerpt)
+        for material, material_page_count, material_excerpt in rows
+    ]
 
     return MaterialListResponse(
-        materials=materials_with_count,
+        materials=summaries,
         total=total,
         page=page,
         page_size=page_size
     )
 
 
+@router.get("/{material_id}/text")
+async def get_material_text(
+    material_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the extracted text of a material as UTF-8 plain text.
+
+    Supports single HTTP byte ranges (`Range: bytes=0-65535`), answered
+    with 206 Partial Content; only the requested bytes are read from the
+    database. Without a Range header the whole text is returned.
+
+    Requires authentication and ownership.
+    """
+    material = _get_owned_material(db, material_id, user_id)
+
+    def text_query(*columns):
+        return db.query(*columns).select_from(StudyMaterial).outerjoin(
+            MaterialContent, MaterialContent.content_hash == StudyMaterial.content_hash
+        ).filter(StudyMaterial.id == material.id)
+
+    headers = {"Accept-Ranges": "bytes"}
+    media_type = "text/plain; charset=utf-8"
+
+    if range_header:
+        total = text_query(func.octet_length(_material_text())).scalar() or 0
+        try:
+            byte_range = _parse_byte_range(range_header, total)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{total}"}
+            )
+
+        if byte_range is not None:
+            first, last = byte_range
+            data = text_query(
+                func.substring(func.convert_to(_material_text(), "UTF8"), first + 1, last - first + 1)
+            ).scalar() or b""
+            return Response(
+                content=bytes(data),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers={**headers, "Content-Range": f"bytes {first}-{last}/{total}"}
+            )
+
+    text = text_query(_material_text()).scalar() or ""
+    return Response(content=text, media_type=media_type, headers=headers)
+
+
+def _material_text():
+    """SQL expression for a material's text (shared content or legacy inline copy)."""
+    return func.coalesce(MaterialContent.extracted_text, StudyMaterial.inline_text, "")
+
+
+def _parse_byte_range(header: str, total: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (first, last) offsets.
+
+    Returns None for headers that should be ignored (other units, multiple
+    or malformed ranges), which means serving the full text.
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec or "-" not in spec:
+        return None
+
+    first_text, _, last_text = spec.strip().partition("-")
+    try:
+        if first_text:
+            first = int(first_text)
+            last = int(last_text) if last_text else total - 1
+        else:
+            # Suffix range: the final N bytes
+            first = max(0, total - int(last_text))
+            last = total - 1
+    except ValueError:
+        return None
+
+    if first > last and first_text and last_text:
+        return None
+    if first >= total or total == 0:
+        raise ValueError("Range not satisfiable")
+    return first, min(last, total - 1)
+
+
+def _active_flashcard_counts(db: Session, material_ids: List[uuid.UUID]) -> Dict[uuid.UUID, int]:
+    """Active flashcards per material, counted in a single grouped query."""
+    from app.models.flashcard import Flashcard
+
+    if not material_ids:
+        return {}
+
+    rows = db.query(Flashcard.material_id, func.count(Flashcard.id)).filter(
+        Flashcard.material_id.in_(material_ids),
+        Flashcard.status == 'active',
+        Flashcard.deleted_at.is_(None)
+    ).group_by(Flashcard.material_id).all()
+
+    return dict(rows)
+
+
+def _material_summary(
+    material: StudyMaterial,
+    flashcard_count: int,
+    page_count: Optional[int],
+    excerpt: Optional[str]
+) -> MaterialSummaryResponse:
+    return MaterialSummaryResponse(
+        id=material.id,
+        user_id=material.user_id,
+        filename=material.filename,
+        word_count=material.word_count,
+        subject_category=material.subject_category,
+        tags=material.tags or [],
+        status=material.status,
+        processed_at=material.processed_at,
+        error_message=material.error_message,
+        created_at=material.created_at,
+        updated_at=material.updated_at,
+        flashcard_count=flashcard_count,
+        page_count=page_count,
+        excerpt=excerpt
+    )
+
+
 @router.get("/{material_id}", response_model=MaterialResponse)
 async def get_material(
     material_id: str,
@@ -288,8 +618,6 @@ async def get_material(
 
     Requires authentication and ownership.
     """
-    from app.models.flashcard import Flashcard
-
     material = db.query(StudyMaterial).filter(
         StudyMaterial.id == uuid.UUID(material_id),
         StudyMaterial.user_id == uuid.UUID(user_id),
@@ -303,15 +631,10 @@ async def get_material(
         )
 
     # Add flashcard count
-    material_dict = MaterialResponse.model_validate(material).model_dump()
-    flashcard_count = db.query(Flashcard).filter(
-        Flashcard.material_id == material.id,
-        Flashcard.status == 'active',
-        Flashcard.deleted_at.is_(None)
-    ).count()
-    material_dict['flashcard_count'] = flashcard_count
+    response = MaterialResponse.model_validate(material)
+    response.flashcard_count = _active_flashcard_counts(db, [material.id]).get(material.id, 0)
 
-    return MaterialResponse(**material_dict)
+    return response
 
 
 @router.put("/{material_id}", response_model=MaterialResponse)
@@ -388,84 +711,177 @@ async def delete_material(
     return None
 
 
-@router.get("/{material_id}/flashcards")
+@router.get("/{material_id}/flashcards", response_model=MaterialFlashcardsResponse)
 async def get_material_flashcards(
     material_id: str,
+    order: str = Query("created", pattern="^(created|mastery|due)$"),
+    limit: Optional[int] = Query(None, ge=1, le=MATERIAL_FLASHCARDS_MAX_PAGE),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
-    Get all flashcards for a specific material.
+    Get the flashcards of a specific material, with their review stats.
+
+    Returns active flashcards associated with this material, regardless
+    of their due_date (for manual/free study mode).
 
-    Returns all active flashcards associated with this material,
-    regardless of their due_date (for manual/free study mode).
+    - **order**: `created` (default), `mastery` (least mastered first) or `due` (earliest first)
+    - **limit**: Cards per page (default: 100, max: 500)
+    - **cursor**: `next_cursor` of the previous page
+    - **format**: `json` (default) or `ndjson` to stream one card per line,
+      without a page limit unless `limit` is given
 
     Requires authentication and ownership.
     """
+    material = _get_owned_material(db, material_id, user_id)
+
+    try:
+        after = _decode_flashcard_cursor(cursor, order) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    query = _material_flashcards_query(material.id, material.user_id, order, after)
+
+    if format == "ndjson":
+        if limit is not None:
+            query = query.limit(limit)
+
+        def card_lines():
+            # Server-side cursor: rows are fetched in batches while streaming
+            for row in db.execute(query.execution_options(yield_per=MATERIAL_FLASHCARDS_PAGE_SIZE)):
+                yield _material_flashcard(row).model_dump_json() + "\n"
+
+        return StreamingResponse(card_lines(), media_type="application/x-ndjson")
+
+    limit = limit or MATERIAL_FLASHCARDS_PAGE_SIZE
+    # One extra row tells whether there is a next page
+    rows = db.execute(query.limit(limit + 1)).all()
+    next_cursor = _encode_flashcard_cursor(order, rows[limit - 1]) if len(rows) > limit else None
+
+    return MaterialFlashcardsResponse(
+        material_id=material.id,
+        material_name=material.filename,
+        flashcards=[_material_flashcard(row) for row in rows[:limit]],
+        total=_active_flashcard_counts(db, [material.id]).get(material.id, 0),
+        next_cursor=next_cursor
+    )
+
+
+def _flashcard_sort_key(order: str):
+    """Leading keyset column for an order (Flashcard.id breaks ties)."""
     from app.models.flashcard import Flashcard
     from app.models.card_stats import CardStats
-    from app.schemas.flashcard import FlashcardResponse
-
-    # Verify material ownership
-    material = db.query(StudyMaterial).filter(
-        StudyMaterial.id == uuid.UUID(material_id),
-        StudyMaterial.user_id == uuid.UUID(user_id),
-        StudyMaterial.deleted_at.is_(None)
-    ).first()
 
-    if not material:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Material not found"
+    if order == "mastery":
+        return case(
+            *[(CardStats.mastery_level == level, rank) for rank, level in enumerate(MASTERY_ORDER)],
+            else_=0
         )
+    if order == "due":
+        # Cards never reviewed are due first
+        return func.coalesce(CardStats.due_date, literal(date.min))
+    return Flashcard.created_at
+
+
+def _material_flashcards_query(
+    material_id: uuid.UUID,
+    user_id: uuid.UUID,
+    order: str,
+    after: Optional[Tuple] = None
+) -> Select:
+    """
+    Active flashcards of a material joined with their stats.
+
+    A single query: the card columns the response needs, LEFT JOIN
+    card_stats, ordered by (sort key, id) and starting after the keyset
+    position `after`, if given.
+    """
+    from app.models.flashcard import Flashcard
+    from app.models.card_stats import CardStats
 
-    # Get all active flashcards for this material
-    flashcards = db.query(Flashcard).filter(
-        Flashcard.material_id == uuid.UUID(material_id),
-        Flashcard.user_id == uuid.UUID(user_id),
+    sort_key = _flashcard_sort_key(order)
+
+    query = select(
+        Flashcard.id,
+        Flashcard.question,
+        Flashcard.answer,
+        Flashcard.explanation,
+        Flashcard.difficulty,
+        Flashcard.tags,
+        Flashcard.status,
+        Flashcard.material_id,
+        Flashcard.created_at,
+        CardStats.mastery_level,
+        CardStats.total_reviews,
+        CardStats.due_date,
+        sort_key.label("sort_key"),
+    ).outerjoin(
+        CardStats,
+        and_(CardStats.card_id == Flashcard.id, CardStats.user_id == user_id)
+    ).where(
+        Flashcard.material_id == material_id,
+        Flashcard.user_id == user_id,
         Flashcard.status == 'active',
         Flashcard.deleted_at.is_(None)
-    ).all()
-
-    # Build response with stats for each card
-    cards_with_stats = []
-    for card in flashcards:
-        card_dict = {
-            "id": str(card.id),
-            "question": card.question,
-            "answer": card.answer,
-            "explanation": card.explanation,
-            "difficulty": card.difficulty,
-            "tags": card.tags,
-            "status": card.status,
-            "material_id": str(card.material_id) if card.material_id else None,
-            "created_at": card.created_at.isoformat() if card.created_at else None,
-        }
-
-        # Get stats for this card
-        stats = db.query(CardStats).filter(
-            CardStats.card_id == card.id,
-            CardStats.user_id == uuid.UUID(user_id)
-        ).first()
+    )
 
-        if stats:
-            card_dict["stats"] = {
-                "mastery_level": stats.mastery_level,
-                "total_reviews": stats.total_reviews,
-                "due_date": stats.due_date.isoformat() if stats.due_date else None,
-            }
-        else:
-            card_dict["stats"] = {
-                "mastery_level": "new",
-                "total_reviews": 0,
-                "due_date": None,
-            }
-
-        cards_with_stats.append(card_dict)
-
-    return {
-        "material_id": str(material.id),
-        "material_name": material.filename,
-        "flashcards": cards_with_stats,
-        "total": len(cards_with_stats)
-    }
+    if after is not None:
+        query = query.where(tuple_(sort_key, Flashcard.id) > tuple_(*after))
+
+    return query.order_by(sort_key, Flashcard.id)
+
+
+def _material_flashcard(row) -> MaterialFlashcard:
+    return MaterialFlashcard(
+        id=row.id,
+        question=row.question,
+        answer=row.answer,
+        explanation=row.explanation,
+        difficulty=row.difficulty,
+        tags=row.tags or [],
+        status=row.status,
+        material_id=row.material_id,
+        created_at=row.created_at,
+        stats=MaterialFlashcardStats(
+            mastery_level=row.mastery_level or "new",
+            total_reviews=row.total_reviews or 0,
+            due_date=row.due_date
+        )
+    )
+
+
+def _encode_flashcard_cursor(order: str, row) -> str:
+    """Opaque cursor for the keyset position after a row."""
+    key = row.sort_key
+    if isinstance(key, (date, datetime)):
+        key = key.isoformat()
+    return encode_cursor(order, key, str(row.id))
+
+
+def _decode_flashcard_cursor(cursor: str, order: str) -> Tuple:
+    """
+    Keyset position (sort key, card id) from a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another order
+    """
+    cursor_order, key, card_id = decode_cursor(cursor, 3)
+    if cursor_order != order:
+        raise ValueError("Cursor was issued for a different order")
+
+    try:
+        if order == "created":
+            key = datetime.fromisoformat(key)
+        elif order == "due":
+            key = date.fromisoformat(key)
+        elif not isinstance(key, int):
+            raise ValueError("Malformed cursor")
+
+        return key, uuid.UUID(card_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
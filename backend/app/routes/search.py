@@ -0,0 +1,65 @@
+"""
+Search routes - Full-text search across flashcards and materials.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+import uuid
+
+from app.schemas.search import SearchResponse, SearchResult
+from app.services.search import SEARCH_KINDS, search_service
+from app.utils.database import get_db
+from app.utils.auth import get_current_user_id
+
+router = APIRouter()
+
+SEARCH_MAX_PAGE = 50
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    type: str = Query("all", pattern="^(all|flashcards|materials)$"),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_PAGE),
+    cursor: Optional[str] = None,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Search flashcards (question, answer, explanation) and material text.
+
+    - **q**: Search terms; supports "quoted phrases", `or` and `-excluded` words
+    - **type**: `all` (default), `flashcards` or `materials`
+    - **limit**: Results per page (default: 20, max: 50)
+    - **cursor**: `next_cursor` of the previous page
+
+    Results are ranked best first, with highlighted snippets.
+
+    Requires authentication.
+    """
+    kinds = SEARCH_KINDS if type == "all" else (type[:-1],)
+
+    try:
+        page = search_service.search(db, uuid.UUID(user_id), q, kinds, limit, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    return SearchResponse(
+        query=q,
+        results=[
+            SearchResult(
+                kind=hit.kind,
+                id=hit.id,
+                title=hit.title,
+                snippet=hit.snippet,
+                rank=hit.rank,
+                material_id=hit.material_id
+            )
+            for hit in page.hits
+        ],
+        next_cursor=page.next_cursor
+    )
@@ -2,11 +2,11 @@
 Stats routes - Statistics and analytics endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, desc
 from typing import List, Optional
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
 
 from app.utils.database import get_db
 from app.utils.auth import get_current_user_id
@@ -18,13 +18,18 @@ from app.models.card_review import CardReview
 from app.models.user_goal import UserGoal
 from app.schemas.stats import (
     DashboardStats,
+    MasteryBreakdown,
     TodayStats,
     HeatmapDay,
     SubjectProgress,
     DeckMetrics,
-    ProblematicCard
+    ProblematicCard,
+    ReviewAnalytics
 )
 from app.schemas.goal import DailyProgressResponse
+from app.services.review_analytics import get_review_analytics
+from app.services.stats_rollup import rollup_users
+import uuid
 
 router = APIRouter()
 
@@ -234,11 +239,11 @@ async def get_dashboard_stats(
     ).first()
 
     if not user_stats:
-        # Create new user stats
-        user_stats = UserStats(user_id=user_id)
-        db.add(user_stats)
-        db.commit()
-        db.refresh(user_stats)
+        # Create the row with its mastery breakdown computed from card_stats
+        rollup_users(db, [uuid.UUID(str(user_id))])
+        user_stats = db.query(UserStats).filter(
+            UserStats.user_id == user_id
+        ).first()
 
     # Calculate streaks
     current_streak, longest_streak = calculate_streak(user_id, db)
@@ -262,22 +267,17 @@ async def get_dashboard_stats(
         )
     ).count()
 
-    # Count total cards
-    total_cards = db.query(Flashcard).filter(
-        and_(
-            Flashcard.user_id == user_id,
-            Flashcard.status == "active",
-            Flashcard.deleted_at.is_(None)
-        )
-    ).count()
-
-    # Count mastered cards (interval > 30 days)
-    total_cards_mastered = db.query(CardStats).filter(
-        and_(
-            CardStats.user_id == user_id,
-            CardStats.current_interval_days > 30
-        )
-    ).count()
+    # Mastery totals come from the denormalized row (kept current by the
+    # review path and reconciled by the stats rollup job)
+    mastery_breakdown = MasteryBreakdown(
+        new=user_stats.cards_new or 0,
+        learning=user_stats.cards_learning or 0,
+        young=user_stats.cards_young or 0,
+        mature=user_stats.cards_mature or 0,
+        mastered=user_stats.cards_mastered or 0,
+    )
+    total_cards = sum(mastery_breakdown.model_dump().values())
+    total_cards_mastered = mastery_breakdown.mastered
 
     # Get this week's stats
     week_ago = today - timedelta(days=7)
@@ -307,6 +307,9 @@ async def get_dashboard_stats(
         total_cards=total_cards,
         total_cards_mastered=total_cards_mastered,
         total_study_time_minutes=user_stats.total_study_minutes,
+        mastery_breakdown=mastery_breakdown,
+        average_accuracy=user_stats.average_accuracy,
+        average_daily_cards=user_stats.average_daily_cards,
         cards_studied_this_week=cards_studied_this_week,
         study_time_this_week=study_time_this_week,
         heatmap_data=heatmap_data,
@@ -426,6 +429,22 @@ async def get_daily_progress(
     )
 
 
+@router.get("/analytics", response_model=ReviewAnalytics)
+async def get_analytics(
+    weeks: int = Query(12, ge=1, le=104, description="Weeks in the rating distribution"),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Get retention and rating analytics over the user's full review log.
+
+    Includes true retention per interval bucket, weekly rating distribution,
+    lapse rate and time-per-card percentiles. Results are cached until the
+    user submits a new review.
+    """
+    return get_review_analytics(db, uuid.UUID(user_id), weeks=weeks)
+
+
 @router.get("/deck/{deck_name}/metrics", response_model=DeckMetrics)
 async def get_deck_metrics(
     deck_name: str,
@@ -492,6 +511,7 @@ async def get_deck_metrics(
     total_reviews = 0
     total_study_time = 0
     last_studied = None
+    earliest_last_review = None
     cards_with_ratings = 0
 
     card_ids = []
@@ -514,6 +534,8 @@ async def get_deck_metrics(
                     reviewed_date = card_stat.last_reviewed_at.date()
                     if last_studied is None or reviewed_date > last_studied:
                         last_studied = reviewed_date
+                    if earliest_last_review is None or card_stat.last_reviewed_at < earliest_last_review:
+                        earliest_last_review = card_stat.last_reviewed_at
         else:
             new_count += 1
 
@@ -522,12 +544,20 @@ async def get_deck_metrics(
         # Get the most recent review for each card
         from sqlalchemy import distinct
 
+        # No card's latest review is older than the oldest last_reviewed_at,
+        # so bound reviewed_at to let Postgres skip older partitions
+        review_filters = [
+            CardReview.card_id.in_(card_ids),
+            CardReview.user_id == user_id
+        ]
+        if earliest_last_review is not None:
+            review_filters.append(CardReview.reviewed_at >= earliest_last_review - timedelta(days=1))
+
         latest_reviews_subquery = db.query(
             CardReview.card_id,
             func.max(CardReview.reviewed_at).label('max_reviewed_at')
         ).filter(
-            CardReview.card_id.in_(card_ids),
-            CardReview.user_id == user_id
+            *review_filters
         ).group_by(CardReview.card_id).subquery()
 
         latest_reviews = db.query(CardReview).join(
@@ -536,6 +566,8 @@ async def get_deck_metrics(
                 CardReview.card_id == latest_reviews_subquery.c.card_id,
                 CardReview.reviewed_at == latest_reviews_subquery.c.max_reviewed_at
             )
+        ).filter(
+            *review_filters
         ).all()
 
         for review in latest_reviews:
@@ -549,7 +581,8 @@ async def get_deck_metrics(
                 again_count += 1
 
     # Calculate failed reviews this month
-    month_ago = date.today() - timedelta(days=30)
+    # (a timestamp bound lets Postgres prune card_reviews partitions at plan time)
+    month_ago = datetime.now(timezone.utc) - timedelta(days=30)
     failed_reviews_this_month = db.query(CardReview).filter(
         CardReview.card_id.in_(card_ids) if card_ids else False,
         CardReview.user_id == user_id,
@@ -4,7 +4,7 @@ Study routes - Spaced repetition study mode and review tracking.
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, cast, Date
 from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime, date, timedelta
@@ -18,9 +18,17 @@ from app.models.card_review import CardReview
 from app.models.study_session import StudySession
 from app.models.user_stats import UserStats
 from app.services.fsrs import fsrs
+from app.services.stats_rollup import apply_mastery_delta
 
 router = APIRouter()
 
+# Longest date range accepted by /pomodoro/history per bucket size
+POMODORO_HISTORY_MAX_DAYS = {
+    "day": 366,
+    "week": 3 * 366,
+    "month": 10 * 366,
+}
+
 
 # ============ Schemas ============
 
@@ -282,6 +290,7 @@ async def submit_review(
     # Store previous values for the review record
     prev_interval = stats.current_interval_days
     prev_ease = stats.ease_factor
+    prev_mastery = stats.mastery_level or "new"
 
     # Calculate next review using FSRS
     new_ease, new_interval, new_due = fsrs.calculate_next_review(
@@ -385,11 +394,8 @@ async def submit_review(
                 user_stats.current_streak = 1
             user_stats.last_study_date = today
 
-        # Update mastery counts
-        if stats.mastery_level == "mastered" and prev_interval < 30:
-            user_stats.cards_mastered += 1
-            if stats.mastery_level != "new":
-                user_stats.cards_new = max(0, user_stats.cards_new - 1)
+        # Move the card between mastery buckets (the rollup job reconciles drift)
+        apply_mastery_delta(user_stats, prev_mastery, stats.mastery_level)
 
     db.commit()
 
@@ -489,7 +495,7 @@ async def end_study_session(
 # ============ Pomodoro Schemas ============
 
 class PomodoroStats(BaseModel):
-    """Pomodoro statistics for a day."""
+    """Pomodoro statistics for a day (or the week/month starting on `date`)."""
     pomodoro_sessions: int
     total_focus_minutes: int
     date: str
@@ -689,12 +695,17 @@ async def update_pomodoro_settings(
 async def get_pomodoro_history(
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
+    bucket: str = Query("day", regex="^(day|week|month)$", description="Aggregate per day, week or month"),
     user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
     Get Pomodoro history for a date range.
 
+    With bucket=week or bucket=month, sessions are summed per ISO week
+    (starting Monday) or calendar month in the database; `date` is then the
+    first day of the bucket. The range is capped per bucket size.
+
     Requires authentication.
     """
     user_uuid = uuid.UUID(user_id)
@@ -708,19 +719,41 @@ async def get_pomodoro_history(
             detail="Invalid date format. Use YYYY-MM-DD"
         )
 
-    sessions = db.query(StudySession).filter(
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date"
+        )
+
+    max_days = POMODORO_HISTORY_MAX_DAYS[bucket]
+    if (end - start).days + 1 > max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range too large for bucket={bucket} (max {max_days} days)"
+        )
+
+    if bucket == "day":
+        bucket_date = StudySession.date
+    else:
+        bucket_date = cast(func.date_trunc(bucket, StudySession.date), Date)
+
+    rows = db.query(
+        bucket_date.label("bucket_date"),
+        func.coalesce(func.sum(StudySession.pomodoro_sessions), 0).label("pomodoro_sessions"),
+        func.coalesce(func.sum(StudySession.time_spent_minutes), 0).label("total_focus_minutes"),
+    ).filter(
         StudySession.user_id == user_uuid,
         StudySession.date >= start,
         StudySession.date <= end
-    ).order_by(StudySession.date.desc()).all()
+    ).group_by(bucket_date).order_by(bucket_date.desc()).all()
 
     return [
         PomodoroStats(
-            pomodoro_sessions=session.pomodoro_sessions,
-            total_focus_minutes=session.time_spent_minutes,
-            date=session.date.isoformat()
+            pomodoro_sessions=row.pomodoro_sessions,
+            total_focus_minutes=row.total_focus_minutes,
+            date=row.bucket_date.isoformat()
         )
-        for session in sessions
+        for row in rows
     ]
 
 
@@ -73,6 +73,9 @@ class FlashcardGenerateRequest(BaseModel):
     material_id: uuid.UUID
     card_count: int = Field(default=20, ge=1, le=100)
     difficulty: Optional[int] = Field(None, ge=1, le=5)
+    page_start: Optional[int] = Field(None, ge=1)  # PDF materials only, 1-based
+    page_end: Optional[int] = Field(None, ge=1)  # Inclusive
+    force_refresh: bool = False  # Call the model even if this generation is cached
 
 
 class FlashcardGenerateResponse(BaseModel):
@@ -83,6 +86,23 @@ class FlashcardGenerateResponse(BaseModel):
     status: str = "success"  # "success", "partial", "failed"
 
 
+class GenerationJobResponse(BaseModel):
+    """Response schema for a background generation job."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    material_id: uuid.UUID
+    status: str  # queued, running, completed, failed, cancelled
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    cards_created: int
+    error_message: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
 class FlashcardConfirmRequest(BaseModel):
     """Request schema for confirming draft flashcards."""
     flashcard_ids: List[uuid.UUID]
@@ -4,7 +4,7 @@ Material schemas - Request and response models for study materials.
 
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 import uuid
 
 
@@ -40,16 +40,89 @@ class MaterialResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
     flashcard_count: int = 0  # Number of flashcards generated from this material
+    page_count: Optional[int] = None  # PDF pages (None for pasted text)
+
+
+class MaterialSummaryResponse(BaseModel):
+    """Response schema for a material in list views (no extracted text)."""
+    id: uuid.UUID
+    user_id: uuid.UUID
+    filename: str
+    word_count: Optional[int]
+    subject_category: Optional[str]
+    tags: List[str]
+    status: str
+    processed_at: Optional[datetime]
+    error_message: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    flashcard_count: int = 0
+    page_count: Optional[int] = None
+    excerpt: Optional[str] = None  # First characters of the text, if requested
+
+
+class MaterialStatusResponse(BaseModel):
+    """Response schema for material processing status (polled after upload)."""
+    id: uuid.UUID
+    status: str  # pending, processing, completed, failed
+    stage: str  # queued, extracting, analyzing, saving, completed, failed
+    progress: float  # 0.0 - 1.0
+    word_count: Optional[int]
+    error_message: Optional[str]
+    processed_at: Optional[datetime]
+
+
+class MaterialPage(BaseModel):
+    """Text of one PDF page."""
+    page_number: int  # 1-based
+    text: str
+
+
+class MaterialPagesResponse(BaseModel):
+    """Response schema for a page range of a material."""
+    material_id: uuid.UUID
+    page_count: int
+    pages: List[MaterialPage]
 
 
 class MaterialListResponse(BaseModel):
     """Response schema for list of materials."""
-    materials: List[MaterialResponse]
+    materials: List[MaterialSummaryResponse]
     total: int
     page: int
     page_size: int
 
 
+class MaterialFlashcardStats(BaseModel):
+    """Review stats of a card (defaults for cards never reviewed)."""
+    mastery_level: str = "new"
+    total_reviews: int = 0
+    due_date: Optional[date] = None
+
+
+class MaterialFlashcard(BaseModel):
+    """A flashcard of a material with its review stats."""
+    id: uuid.UUID
+    question: str
+    answer: str
+    explanation: Optional[str]
+    difficulty: Optional[int]
+    tags: List[str]
+    status: str
+    material_id: Optional[uuid.UUID]
+    created_at: Optional[datetime]
+    stats: MaterialFlashcardStats
+
+
+class MaterialFlashcardsResponse(BaseModel):
+    """Response schema for one page of a material's flashcards."""
+    material_id: uuid.UUID
+    material_name: str
+    flashcards: List[MaterialFlashcard]
+    total: int  # Active flashcards in the material
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; None on the last page
+
+
 class MaterialExtractRequest(BaseModel):
     """Request schema for extracting text from PDF or pasting text."""
     text: Optional[str] = None  # For pasted text
@@ -0,0 +1,24 @@
+"""
+Search schemas - Response models for full-text search.
+"""
+
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+import uuid
+
+
+class SearchResult(BaseModel):
+    """A flashcard or material matching the search."""
+    kind: Literal["flashcard", "material"]
+    id: uuid.UUID
+    title: str  # Question of a flashcard, filename of a material
+    snippet: str  # Matching fragments with terms wrapped in <mark></mark>
+    rank: float
+    material_id: Optional[uuid.UUID]
+
+
+class SearchResponse(BaseModel):
+    """Response schema for one page of search results (best match first)."""
+    query: str
+    results: List[SearchResult]
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; None on the last page
@@ -27,6 +27,15 @@ class SubjectProgress(BaseModel):
     last_studied: Optional[date] = None
 
 
+class MasteryBreakdown(BaseModel):
+    """Active cards per mastery level."""
+    new: int = 0
+    learning: int = 0
+    young: int = 0
+    mature: int = 0
+    mastered: int = 0
+
+
 class DashboardStats(BaseModel):
     """Complete dashboard statistics."""
     model_config = ConfigDict(from_attributes=True)
@@ -41,8 +50,11 @@ class DashboardStats(BaseModel):
 
     # Overall stats
     total_cards: int = Field(0, description="Total flashcards created")
-    total_cards_mastered: int = Field(0, description="Cards with interval > 30 days")
+    total_cards_mastered: int = Field(0, description="Cards with interval >= 30 days")
     total_study_time_minutes: int = Field(0, description="Total study time in minutes")
+    mastery_breakdown: MasteryBreakdown = Field(default_factory=MasteryBreakdown)
+    average_accuracy: Optional[float] = Field(None, description="% of reviews rated Good or Easy")
+    average_daily_cards: Optional[int] = Field(None, description="Average cards per study day")
 
     # Recent activity
     cards_studied_this_week: int = Field(0, description="Cards studied in last 7 days")
@@ -102,3 +114,42 @@ class DeckMetrics(BaseModel):
 
     # Problematic cards (top 5)
     problematic_cards: List[ProblematicCard] = Field(default_factory=list)
+
+
+class RetentionBucket(BaseModel):
+    """Retention for reviews whose previous interval falls in a bucket."""
+    label: str
+    min_interval_days: int
+    max_interval_days: Optional[int] = None
+    reviews: int
+    recalled: int
+    retention: Optional[float] = Field(None, description="Share of reviews not rated Again")
+
+
+class RatingWeek(BaseModel):
+    """Rating counts for one week."""
+    week_start: date
+    again: int = 0
+    hard: int = 0
+    good: int = 0
+    easy: int = 0
+
+
+class TimePerCard(BaseModel):
+    """Percentiles of time spent per review, in seconds."""
+    p50: float
+    p75: float
+    p90: float
+    p95: float
+    mean: float
+
+
+class ReviewAnalytics(BaseModel):
+    """Analytics computed over a user's full review log."""
+    total_reviews: int = 0
+    true_retention: Optional[float] = Field(None, description="Share of review-phase reviews not rated Again")
+    lapse_rate: Optional[float] = Field(None, description="Share of review-phase reviews rated Again")
+    retention_by_interval: List[RetentionBucket] = Field(default_factory=list)
+    rating_distribution: List[RatingWeek] = Field(default_factory=list)
+    time_per_card_seconds: Optional[TimePerCard] = None
+    generated_at: datetime
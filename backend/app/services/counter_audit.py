@@ -0,0 +1,299 @@
+"""
+Denormalized counter consistency checker and repair job.
+
+Compares the incrementally maintained counters against their ground truth:
+- user_stats.total_cards_studied      <- card_reviews (hot partitions + archives)
+- user_stats.total_flashcards_created <- flashcards (including soft-deleted)
+- user_stats.total_materials_uploaded <- study_materials (including soft-deleted)
+- user_stats.cards_<level>            <- card_stats of active cards
+- study_sessions.cards_studied/_again/_hard/_good/_easy <- card_reviews by session
+
+Users are processed in id-ordered chunks, each answered by grouped queries.
+Drift is reported per counter and, unless running as a dry run, repaired
+with bulk UPDATEs.
+
+Run periodically (e.g. nightly from cron):
+    python -m app.services.counter_audit check
+    python -m app.services.counter_audit repair
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+import logging
+import uuid
+
+import numpy as np
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.card_review import CardReview
+from app.models.flashcard import Flashcard
+from app.models.study_material import StudyMaterial
+from app.models.study_session import StudySession
+from app.models.user_stats import UserStats
+from app.services.review_partitions import (
+    iter_archived_reviews,
+    list_partitions,
+    parse_partition_month,
+    uuid_from_bytes,
+)
+from app.services.stats_rollup import MASTERY_COLUMNS, compute_stats_rollup, iter_user_id_batches
+
+logger = logging.getLogger(__name__)
+
+USER_COUNTERS = (
+    "total_cards_studied",
+    "total_flashcards_created",
+    "total_materials_uploaded",
+    *MASTERY_COLUMNS.values(),
+)
+
+# StudySession column -> rating it counts (None = every review)
+SESSION_COUNTERS = {
+    "cards_studied": None,
+    "cards_again": 1,
+    "cards_hard": 2,
+    "cards_good": 3,
+    "cards_easy": 4,
+}
+
+
+@dataclass
+class CounterDrift:
+    """Drift statistics for one counter."""
+    checked: int = 0
+    drifted: int = 0
+    total_abs_drift: int = 0
+    max_abs_drift: int = 0
+
+    def record(self, stored: Optional[int], actual: int) -> bool:
+        """Record one comparison; returns True if the stored value is wrong."""
+        self.checked += 1
+        delta = abs((stored or 0) - actual)
+        if stored is None or delta:
+            self.drifted += 1
+            self.total_abs_drift += delta
+            self.max_abs_drift = max(self.max_abs_drift, delta)
+            return True
+        return False
+
+
+@dataclass
+class DriftReport:
+    """Result of an audit run."""
+    dry_run: bool = True
+    counters: Dict[str, CounterDrift] = field(default_factory=dict)
+    users_checked: int = 0
+    sessions_checked: int = 0
+    rows_repaired: int = 0
+
+    def counter(self, name: str) -> CounterDrift:
+        return self.counters.setdefault(name, CounterDrift())
+
+    def to_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "users_checked": self.users_checked,
+            "sessions_checked": self.sessions_checked,
+            "rows_repaired": self.rows_repaired,
+            "counters": {name: vars(drift) for name, drift in sorted(self.counters.items())},
+        }
+
+
+def archived_review_counts(archive_dir: Optional[str] = None) -> Counter:
+    """
+    Count archived reviews per user.
+
+    Archived months are no longer in Postgres but still count towards
+    total_cards_studied. Only the user_id column of each archive is read.
+    """
+    counts = Counter()
+    for chunk in iter_archived_reviews(columns=["user_id"], archive_dir=archive_dir):
+        users, per_user = np.unique(chunk["user_id"], return_counts=True)
+        for user_bytes, count in zip(users, per_user):
+            counts[uuid_from_bytes(user_bytes)] += int(count)
+    return counts
+
+
+def hot_reviews_since(db: Session) -> Optional[date]:
+    """
+    First month still held in Postgres, or None if nothing was archived.
+
+    Sessions before this date lost their reviews to the archive, so their
+    counters can no longer be checked.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+    months = [m for m in (parse_partition_month(name) for name in list_partitions(db)) if m]
+    return min(months) if months else None
+
+
+def _grouped_counts(db: Session, column, user_ids: Sequence[uuid.UUID], *filters) -> Dict[uuid.UUID, int]:
+    rows = db.execute(
+        select(column, func.count()).where(column.in_(user_ids), *filters).group_by(column)
+    ).all()
+    return {user_id: count for user_id, count in rows}
+
+
+def audit_user_counters(
+    db: Session,
+    user_ids: Sequence[uuid.UUID],
+    report: DriftReport,
+    archived_counts: Optional[Counter] = None
+) -> List[dict]:
+    """
+    Check user_stats counters for a chunk of users.
+
+    Returns:
+        Bulk UPDATE parameter rows for users with drift
+    """
+    archived_counts = archived_counts or Counter()
+    reviews = _grouped_counts(db, CardReview.user_id, user_ids)
+    flashcards = _grouped_counts(db, Flashcard.user_id, user_ids)
+    materials = _grouped_counts(db, StudyMaterial.user_id, user_ids)
+    mastery = compute_stats_rollup(db, user_ids)
+
+    stored_rows = db.execute(
+        select(UserStats.user_id, *[getattr(UserStats, name) for name in USER_COUNTERS]).where(
+            UserStats.user_id.in_(user_ids)
+        )
+    ).mappings().all()
+
+    repairs = []
+    for stored in stored_rows:
+        user_id = stored["user_id"]
+        actual = {
+            "total_cards_studied": reviews.get(user_id, 0) + archived_counts.get(user_id, 0),
+            "total_flashcards_created": flashcards.get(user_id, 0),
+            "total_materials_uploaded": materials.get(user_id, 0),
+            **{column: mastery[user_id][column] for column in MASTERY_COLUMNS.values()},
+        }
+
+        drifted = {
+            name: value for name, value in actual.items()
+            if report.counter(f"user_stats.{name}").record(stored[name], value)
+        }
+        if drifted:
+            repairs.append({"user_id": user_id, **drifted})
+
+    report.users_checked += len(stored_rows)
+    return repairs
+
+
+def audit_session_counters(
+    db: Session,
+    user_ids: Sequence[uuid.UUID],
+    report: DriftReport,
+    since: Optional[date] = None
+) -> List[dict]:
+    """
+    Check study_sessions review counters for a chunk of users.
+
+    Returns:
+        Bulk UPDATE parameter rows for sessions with drift
+    """
+    review_filters = [CardReview.user_id.in_(user_ids), CardReview.session_id.isnot(None)]
+    session_filters = [StudySession.user_id.in_(user_ids)]
+    if since:
+        review_filters.append(CardReview.reviewed_at >= since)
+        session_filters.append(StudySession.date >= since)
+
+    per_session = select(
+        CardReview.session_id,
+        *[
+            (func.count() if rating is None else func.sum(case((CardReview.rating == rating, 1), else_=0))).label(name)
+            for name, rating in SESSION_COUNTERS.items()
+        ]
+    ).where(*review_filters).group_by(CardReview.session_id).subquery()
+
+    rows = db.execute(
+        select(
+            StudySession.id,
+            *[getattr(StudySession, name) for name in SESSION_COUNTERS],
+            *[func.coalesce(per_session.c[name], 0).label(f"actual_{name}") for name in SESSION_COUNTERS],
+        ).outerjoin(
+            per_session, per_session.c.session_id == StudySession.id
+        ).where(*session_filters)
+    ).mappings().all()
+
+    repairs = []
+    for row in rows:
+        drifted = {
+            name: int(row[f"actual_{name}"]) for name in SESSION_COUNTERS
+            if report.counter(f"study_sessions.{name}").record(row[name], int(row[f"actual_{name}"]))
+        }
+        if drifted:
+            repairs.append({"id": row["id"], **drifted})
+
+    report.sessions_checked += len(rows)
+    return repairs
+
+
+def run_counter_audit(
+    db: Session,
+    repair: bool = False,
+    batch_size: Optional[int] = None,
+    archive_dir: Optional[str] = None
+) -> DriftReport:
+    """
+    Audit (and optionally repair) every denormalized counter.
+
+    Args:
+        db: Database session
+        repair: Write corrected values back (default: report only)
+        batch_size: Users per chunk (default: STATS_ROLLUP_BATCH_SIZE)
+        archive_dir: Review archive directory (default: REVIEW_ARCHIVE_DIR)
+
+    Returns:
+        DriftReport with per-counter drift statistics
+    """
+    batch_size = batch_size or settings.STATS_ROLLUP_BATCH_SIZE
+    report = DriftReport(dry_run=not repair)
+    archived_counts = archived_review_counts(archive_dir)
+    since = hot_reviews_since(db)
+
+    for user_ids in iter_user_id_batches(db, batch_size):
+        user_repairs = audit_user_counters(db, user_ids, report, archived_counts)
+        session_repairs = audit_session_counters(db, user_ids, report, since)
+
+        if repair:
+            # Bulk UPDATE by primary key; rows are grouped by their set of keys
+            if user_repairs:
+                db.execute(update(UserStats), user_repairs)
+            if session_repairs:
+                db.execute(update(StudySession), session_repairs)
+            db.commit()
+            report.rows_repaired += len(user_repairs) + len(session_repairs)
+        else:
+            db.rollback()
+
+    for name, drift in sorted(report.counters.items()):
+        if drift.drifted:
+            logger.warning(
+                f"Counter drift in {name}: {drift.drifted}/{drift.checked} rows, "
+                f"total |drift| {drift.total_abs_drift}, max {drift.max_abs_drift}"
+            )
+    logger.info(
+        f"Counter audit {'(dry run) ' if report.dry_run else ''}checked {report.users_checked} users, "
+        f"{report.sessions_checked} sessions; repaired {report.rows_repaired} rows"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    from app.utils.database import get_db_context
+
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command not in ("check", "repair"):
+        raise SystemExit(f"Unknown command: {command} (expected 'check' or 'repair')")
+
+    with get_db_context() as db:
+        result = run_counter_audit(db, repair=command == "repair")
+
+    print(json.dumps(result.to_dict(), indent=2))
@@ -0,0 +1,316 @@
+"""
+Chunked fan-out flashcard generation.
+
+Instead of one request with the whole material, the text is split into
+token-bounded chunks (see text_chunker) and the requested number of cards
+is allocated across them in proportion to their length. Chunk requests run
+concurrently, at most GENERATION_CONCURRENCY at a time, so a long material
+costs roughly the time of its slowest chunk rather than of the whole text.
+Results are merged in document order and near-duplicate questions (facts
+repeated in the overlap between chunks, or across sections) are dropped.
+
+Each chunk's cards are cached (see generation_cache), so repeating a
+generation with the same options does not call the model again unless
+use_cache is False.
+"""
+
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import logging
+import re
+import time
+import unicodedata
+
+from app.config import settings
+from app.services.generation_cache import generation_cache, generation_cache_key
+from app.services.openai_service import PROMPT_VERSION, openai_service
+from app.services.text_chunker import TextChunk, iter_chunks
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CHUNK_REQUESTS = metrics.counter("generation_chunk_requests_total", "Per-chunk generation requests by outcome")
+GENERATION_SECONDS = metrics.histogram("generation_seconds", "Wall-clock time of chunked flashcard generation")
+
+MIN_CHUNK_CHARS = 50  # Shorter chunks (e.g. a trailing line) are not worth a request
+DUPLICATE_SIMILARITY = 0.85  # Jaccard similarity of question words above which cards are duplicates
+
+_WORD = re.compile(r"\w+")
+
+_CHUNK_DONE = object()  # Queue marker: a chunk finished streaming
+
+# Chunk streams left to finish (and be cached) after their stream() returned
+_finishing_chunks: Set[asyncio.Task] = set()
+
+
+def allocate_card_counts(weights: Sequence[int], total: int) -> List[int]:
+    """
+    Split total cards across chunks in proportion to their weights.
+
+    Largest remainder method: every chunk gets the floor of its share, and
+    the cards left over go to the chunks with the largest fractional parts
+    (earlier chunks first on ties). Sums exactly to total; chunks may get 0.
+    """
+    weight_sum = sum(weights)
+    if not weights or total <= 0 or weight_sum <= 0:
+        return [0] * len(weights)
+
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(weights)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def _question_words(question: str) -> frozenset:
+    """Lowercased words of a question with accents removed."""
+    folded = unicodedata.normalize("NFKD", question.casefold())
+    return frozenset(_WORD.findall("".join(c for c in folded if not unicodedata.combining(c))))
+
+
+class DuplicateFilter:
+    """
+    Recognizes cards whose question repeats an earlier one.
+
+    Questions are compared as sets of words (case, accents and punctuation
+    ignored); a Jaccard similarity of DUPLICATE_SIMILARITY or more counts
+    as a repeat.
+    """
+
+    def __init__(self):
+        self._seen: List[frozenset] = []
+
+    def is_new(self, card: Dict) -> bool:
+        """True (and remembered) if the card does not repeat an earlier one."""
+        words = _question_words(card["question"])
+        if any(
+            words == other or len(words & other) >= DUPLICATE_SIMILARITY * len(words | other)
+            for other in self._seen
+        ):
+            return False
+        self._seen.append(words)
+        return True
+
+
+def dedupe_cards(cards: List[Dict]) -> List[Dict]:
+    """Drop repeated cards (see DuplicateFilter), keeping the first occurrence."""
+    duplicates = DuplicateFilter()
+    return [card for card in cards if duplicates.is_new(card)]
+
+
+class FlashcardGenerator:
+    """Generates flashcards for texts of any length."""
+
+    def __init__(self):
+        self.concurrency = settings.GENERATION_CONCURRENCY
+
+    def plan(self, text: str, count: int) -> List[Tuple[TextChunk, int]]:
+        """
+        Chunks of text with the number of cards to request from each.
+
+        Returns:
+            (TextChunk, card count) pairs in document order, without chunks
+            that get no cards
+        """
+        chunks = [chunk for chunk in iter_chunks(text) if len(chunk.text) >= MIN_CHUNK_CHARS]
+        counts = allocate_card_counts([len(chunk.text) for chunk in chunks], count)
+        return [(chunk, chunk_count) for chunk, chunk_count in zip(chunks, counts) if chunk_count > 0]
+
+    def _cache_key(
+        self,
+        chunk: TextChunk,
+        chunk_count: int,
+        difficulty: Optional[str],
+        subject: Optional[str],
+        ai_confidence: Optional[float]
+    ) -> str:
+        return generation_cache_key(
+            PROMPT_VERSION, chunk.text, chunk_count, difficulty, subject,
+            openai_service.route(chunk.text, chunk_count).model, ai_confidence
+        )
+
+    async def generate(
+        self,
+        text: str,
+        count: int = 20,
+        difficulty: Optional[str] = None,
+        subject: Optional[str] = None,
+        ai_confidence: Optional[float] = None,
+        use_cache: bool = True
+    ) -> List[Dict]:
+        """
+        Generate up to count flashcards from text of any length.
+
+        Args:
+            text: Source text
+            count: Total number of flashcards to generate
+            difficulty: Optional difficulty level (easy, medium, hard)
+            subject: Optional subject category
+            ai_confidence: Optional confidence score to assign (0.0-1.0)
+            use_cache: Reuse cached chunk results (fresh results are cached either way)
+
+        Returns:
+            Card dictionaries (same shape as OpenAIService.generate_flashcards)
+            in document order
+
+        Raises:
+            ValueError: For invalid input or when the API key is missing
+            Exception: If every chunk request fails
+        """
+        plan = self.plan(text, count)
+        if not plan:
+            raise ValueError("Text must be at least 50 characters long")
+
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        started = time.monotonic()
+
+        async def generate_chunk(chunk: TextChunk, chunk_count: int) -> List[Dict]:
+            key = self._cache_key(chunk, chunk_count, difficulty, subject, ai_confidence)
+            cached = await asyncio.to_thread(generation_cache.get, key) if use_cache else None
+            if cached is not None:
+                CHUNK_REQUESTS.inc(outcome="cached")
+                return cached
+
+            async with semaphore:
+                try:
+                    cards = await openai_service.generate_flashcards(
+                        text=chunk.text,
+                        count=chunk_count,
+                        difficulty=difficulty,
+                        subject=subject,
+                        ai_confidence=ai_confidence
+                    )
+                except Exception:
+                    CHUNK_REQUESTS.inc(outcome="failed")
+                    raise
+                CHUNK_REQUESTS.inc(outcome="completed")
+                await asyncio.to_thread(generation_cache.put, key, cards)
+                return cards
+
+        logger.info(f"Generating {count} flashcards from {len(plan)} chunks (concurrency {self.concurrency})")
+        results = await asyncio.gather(
+            *(generate_chunk(chunk, chunk_count) for chunk, chunk_count in plan),
+            return_exceptions=True
+        )
+        GENERATION_SECONDS.observe(time.monotonic() - started)
+
+        cards: List[Dict] = []
+        errors: List[BaseException] = []
+        for (chunk, _), result in zip(plan, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Chunk {chunk.index} failed: {result}")
+                errors.append(result)
+            else:
+                cards.extend(result)
+
+        if not cards:
+            # Nothing to return: surface the first error (e.g. missing API key)
+            raise errors[0] if errors else Exception("No flashcards generated")
+
+        if errors:
+            logger.warning(f"{len(errors)} of {len(plan)} chunks failed; returning partial results")
+
+        return dedupe_cards(cards)[:count]
+
+    async def stream(
+        self,
+        text: str,
+        count: int = 20,
+        difficulty: Optional[str] = None,
+        subject: Optional[str] = None,
+        ai_confidence: Optional[float] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Dict]:
+        """
+        Like generate(), but yield each card as soon as any chunk produces it.
+
+        Chunks stream concurrently (see OpenAIService.stream_flashcards), so
+        cards arrive interleaved rather than in document order. Duplicates
+        are dropped as they arrive and the stream stops after count cards;
+        cached chunks are replayed at once. Chunks still reading the end of
+        their response then finish in the background, so they are cached;
+        closing the iterator before count cards cancels them instead.
+
+        Raises:
+            ValueError: For invalid input or when the API key is missing
+            Exception: If every chunk fails before producing a card
+        """
+        plan = self.plan(text, count)
+        if not plan:
+            raise ValueError("Text must be at least 50 characters long")
+
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def stream_chunk(chunk: TextChunk, chunk_count: int) -> None:
+            # Every exit queues _CHUNK_DONE or the error; the consumer waits for one
+            try:
+                key = self._cache_key(chunk, chunk_count, difficulty, subject, ai_confidence)
+                cached = await asyncio.to_thread(generation_cache.get, key) if use_cache else None
+                if cached is not None:
+                    CHUNK_REQUESTS.inc(outcome="cached")
+                    for card in cached:
+                        queue.put_nowait(card)
+                    queue.put_nowait(_CHUNK_DONE)
+                    return
+
+                cards = []
+                async with semaphore:
+                    async for card in openai_service.stream_flashcards(
+                        text=chunk.text,
+                        count=chunk_count,
+                        difficulty=difficulty,
+                        subject=subject,
+                        ai_confidence=ai_confidence
+                    ):
+                        cards.append(card)
+                        queue.put_nowait(card)
+
+                CHUNK_REQUESTS.inc(outcome="completed")
+                # Only complete chunks are cached (not cancelled or failed ones)
+                await asyncio.to_thread(generation_cache.put, key, cards)
+            except Exception as e:
+                CHUNK_REQUESTS.inc(outcome="failed")
+                logger.warning(f"Chunk {chunk.index} failed: {e}")
+                queue.put_nowait(e)
+            else:
+                queue.put_nowait(_CHUNK_DONE)
+
+        logger.info(f"Streaming {count} flashcards from {len(plan)} chunks (concurrency {self.concurrency})")
+        started = time.monotonic()
+        tasks = [asyncio.create_task(stream_chunk(chunk, chunk_count)) for chunk, chunk_count in plan]
+        duplicates = DuplicateFilter()
+        pending = len(tasks)
+        errors: List[Exception] = []
+        emitted = 0
+
+        try:
+            while pending and emitted < count:
+                item = await queue.get()
+                if item is _CHUNK_DONE:
+                    pending -= 1
+                elif isinstance(item, Exception):
+                    pending -= 1
+                    errors.append(item)
+                elif duplicates.is_new(item):
+                    emitted += 1
+                    yield item
+
+            if not emitted:
+                raise errors[0] if errors else Exception("No flashcards generated")
+        finally:
+            for task in tasks:
+                if task.done():
+                    continue
+                if emitted >= count:
+                    # All cards are out; let the chunk finish its response and be cached
+                    _finishing_chunks.add(task)
+                    task.add_done_callback(_finishing_chunks.discard)
+                else:
+                    task.cancel()
+            GENERATION_SECONDS.observe(time.monotonic() - started)
+
+
+# Singleton instance
+flashcard_generator = FlashcardGenerator()
@@ -0,0 +1,214 @@
+"""
+Persistent cache of generated flashcards.
+
+Generation is cached per chunk: the key is a SHA-256 of the prompt template
+version, the chunk text and every parameter that changes the request
+(card count, difficulty, subject, model, confidence). Regenerating the same
+material with the same options, or the same shared content uploaded by
+another user, is then served without calling the model.
+
+Entries live in a local SQLite file, so they survive restarts and are
+shared by the worker processes of one host. The file is bounded by
+GENERATION_CACHE_MAX_MB: least recently used entries are evicted first.
+The total size is kept in the file itself (maintained by triggers) and
+read in the same write transaction as the eviction, so the bound holds
+across processes.
+
+Calls do blocking file I/O: call them from async code in a thread.
+"""
+
+from typing import Dict, List, Optional
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOKUPS = metrics.counter("generation_cache_lookups_total", "Generation cache lookups by result")
+EVICTIONS = metrics.counter("generation_cache_evictions_total", "Generation cache entries evicted to stay under the size limit")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generation_cache (
+    key TEXT PRIMARY KEY,
+    cards TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_generation_cache_last_used_at ON generation_cache (last_used_at);
+
+CREATE TABLE IF NOT EXISTS generation_cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO generation_cache_size (id, bytes) SELECT 1, COALESCE(SUM(size), 0) FROM generation_cache;
+
+CREATE TRIGGER IF NOT EXISTS generation_cache_size_insert AFTER INSERT ON generation_cache BEGIN
+    UPDATE generation_cache_size SET bytes = bytes + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS generation_cache_size_update AFTER UPDATE OF size ON generation_cache BEGIN
+    UPDATE generation_cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS generation_cache_size_delete AFTER DELETE ON generation_cache BEGIN
+    UPDATE generation_cache_size SET bytes = bytes - OLD.size WHERE id = 1;
+END;
+"""
+
+
+def generation_cache_key(
+    prompt_version: int,
+    text: str,
+    count: int,
+    difficulty: Optional[str],
+    subject: Optional[str],
+    model: str,
+    ai_confidence: Optional[float] = None
+) -> str:
+    """Hex SHA-256 identifying one generation request."""
+    payload = json.dumps(
+        [prompt_version, model, count, difficulty, subject, ai_confidence, text],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Size-bounded LRU cache of card lists in SQLite."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None, enabled: Optional[bool] = None):
+        self.path = path or settings.GENERATION_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else settings.GENERATION_CACHE_MAX_MB * 1024 * 1024
+        self.enabled = settings.GENERATION_CACHE_ENABLED if enabled is None else enabled
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._size = 0  # Bytes of card JSON stored, as of this process's last write
+
+        metrics.gauge("generation_cache_bytes", "Bytes of cached flashcards", callback=lambda: self._size)
+        metrics.gauge(
+            "generation_cache_hit_ratio", "Share of generation cache lookups that were hits", callback=self.hit_ratio
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(f"BEGIN IMMEDIATE; {_SCHEMA} COMMIT;")
+            self._size = _stored_size(connection)
+            self._connection = connection
+        return self._connection
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """
+        Cached cards for a key, or None; a hit marks the entry recently used.
+
+        Errors reading the cache are logged and treated as misses.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute("SELECT cards FROM generation_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE generation_cache SET last_used_at = ? WHERE key = ?", (time.time(), key)
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Generation cache read failed: {e}")
+            return None
+
+        try:
+            cards = json.loads(row[0]) if row is not None else None
+        except ValueError as e:
+            logger.warning(f"Generation cache entry {key} is corrupt: {e}")
+            cards = None
+
+        LOOKUPS.inc(result="hit" if cards is not None else "miss")
+        return cards
+
+    def put(self, key: str, cards: List[Dict]) -> None:
+        """Store cards under a key, then evict LRU entries over the size limit."""
+        if not self.enabled or not cards:
+            return
+
+        value = json.dumps(cards, ensure_ascii=False)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                connection = self._connect()
+                # Write lock up front: the size read below is not changed by
+                # other processes before this transaction commits
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    connection.execute(
+                        "INSERT INTO generation_cache (key, cards, size, created_at, last_used_at) "
+                        "VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET "
+                        "cards = excluded.cards, size = excluded.size, last_used_at = excluded.last_used_at",
+                        (key, value, size, now, now)
+                    )
+                    self._evict(connection)
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            logger.warning(f"Generation cache write failed: {e}")
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """
+        Delete least recently used entries until the cache fits. Caller
+        holds the lock and a write transaction.
+        """
+        total = _stored_size(connection)
+        while total > self.max_bytes:
+            oldest = connection.execute(
+                "SELECT key, size FROM generation_cache ORDER BY last_used_at LIMIT 100"
+            ).fetchall()
+            if not oldest:
+                break
+
+            evicted = []
+            for key, size in oldest:
+                if total <= self.max_bytes:
+                    break
+                evicted.append(key)
+                total -= size
+
+            connection.executemany("DELETE FROM generation_cache WHERE key = ?", [(key,) for key in evicted])
+            EVICTIONS.inc(len(evicted))
+
+        self._size = _stored_size(connection)
+
+    def hit_ratio(self) -> float:
+        """Hits / lookups since the process started (0 before any lookup)."""
+        hits, misses = LOOKUPS.value(result="hit"), LOOKUPS.value(result="miss")
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _stored_size(connection: sqlite3.Connection) -> int:
+    """Bytes of card JSON in the file (all processes' entries)."""
+    return connection.execute("SELECT bytes FROM generation_cache_size WHERE id = 1").fetchone()[0]
+
+
+# Singleton instance
+generation_cache = GenerationCache()
@@ -0,0 +1,827 @@
+"""
+Background flashcard generation jobs.
+
+POST /flashcards/generate only records a job (generation_jobs) and returns;
+the model calls and card inserts happen here, so no HTTP request is held
+open for the length of a generation. Jobs move through
+
+    queued -> running -> completed | failed | cancelled
+
+Every API process runs GENERATION_WORKERS workers. A worker claims the
+oldest due job with SELECT ... FOR UPDATE SKIP LOCKED, so workers in any
+process never block on or double-run a job, and skips users that already
+have GENERATION_JOBS_PER_USER jobs running (re-checked under a per-user
+advisory lock before the claim commits).
+
+While a job runs its owner refreshes heartbeat_at; jobs whose heartbeat
+stops (the process died) are requeued by any process. Failed attempts are
+retried with exponential backoff up to max_attempts; invalid input fails
+the job at once. Cancellation is a flag on the row: the owning process
+notices it within one heartbeat (at once if it is the process that handled
+the cancel request) and stops the generation, and a job is only completed
+if it was not cancelled in the meantime.
+
+Status events are published to in-process subscribers (the SSE stream);
+subscribers fall back to the database, so any process can report on any job.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import Row, Select, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.models.card_stats import CardStats
+from app.models.flashcard import Flashcard
+from app.models.generation_job import GenerationJob
+from app.models.study_material import StudyMaterial
+from app.models.user_stats import UserStats
+from app.services.flashcard_generation import flashcard_generator
+from app.services.material_content import check_page_range, material_content_store
+from app.utils.database import get_db_context
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+PENDING_STATUSES = ("queued", "running")
+
+DIFFICULTY_NAMES = {1: "easy", 2: "easy", 3: "medium", 4: "hard", 5: "hard"}
+BASE_AI_CONFIDENCE = 0.85
+
+# Columns of FlashcardResponse, returned by the card INSERT
+FLASHCARD_COLUMNS = (
+    Flashcard.id,
+    Flashcard.user_id,
+    Flashcard.material_id,
+    Flashcard.question,
+    Flashcard.answer,
+    Flashcard.explanation,
+    Flashcard.tags,
+    Flashcard.difficulty,
+    Flashcard.ai_confidence,
+    Flashcard.is_edited,
+    Flashcard.status,
+    Flashcard.created_at,
+    Flashcard.updated_at,
+)
+
+JOBS = metrics.counter("generation_jobs_total", "Generation job attempts by outcome")
+JOB_SECONDS = metrics.histogram("generation_job_seconds", "Time from claim to completion of generation jobs")
+QUEUE_SECONDS = metrics.histogram("generation_job_queue_seconds", "Time generation jobs wait before their first attempt")
+
+
+class GenerationQueueFullError(Exception):
+    """Raised when a user already has too many queued or running jobs."""
+
+
+class GenerationSourceError(Exception):
+    """
+    The material cannot be generated from.
+
+    reason is not_found, not_ready (still processing or failed) or invalid
+    (bad page range, too little text).
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+@dataclass
+class ClaimedJob:
+    """The parts of a claimed job a worker needs (detached from the session)."""
+    id: uuid.UUID
+    user_id: uuid.UUID
+    material_id: uuid.UUID
+    params: dict
+    attempts: int
+    max_attempts: int
+    created_at: datetime
+
+
+def event_from_job(job: GenerationJob) -> dict:
+    """Build a status event from the persisted job state."""
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "attempts": job.attempts,
+        "cards_created": job.cards_created,
+        "error_message": job.error_message,
+    }
+
+
+def difficulty_name(difficulty: Optional[int]) -> Optional[str]:
+    """Map difficulty number to difficulty string for the generation prompt."""
+    return DIFFICULTY_NAMES.get(difficulty) if difficulty else None
+
+
+# ============ Source text and card persistence ============
+
+def load_generation_source(
+    db: Session,
+    user_id: uuid.UUID,
+    material_id: uuid.UUID,
+    page_start: Optional[int] = None,
+    page_end: Optional[int] = None
+) -> Tuple[StudyMaterial, str]:
+    """
+    Load the material to generate from and the text to use (whole text or
+    the requested page range).
+
+    Raises:
+        GenerationSourceError: If the material is missing, not processed,
+            or has no usable text in the range
+    """
+    material = db.query(StudyMaterial).filter(
+        StudyMaterial.id == material_id,
+        StudyMaterial.user_id == user_id,
+        StudyMaterial.deleted_at.is_(None)
+    ).first()
+
+    if not material:
+        raise GenerationSourceError("not_found", "Study material not found")
+
+    # Uploads are processed in the background; text is only there once completed
+    if material.status != "completed":
+        raise GenerationSourceError(
+            "not_ready",
+            material.error_message if material.status == "failed" and material.error_message
+            else f"Material is still being processed (status: {material.status})"
+        )
+
+    if page_start or page_end:
+        # Read only the requested pages instead of the whole document
+        page_offsets = (
+            material_content_store.get_page_offsets(db, material.content_hash) if material.content_hash else None
+        )
+        page_start = page_start or 1
+        page_end = page_end or (len(page_offsets) - 1 if page_offsets else page_start)
+        try:
+            check_page_range(page_offsets, page_start, page_end)
+        except ValueError as e:
+            raise GenerationSourceError("invalid", str(e))
+
+        source_text = "\n".join(
+            material_content_store.read_pages(db, material.content_hash, page_offsets, page_start, page_end)
+        )
+    else:
+        source_text = material.extracted_text
+
+    if not source_text or len(source_text.strip()) < 50:
+        raise GenerationSourceError("invalid", "Material does not contain sufficient text for generation")
+
+    return material, source_text
+
+
+def persist_generated_cards(
+    db: Session,
+    user_id: uuid.UUID,
+    material_id: uuid.UUID,
+    cards: List[dict]
+) -> List[Row]:
+    """
+    Insert generated cards, each with stats due today, with one multi-row
+    INSERT per table. IDs are generated here, so no flush is needed to
+    link the stats. Does not commit.
+
+    Returns:
+        The inserted cards (FLASHCARD_COLUMNS, from RETURNING) in order;
+        they are plain rows, so they stay usable after the commit
+    """
+    if not cards:
+        return []
+
+    card_rows = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "material_id": material_id,
+            "question": card_data['question'],
+            "answer": card_data['answer'],
+            "explanation": card_data.get('explanation'),
+            "tags": card_data.get('tags', []),
+            "difficulty": card_data.get('difficulty', 3),
+            "ai_confidence": card_data.get('ai_confidence', BASE_AI_CONFIDENCE),
+            "is_edited": False,
+            "status": "active",  # AI-generated cards are immediately active
+        }
+        for card_data in cards
+    ]
+    flashcards = db.execute(
+        insert(Flashcard).returning(*FLASHCARD_COLUMNS, sort_by_parameter_order=True),
+        card_rows
+    ).all()
+
+    # Available for study immediately; nothing is read back, so no RETURNING
+    # (executemany is still batched into multi-row INSERTs by the driver)
+    today = date.today()
+    db.execute(
+        insert(CardStats),
+        [{"card_id": row["id"], "user_id": user_id, "due_date": today} for row in card_rows]
+    )
+
+    return flashcards
+
+
+def count_created_cards(db: Session, user_id: uuid.UUID, count: int) -> None:
+    """Add newly created cards to the user's stats. Does not commit."""
+    user_stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+    if user_stats:
+        user_stats.total_flashcards_created += count
+        user_stats.cards_new += count
+
+
+# ============ Service ============
+
+class GenerationJobService:
+    """
+    Worker tasks running generation jobs from the database.
+
+    Start and stop from the application lifespan.
+    """
+
+    def __init__(self):
+        self.worker_count = settings.GENERATION_WORKERS
+        self.jobs_per_user = settings.GENERATION_JOBS_PER_USER
+        self.max_pending_per_user = settings.GENERATION_MAX_PENDING_PER_USER
+        self.poll_seconds = settings.GENERATION_JOB_POLL_SECONDS
+        self.heartbeat_seconds = settings.GENERATION_JOB_HEARTBEAT_SECONDS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._running: Dict[uuid.UUID, asyncio.Task] = {}  # Generation task of each job run here
+        self._subscribers: Dict[uuid.UUID, Set[asyncio.Queue]] = {}
+        self._latest: Dict[uuid.UUID, dict] = {}
+        metrics.gauge(
+            "generation_jobs_running", "Generation jobs running in this process",
+            callback=lambda: len(self._running)
+        )
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Start the workers and the heartbeat task."""
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"generation-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        self._workers.append(asyncio.create_task(self._monitor(), name="generation-monitor"))
+        logger.info(f"Generation jobs started with {self.worker_count} workers ({self.worker_id})")
+
+    async def stop(self) -> None:
+        """Cancel the workers and hand their jobs back to the queue."""
+        self._stopping = True
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        try:
+            await asyncio.to_thread(release_jobs, self.worker_id)
+        except Exception as e:
+            logger.warning(f"Could not release running generation jobs: {e}")
+
+    # ============ Requests ============
+
+    def enqueue(self, db: Session, user_id: uuid.UUID, material_id: uuid.UUID, params: dict) -> GenerationJob:
+        """
+        Record a queued job and wake an idle worker.
+
+        Raises:
+            GenerationQueueFullError: If the user already has
+                GENERATION_MAX_PENDING_PER_USER queued or running jobs
+        """
+        pending = db.scalar(
+            select(func.count()).select_from(GenerationJob).where(
+                GenerationJob.user_id == user_id,
+                GenerationJob.status.in_(PENDING_STATUSES)
+            )
+        )
+        if pending >= self.max_pending_per_user:
+            raise GenerationQueueFullError()
+
+        job = GenerationJob(
+            user_id=user_id,
+            material_id=material_id,
+            params=params,
+            status="queued",
+            attempts=0,
+            max_attempts=settings.GENERATION_JOB_MAX_ATTEMPTS,
+            cancel_requested=False,
+            cards_created=0,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self._wake()
+        self._publish(event_from_job(job))
+        return job
+
+    def cancel(self, db: Session, job: GenerationJob) -> GenerationJob:
+        """
+        Cancel a queued job at once, or ask the owner of a running job to
+        stop it. Finished jobs are returned unchanged.
+        """
+        db.execute(
+            update(GenerationJob).where(
+                GenerationJob.id == job.id, GenerationJob.status == "queued"
+            ).values(status="cancelled", finished_at=func.now())
+        )
+        db.execute(
+            update(GenerationJob).where(
+                GenerationJob.id == job.id, GenerationJob.status == "running"
+            ).values(cancel_requested=True)
+        )
+        db.commit()
+        db.refresh(job)
+
+        generation = self._running.get(job.id)
+        if job.status == "running" and generation is not None:
+            generation.cancel()
+        elif job.status == "cancelled":
+            self._publish(event_from_job(job))
+        return job
+
+    def retry(self, db: Session, job: GenerationJob) -> GenerationJob:
+        """
+        Queue a failed or cancelled job again with a fresh set of attempts.
+
+        Raises:
+            ValueError: If the job is not failed or cancelled
+        """
+        retried = db.execute(
+            update(GenerationJob).where(
+                GenerationJob.id == job.id, GenerationJob.status.in_(("failed", "cancelled"))
+            ).values(
+                status="queued",
+                attempts=0,
+                cancel_requested=False,
+                error_message=None,
+                run_after=func.now(),
+                started_at=None,
+                finished_at=None,
+            )
+        ).rowcount
+        db.commit()
+        db.refresh(job)
+        if not retried:
+            raise ValueError(f"Only failed or cancelled jobs can be retried (status: {job.status})")
+
+        self._wake()
+        self._publish(event_from_job(job))
+        return job
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ============ Status events ============
+
+    def latest_event(self, job_id: uuid.UUID) -> Optional[dict]:
+        """Most recent event published by this process for a job."""
+        return self._latest.get(job_id)
+
+    async def subscribe(self, job_id: uuid.UUID, poll_seconds: float = 1.0) -> AsyncIterator[dict]:
+        """
+        Yield status events for a job until it completes, fails or is
+        cancelled.
+
+        Events come from this process's workers when available; otherwise
+        the job row is re-read every poll_seconds.
+        """
+        inbox: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(inbox)
+        last = None
+        try:
+            # Current state first, then changes
+            event = self.latest_event(job_id) or await asyncio.to_thread(_load_event, job_id)
+            while event is not None:
+                if event != last:
+                    last = event
+                    yield event
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+
+                try:
+                    event = await asyncio.wait_for(inbox.get(), timeout=poll_seconds)
+                except asyncio.TimeoutError:
+                    event = self.latest_event(job_id) or await asyncio.to_thread(_load_event, job_id)
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(inbox)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def _publish(self, event: dict) -> None:
+        job_id = uuid.UUID(event["job_id"])
+        if event["status"] in TERMINAL_STATUSES:
+            self._latest.pop(job_id, None)
+        else:
+            self._latest[job_id] = event
+        for inbox in self._subscribers.get(job_id, ()):
+            inbox.put_nowait(event)
+
+    # ============ Workers ============
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(claim_next_job, self.worker_id, self.jobs_per_user)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Generation worker {index} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                # Idle until a job is enqueued here or the next poll
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Generation worker {index} crashed on job {job.id}: {e}")
+
+    async def _process(self, job: ClaimedJob) -> None:
+        started = time.perf_counter()
+        if job.attempts == 1:
+            QUEUE_SECONDS.observe(max(0.0, (datetime.now(timezone.utc) - job.created_at).total_seconds()))
+        self._publish({
+            "job_id": str(job.id), "status": "running", "attempts": job.attempts,
+            "cards_created": 0, "error_message": None,
+        })
+
+        generation = asyncio.create_task(self._generate(job))
+        self._running[job.id] = generation
+        try:
+            cards = await generation
+            card_ids = await asyncio.to_thread(_mark_completed, job, self.worker_id, cards)
+        except asyncio.CancelledError:
+            if self._stopping:
+                raise  # Released back to the queue by stop()
+            # Cancelled on request
+            await asyncio.to_thread(_mark_cancelled, job.id, self.worker_id)
+            await self._finish(job.id)
+            JOBS.inc(outcome="cancelled")
+            return
+        except (GenerationSourceError, ValueError) as e:
+            # Invalid input: retrying will not help
+            await asyncio.to_thread(_mark_failed, job.id, self.worker_id, str(e))
+            await self._finish(job.id)
+            JOBS.inc(outcome="failed")
+            return
+        except Exception as e:
+            logger.exception(f"Error running generation job {job.id}: {e}")
+            status = await asyncio.to_thread(
+                _mark_attempt_failed, job.id, self.worker_id, f"Failed to generate flashcards: {e}"
+            )
+            await self._finish(job.id)
+            JOBS.inc(outcome="retried" if status == "queued" else "error")
+            return
+        finally:
+            self._running.pop(job.id, None)
+
+        await self._finish(job.id)
+        if card_ids is None:
+            # Cancelled (or taken over after a missed heartbeat) while generating
+            JOBS.inc(outcome="cancelled")
+            return
+
+        JOBS.inc(outcome="completed")
+        JOB_SECONDS.observe(time.perf_counter() - started)
+        logger.info(f"Generation job {job.id} created {len(card_ids)} flashcards")
+
+    async def _generate(self, job: ClaimedJob) -> List[dict]:
+        material, source_text = await asyncio.to_thread(_load_job_source, job)
+        params = job.params
+        logger.info(f"Generation job {job.id}: {params.get('card_count')} cards from material {job.material_id}")
+        return await flashcard_generator.generate(
+            text=source_text,
+            count=params.get("card_count", 20),
+            difficulty=difficulty_name(params.get("difficulty")),
+            subject=material.subject_category,
+            ai_confidence=BASE_AI_CONFIDENCE,
+            use_cache=not params.get("force_refresh", False)
+        )
+
+    async def _finish(self, job_id: uuid.UUID) -> None:
+        """Publish the stored state of a job that left this worker."""
+        self._latest.pop(job_id, None)
+        event = await asyncio.to_thread(_load_event, job_id)
+        if event is not None:
+            self._publish(event)
+
+    async def _monitor(self) -> None:
+        """Heartbeat local jobs, stop cancelled ones and requeue jobs of dead processes."""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                if self._running:
+                    cancelled = await asyncio.to_thread(heartbeat_jobs, self.worker_id, list(self._running))
+                    for job_id in cancelled:
+                        generation = self._running.get(job_id)
+                        if generation is not None:
+                            generation.cancel()
+                if await asyncio.to_thread(requeue_stale_jobs):
+                    self._wake()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Generation job heartbeat failed: {e}")
+
+
+# ============ Database helpers (run in threads) ============
+
+def claim_query(jobs_per_user: int) -> Select:
+    """
+    The oldest due queued job of a user below the running-jobs cap, locked
+    (FOR UPDATE SKIP LOCKED: rows other workers hold are skipped).
+    """
+    running = aliased(GenerationJob)
+    user_running = select(func.count()).select_from(running).where(
+        running.user_id == GenerationJob.user_id,
+        running.status == "running"
+    ).scalar_subquery()
+
+    return select(GenerationJob).where(
+        GenerationJob.status == "queued",
+        GenerationJob.run_after <= func.now(),
+        user_running < jobs_per_user
+    ).order_by(
+        GenerationJob.run_after, GenerationJob.created_at
+    ).limit(1).with_for_update(skip_locked=True, of=GenerationJob)
+
+
+def claim_next_job(worker_id: str, jobs_per_user: int) -> Optional[ClaimedJob]:
+    """
+    Claim the next job for this worker and mark it running.
+
+    Two workers can pick different jobs of the same user at the same time;
+    the per-user advisory lock serializes them and the running count is
+    checked again under it, so the cap holds across processes.
+
+    Returns:
+        The claimed job, or None if there is nothing to run
+    """
+    with get_db_context() as db:
+        job = db.execute(claim_query(jobs_per_user)).scalar_one_or_none()
+        if job is None:
+            db.rollback()
+            return None
+
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(str(job.user_id)))))
+        user_running = db.scalar(
+            select(func.count()).select_from(GenerationJob).where(
+                GenerationJob.user_id == job.user_id,
+                GenerationJob.status == "running"
+            )
+        )
+        if user_running >= jobs_per_user:
+            db.rollback()
+            return None
+
+        job.status = "running"
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.heartbeat_at = func.now()
+        job.started_at = func.now()
+        job.error_message = None
+        claimed = ClaimedJob(
+            id=job.id,
+            user_id=job.user_id,
+            material_id=job.material_id,
+            params=dict(job.params or {}),
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            created_at=job.created_at,
+        )
+        db.commit()
+        return claimed
+
+
+def _owned_job(db: Session, job_id: uuid.UUID, worker_id: str) -> Optional[GenerationJob]:
+    """The job row, locked, if it is still running on this worker."""
+    return db.execute(
+        select(GenerationJob).where(
+            GenerationJob.id == job_id,
+            GenerationJob.status == "running",
+            GenerationJob.locked_by == worker_id
+        ).with_for_update()
+    ).scalar_one_or_none()
+
+
+def _load_job_source(job: ClaimedJob) -> Tuple[StudyMaterial, str]:
+    with get_db_context() as db:
+        material, source_text = load_generation_source(
+            db, job.user_id, job.material_id, job.params.get("page_start"), job.params.get("page_end")
+        )
+        db.expunge(material)
+        return material, source_text
+
+
+def _mark_completed(job: ClaimedJob, worker_id: str, cards: List[dict]) -> Optional[List[uuid.UUID]]:
+    """
+    Save the cards and complete the job in one transaction.
+
+    Returns:
+        IDs of the created cards, or None (nothing saved) if the job was
+        cancelled or is no longer owned by this worker
+    """
+    with get_db_context() as db:
+        row = _owned_job(db, job.id, worker_id)
+        if row is None:
+            return None
+        if row.cancel_requested:
+            row.status = "cancelled"
+            row.locked_by = None
+            row.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            return None
+
+        flashcards = persist_generated_cards(db, job.user_id, job.material_id, cards)
+        count_created_cards(db, job.user_id, len(flashcards))
+        row.card_ids = [flashcard.id for flashcard in flashcards]
+        row.cards_created = len(flashcards)
+        row.status = "completed"
+        row.locked_by = None
+        row.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return [flashcard.id for flashcard in flashcards]
+
+
+def _mark_cancelled(job_id: uuid.UUID, worker_id: str) -> bool:
+    with get_db_context() as db:
+        row = _owned_job(db, job_id, worker_id)
+        if row is None:
+            return False
+        row.status = "cancelled"
+        row.locked_by = None
+        row.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return True
+
+
+def _mark_failed(job_id: uuid.UUID, worker_id: str, message: str) -> bool:
+    with get_db_context() as db:
+        row = _owned_job(db, job_id, worker_id)
+        if row is None:
+            return False
+        row.status = "failed"
+        row.error_message = message
+        row.locked_by = None
+        row.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return True
+
+
+def _mark_attempt_failed(job_id: uuid.UUID, worker_id: str, message: str) -> Optional[str]:
+    """
+    Queue the job again after a delay, or fail it after its last attempt.
+
+    Returns:
+        The new status (queued, failed or cancelled), or None if the job is
+        no longer owned by this worker
+    """
+    with get_db_context() as db:
+        row = _owned_job(db, job_id, worker_id)
+        if row is None:
+            return None
+
+        row.locked_by = None
+        row.error_message = message
+        if row.cancel_requested:
+            row.status = "cancelled"
+            row.finished_at = datetime.now(timezone.utc)
+        elif row.attempts < row.max_attempts:
+            row.status = "queued"
+            row.run_after = datetime.now(timezone.utc) + retry_delay(row.attempts)
+        else:
+            row.status = "failed"
+            row.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return row.status
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt: GENERATION_JOB_RETRY_SECONDS doubled per failed attempt."""
+    return timedelta(seconds=settings.GENERATION_JOB_RETRY_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def _load_event(job_id: uuid.UUID) -> Optional[dict]:
+    with get_db_context() as db:
+        job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+        return event_from_job(job) if job else None
+
+
+def heartbeat_jobs(worker_id: str, job_ids: List[uuid.UUID]) -> List[uuid.UUID]:
+    """
+    Mark this worker's running jobs alive.
+
+    Returns:
+        IDs of those jobs that have been asked to cancel
+    """
+    with get_db_context() as db:
+        rows = db.execute(
+            update(GenerationJob).where(
+                GenerationJob.id.in_(job_ids),
+                GenerationJob.status == "running",
+                GenerationJob.locked_by == worker_id
+            ).values(
+                heartbeat_at=func.now()
+            ).returning(GenerationJob.id, GenerationJob.cancel_requested)
+        ).all()
+        db.commit()
+    return [row.id for row in rows if row.cancel_requested]
+
+
+def requeue_stale_jobs(stale_after: Optional[timedelta] = None) -> int:
+    """
+    Requeue running jobs whose worker stopped sending heartbeats (the
+    process crashed or was killed); jobs out of attempts, or asked to
+    cancel, are finished instead.
+
+    Returns:
+        Number of jobs taken over
+    """
+    stale_after = stale_after or timedelta(seconds=settings.GENERATION_JOB_STALE_SECONDS)
+    cutoff = datetime.now(timezone.utc) - stale_after
+    stale = (
+        GenerationJob.status == "running",
+        GenerationJob.heartbeat_at < cutoff,
+    )
+
+    with get_db_context() as db:
+        cancelled = db.query(GenerationJob).filter(*stale, GenerationJob.cancel_requested.is_(True)).update({
+            GenerationJob.status: "cancelled",
+            GenerationJob.locked_by: None,
+            GenerationJob.finished_at: func.now(),
+        }, synchronize_session=False)
+        failed = db.query(GenerationJob).filter(*stale, GenerationJob.attempts >= GenerationJob.max_attempts).update({
+            GenerationJob.status: "failed",
+            GenerationJob.locked_by: None,
+            GenerationJob.error_message: "Generation was interrupted too many times",
+            GenerationJob.finished_at: func.now(),
+        }, synchronize_session=False)
+        requeued = db.query(GenerationJob).filter(*stale).update({
+            GenerationJob.status: "queued",
+            GenerationJob.locked_by: None,
+            GenerationJob.run_after: func.now(),
+        }, synchronize_session=False)
+        db.commit()
+
+    count = cancelled + failed + requeued
+    if count:
+        logger.warning(f"Took over {count} interrupted generation jobs ({requeued} requeued)")
+    return count
+
+
+def release_jobs(worker_id: str) -> int:
+    """
+    Put this worker's running jobs back in the queue on shutdown, without
+    counting the interrupted attempt.
+
+    Returns:
+        Number of jobs released
+    """
+    with get_db_context() as db:
+        count = db.query(GenerationJob).filter(
+            GenerationJob.status == "running",
+            GenerationJob.locked_by == worker_id
+        ).update({
+            GenerationJob.status: "queued",
+            GenerationJob.locked_by: None,
+            GenerationJob.attempts: GenerationJob.attempts - 1,
+            GenerationJob.run_after: func.now(),
+        }, synchronize_session=False)
+        db.commit()
+    if count:
+        logger.info(f"Released {count} running generation jobs")
+    return count
+
+
+# Singleton instance
+generation_job_service = GenerationJobService()
@@ -0,0 +1,377 @@
+"""
+Asynchronous study material ingestion.
+
+Uploads are accepted as `pending` materials and queued here; a fixed set of
+background workers runs text extraction (PDFs via the extraction process
+pool) and single-pass normalization with stats, moving each material through
+
+    pending -> processing -> completed | failed
+
+Extracted text is saved once in the content-addressed store
+(material_content) under the upload's hash and referenced by the material.
+
+Progress events are published to in-process subscribers (the SSE stream);
+the status endpoint and SSE stream fall back to the database, so any API
+process can report on any material.
+
+Queues live in memory: each process touches the materials it holds (queued
+or running) every INGESTION_HEARTBEAT_SECONDS, so that on startup only
+materials whose process died go stale and are failed.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from sqlalchemy import func, update
+
+from app.config import settings
+from app.models.study_material import StudyMaterial
+from app.services.material_content import material_content_store
+from app.services.pdf_extraction_pool import pdf_extraction_pool
+from app.services.text_normalizer import NormalizedText, text_normalizer
+from app.utils.database import get_db_context
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Coarse progress reported for each stage
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "extracting": 0.2,
+    "analyzing": 0.8,
+    "saving": 0.9,
+    "completed": 1.0,
+    "failed": 1.0,
+}
+
+JOBS = metrics.counter("ingestion_jobs_total", "Material ingestion jobs by outcome")
+JOB_SECONDS = metrics.histogram("ingestion_seconds", "Time from pickup to completion of ingestion jobs")
+
+
+class IngestionQueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept another job."""
+
+
+@dataclass
+class IngestionJob:
+    """One material waiting to be processed."""
+    material_id: uuid.UUID
+    pdf_path: Optional[str] = None  # Spooled upload on local disk (PDF jobs)
+    text: Optional[str] = None      # Pasted text (text jobs)
+    content_hash: Optional[str] = None  # Key in the content store (SHA-256)
+
+    @property
+    def source(self) -> str:
+        return "pdf" if self.pdf_path else "text"
+
+
+def _event(material_id: uuid.UUID, status: str, stage: str, error_message: Optional[str] = None, **extra) -> dict:
+    return {
+        "material_id": str(material_id),
+        "status": status,
+        "stage": stage,
+        "progress": STAGE_PROGRESS.get(stage, 0.0),
+        "error_message": error_message,
+        **extra,
+    }
+
+
+def event_from_material(material: StudyMaterial) -> dict:
+    """Build a progress event from the persisted material state."""
+    stage = {"pending": "queued", "processing": "extracting"}.get(material.status, material.status)
+    return _event(
+        material.id,
+        material.status,
+        stage,
+        material.error_message,
+        word_count=material.word_count if material.status == "completed" else None,
+    )
+
+
+class IngestionService:
+    """
+    Queue plus worker tasks processing uploaded materials.
+
+    Start and stop from the application lifespan.
+    """
+
+    def __init__(self):
+        self.worker_count = settings.INGESTION_WORKERS
+        self.queue_size = settings.INGESTION_QUEUE_SIZE
+        self.heartbeat_seconds = settings.INGESTION_HEARTBEAT_SECONDS
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._owned: Set[uuid.UUID] = set()  # Materials queued or running in this process
+        self._subscribers: Dict[uuid.UUID, Set[asyncio.Queue]] = {}
+        self._latest: Dict[uuid.UUID, dict] = {}
+        metrics.gauge(
+            "ingestion_queue_depth", "Materials waiting for an ingestion worker",
+            callback=lambda: self._queue.qsize() if self._queue else 0
+        )
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Fail interrupted jobs from a previous run and start the workers."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        try:
+            await asyncio.to_thread(recover_stale_materials)
+        except Exception as e:
+            logger.warning(f"Could not recover interrupted materials: {e}")
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"ingestion-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        self._workers.append(asyncio.create_task(self._heartbeat(), name="ingestion-heartbeat"))
+        logger.info(f"Ingestion started with {self.worker_count} workers")
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued jobs are recovered on the next start."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def has_capacity(self) -> bool:
+        return self._queue is not None and not self._queue.full()
+
+    def enqueue(self, job: IngestionJob) -> None:
+        """
+        Queue a job for a freshly created pending material.
+
+        Raises:
+            IngestionQueueFullError: If the queue is full or not running
+        """
+        if not self.has_capacity():
+            raise IngestionQueueFullError()
+        self._queue.put_nowait(job)
+        self._owned.add(job.material_id)
+        self._publish(_event(job.material_id, "pending", "queued"))
+
+    # ============ Progress events ============
+
+    def latest_event(self, material_id: uuid.UUID) -> Optional[dict]:
+        """Most recent event published by this process for a material."""
+        return self._latest.get(material_id)
+
+    async def subscribe(self, material_id: uuid.UUID, poll_seconds: float = 1.0) -> AsyncIterator[dict]:
+        """
+        Yield progress events for a material until it completes or fails.
+
+        Events come from this process's workers when available; otherwise
+        the material row is re-read every poll_seconds.
+        """
+        inbox: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(material_id, set()).add(inbox)
+        last = None
+        try:
+            # Current state first, then changes
+            event = self.latest_event(material_id) or await asyncio.to_thread(_load_event, material_id)
+            while event is not None:
+                if event != last:
+                    last = event
+                    yield event
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+
+                try:
+                    event = await asyncio.wait_for(inbox.get(), timeout=poll_seconds)
+                except asyncio.TimeoutError:
+                    event = self.latest_event(material_id) or await asyncio.to_thread(_load_event, material_id)
+        finally:
+            subscribers = self._subscribers.get(material_id)
+            if subscribers is not None:
+                subscribers.discard(inbox)
+                if not subscribers:
+                    del self._subscribers[material_id]
+
+    def _publish(self, event: dict) -> None:
+        material_id = uuid.UUID(event["material_id"])
+        if event["status"] in TERMINAL_STATUSES:
+            self._latest.pop(material_id, None)
+        else:
+            self._latest[material_id] = event
+        for inbox in self._subscribers.get(material_id, ()):
+            inbox.put_nowait(event)
+
+    # ============ Workers ============
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Ingestion worker {index} crashed on material {job.material_id}: {e}")
+            finally:
+                if job.pdf_path and os.path.exists(job.pdf_path):
+                    os.unlink(job.pdf_path)
+                self._owned.discard(job.material_id)
+                self._queue.task_done()
+
+    async def _heartbeat(self) -> None:
+        """Keep this process's queued and running materials from looking stale."""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            if not self._owned:
+                continue
+            try:
+                await asyncio.to_thread(touch_materials, list(self._owned))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Ingestion heartbeat failed: {e}")
+
+    async def _process(self, job: IngestionJob) -> None:
+        started = time.perf_counter()
+        material_id = job.material_id
+
+        if not await asyncio.to_thread(_mark_processing, material_id):
+            logger.info(f"Material {material_id} was deleted before processing")
+            return
+
+        try:
+            if job.pdf_path:
+                self._publish(_event(material_id, "processing", "extracting"))
+                document = await pdf_extraction_pool.extract_pages_from_path(job.pdf_path)
+            else:
+                self._publish(_event(material_id, "processing", "analyzing"))
+                document = await asyncio.to_thread(text_normalizer.normalize, job.text or "")
+                if not document.text:
+                    raise ValueError("Text is empty after removing invalid characters")
+
+            self._publish(_event(material_id, "processing", "saving"))
+            await asyncio.to_thread(_mark_completed, material_id, document, job.content_hash, job.source)
+
+        except ValueError as e:
+            # Invalid input (corrupted/encrypted PDF, no text, timeout, memory cap)
+            await self._fail(material_id, str(e))
+            JOBS.inc(outcome="failed")
+            return
+        except Exception as e:
+            logger.exception(f"Error processing material {material_id}: {e}")
+            await self._fail(material_id, "Failed to process material")
+            JOBS.inc(outcome="error")
+            return
+
+        JOBS.inc(outcome="completed")
+        JOB_SECONDS.observe(time.perf_counter() - started)
+        logger.info(f"Material {material_id} processed: {document.word_count} words")
+        self._publish(_event(material_id, "completed", "completed", word_count=document.word_count))
+
+    async def _fail(self, material_id: uuid.UUID, message: str) -> None:
+        await asyncio.to_thread(_mark_failed, material_id, message)
+        self._publish(_event(material_id, "failed", "failed", message))
+
+
+# ============ Database helpers (run in threads) ============
+
+def _mark_processing(material_id: uuid.UUID) -> bool:
+    with get_db_context() as db:
+        material = db.query(StudyMaterial).filter(
+            StudyMaterial.id == material_id,
+            StudyMaterial.deleted_at.is_(None)
+        ).first()
+        if not material:
+            return False
+        material.status = "processing"
+        db.commit()
+        return True
+
+
+def _mark_completed(
+    material_id: uuid.UUID,
+    document: NormalizedText,
+    content_hash: Optional[str] = None,
+    source: str = "text",
+) -> None:
+    with get_db_context() as db:
+        material = db.query(StudyMaterial).filter(StudyMaterial.id == material_id).first()
+        if material:
+            if content_hash:
+                material_content_store.put(db, content_hash, source, document)
+                material.content_hash = content_hash
+                material.inline_text = None
+            else:
+                material.extracted_text = document.text
+            material.word_count = document.word_count
+            material.status = "completed"
+            material.error_message = None
+            material.processed_at = datetime.now(timezone.utc)
+            db.commit()
+
+
+def _mark_failed(material_id: uuid.UUID, message: str) -> None:
+    with get_db_context() as db:
+        material = db.query(StudyMaterial).filter(StudyMaterial.id == material_id).first()
+        if material:
+            material.status = "failed"
+            material.error_message = message
+            material.processed_at = datetime.now(timezone.utc)
+            db.commit()
+
+
+def _load_event(material_id: uuid.UUID) -> Optional[dict]:
+    with get_db_context() as db:
+        material = db.query(StudyMaterial).filter(StudyMaterial.id == material_id).first()
+        return event_from_material(material) if material else None
+
+
+def touch_materials(material_ids: List[uuid.UUID]) -> None:
+    """Mark pending/processing materials as held by a live process (updated_at = now)."""
+    with get_db_context() as db:
+        db.execute(
+            update(StudyMaterial).where(
+                StudyMaterial.id.in_(material_ids),
+                StudyMaterial.status.in_(("pending", "processing"))
+            ).values(updated_at=func.now())
+        )
+        db.commit()
+
+
+def recover_stale_materials(stale_after: Optional[timedelta] = None) -> int:
+    """
+    Fail materials left pending/processing by a previous process.
+
+    Jobs live in memory, so after a restart nothing will pick these up.
+    Only materials untouched for INGESTION_STALE_MINUTES are failed: live
+    API processes touch theirs every INGESTION_HEARTBEAT_SECONDS, however
+    long they wait in a queue, so only those of dead processes go stale.
+
+    Returns:
+        Number of materials marked failed
+    """
+    stale_after = stale_after or timedelta(minutes=settings.INGESTION_STALE_MINUTES)
+    cutoff = datetime.now(timezone.utc) - stale_after
+
+    with get_db_context() as db:
+        count = db.query(StudyMaterial).filter(
+            StudyMaterial.status.in_(("pending", "processing")),
+            StudyMaterial.updated_at < cutoff
+        ).update({
+            StudyMaterial.status: "failed",
+            StudyMaterial.error_message: "Processing was interrupted. Please upload the material again.",
+        }, synchronize_session=False)
+        db.commit()
+
+    if count:
+        logger.warning(f"Marked {count} interrupted materials as failed")
+    return count
+
+
+# Singleton instance
+ingestion_service = IngestionService()
@@ -0,0 +1,334 @@
+"""
+Rate-limited, retrying access to the Anthropic Messages API.
+
+Every model call of the process goes through one LLMClient (see
+OpenAIService), which adds around the SDK client:
+- a concurrency limit on requests in flight (ANTHROPIC_MAX_CONCURRENCY)
+- token buckets pacing requests and estimated input tokens per minute
+  below the provider limits, so bursts queue here instead of failing there
+- retries of rate limits (429), server errors (5xx, 529 overloaded) and
+  connection errors, with exponential backoff and full jitter (or the
+  provider's retry-after, when longer)
+- a circuit breaker: after ANTHROPIC_CIRCUIT_FAILURES consecutive failures
+  calls fail at once for ANTHROPIC_CIRCUIT_RESET_SECONDS, then one trial
+  call decides whether to close it again
+- per-call latency and token metrics
+
+The SDK's own retries are disabled. ANTHROPIC_BASE_URL points the client
+at another server, e.g. a local fake for tests and load tests.
+"""
+
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext
+from typing import AsyncIterator, Callable, Optional
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from anthropic import APIConnectionError, APIStatusError, AsyncAnthropic
+
+from app.config import settings
+from app.services.text_chunker import estimate_tokens
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = metrics.counter("llm_requests_total", "Model API calls by model and outcome")
+REQUEST_SECONDS = metrics.histogram("llm_request_seconds", "Latency of model API calls by model and outcome")
+TOKENS = metrics.counter("llm_tokens_total", "Tokens reported by the model API by model and kind (input, output)")
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors and connection problems are worth retrying."""
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, APIConnectionError)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (retry-after header), if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _request_tokens(request: dict) -> int:
+    """Estimated input tokens of a Messages API request."""
+    texts = [request.get("system") or ""]
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+    return sum(estimate_tokens(text) for text in texts)
+
+
+class TokenBucket:
+    """
+    Allows `rate_per_minute` units per minute, in bursts of up to one
+    minute's worth. A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Take amount units if they are available.
+
+        Returns:
+            0 if taken, otherwise the seconds until they will be available
+        """
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)  # A single oversized request waits for a full bucket
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until amount units are available and take them."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing API.
+
+    closed: calls pass; failure_threshold consecutive failures open it.
+    open: calls raise CircuitOpenError for reset_seconds.
+    half_open: one trial call passes; success closes, failure reopens.
+    A threshold of 0 disables the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._clock = clock
+        self._failures = 0
+        self._changed_at = 0.0  # When the circuit opened or the trial call started
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the call must not be made now
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            if self.state == "closed":
+                return
+            # A trial that never reported back (e.g. cancelled) does not block forever
+            if self._clock() - self._changed_at < self.reset_seconds:
+                raise CircuitOpenError("Model API is temporarily unavailable (circuit open)")
+            if self.state == "open":
+                logger.info("Circuit breaker half-open: sending a trial request")
+            self.state = "half_open"
+            self._changed_at = self._clock()
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Circuit breaker closed")
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit breaker open after {self._failures} consecutive failures")
+                self.state = "open"
+                self._changed_at = self._clock()
+
+
+class LLMClient:
+    """
+    Wraps an AsyncAnthropic client; create() and stream() take the same
+    arguments as client.messages.create() and client.messages.stream().
+    """
+
+    def __init__(self, client: AsyncAnthropic):
+        self._client = client
+        self.max_concurrency = settings.ANTHROPIC_MAX_CONCURRENCY
+        self.max_retries = settings.ANTHROPIC_MAX_RETRIES
+        self.retry_base_seconds = settings.ANTHROPIC_RETRY_BASE_SECONDS
+        self.retry_max_seconds = settings.ANTHROPIC_RETRY_MAX_SECONDS
+        self.requests = TokenBucket(settings.ANTHROPIC_REQUESTS_PER_MINUTE)
+        self.input_tokens = TokenBucket(settings.ANTHROPIC_INPUT_TOKENS_PER_MINUTE)
+        self.breaker = CircuitBreaker(settings.ANTHROPIC_CIRCUIT_FAILURES, settings.ANTHROPIC_CIRCUIT_RESET_SECONDS)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._in_flight = 0
+
+        metrics.gauge("llm_requests_in_flight", "Model API calls in flight", callback=lambda: self._in_flight)
+        metrics.gauge(
+            "llm_circuit_open", "1 while the model API circuit breaker is open",
+            callback=lambda: 0 if self.breaker.state == "closed" else 1
+        )
+
+    @classmethod
+    def from_settings(cls, api_key: str) -> "LLMClient":
+        return cls(AsyncAnthropic(
+            api_key=api_key,
+            base_url=settings.ANTHROPIC_BASE_URL or None,
+            timeout=settings.ANTHROPIC_TIMEOUT_SECONDS,
+            max_retries=0,  # Retried here, with the limits applied to every attempt
+        ))
+
+    @property
+    def messages(self) -> "LLMClient":
+        """Same call shape as the SDK: llm_client.messages.create(...)."""
+        return self
+
+    async def create(self, **request):
+        """Send a Messages API request (retried as described above) and return the Message."""
+        model = request.get("model", "")
+        tokens = _request_tokens(request)
+        attempt = 0
+        while True:
+            await self._admit(model, tokens)
+            started = time.monotonic()
+            try:
+                async with self._slot():
+                    message = await self._client.messages.create(**request)
+            except Exception as e:
+                attempt = await self._retry_or_raise(e, model, attempt, started)
+                continue
+            self._succeeded(model, started, getattr(message, "usage", None))
+            return message
+
+    @asynccontextmanager
+    async def stream(self, **request) -> AsyncIterator:
+        """
+        Open a streaming Messages API request and yield the SDK's stream.
+
+        Failures while opening it are retried; once the response has
+        started, errors are raised to the caller (its output may already
+        have been used). The request holds a concurrency slot until the
+        block exits.
+        """
+        model = request.get("model", "")
+        tokens = _request_tokens(request)
+        attempt = 0
+        while True:
+            await self._admit(model, tokens)
+            started = time.monotonic()
+            async with AsyncExitStack() as stack:
+                await stack.enter_async_context(self._slot())
+                try:
+                    stream = await stack.enter_async_context(self._client.messages.stream(**request))
+                except Exception as e:
+                    error = e
+                else:
+                    try:
+                        yield stream
+                    except Exception as e:
+                        self._failed(e, model, started, "failed")
+                        raise
+                    self._succeeded(model, started, _stream_usage(stream))
+                    return
+            # Back off with the slot released
+            attempt = await self._retry_or_raise(error, model, attempt, started)
+
+    # ============ Limits ============
+
+    def _slot(self):
+        """Concurrency slot (one semaphore per event loop)."""
+        if self.max_concurrency <= 0:
+            return _counted(self, nullcontext())
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return _counted(self, self._semaphore)
+
+    async def _admit(self, model: str, tokens: int) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            REQUESTS.inc(model=model, outcome="rejected")
+            raise
+        await self.requests.acquire(1)
+        await self.input_tokens.acquire(tokens)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds before retry number attempt + 1: full jitter, at least retry-after."""
+        delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    # ============ Outcomes ============
+
+    async def _retry_or_raise(self, error: Exception, model: str, attempt: int, started: float) -> int:
+        """Record a failed attempt; sleep and return the next attempt number, or raise error."""
+        retrying = is_retryable(error) and attempt < self.max_retries
+        self._failed(error, model, started, "retried" if retrying else "failed")
+        if not retrying:
+            raise error
+
+        delay = self.backoff(attempt, _retry_after(error))
+        logger.warning(f"Model API call failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        return attempt + 1
+
+    def _failed(self, error: Exception, model: str, started: float, outcome: str) -> None:
+        REQUESTS.inc(model=model, outcome=outcome)
+        REQUEST_SECONDS.observe(time.monotonic() - started, model=model, outcome="error")
+        if is_retryable(error):
+            self.breaker.record_failure()
+        elif isinstance(error, APIStatusError):
+            self.breaker.record_success()  # The API answered; the request itself was bad
+
+    def _succeeded(self, model: str, started: float, usage) -> None:
+        self.breaker.record_success()
+        REQUESTS.inc(model=model, outcome="ok")
+        REQUEST_SECONDS.observe(time.monotonic() - started, model=model, outcome="ok")
+        if usage is not None:
+            TOKENS.inc(getattr(usage, "input_tokens", 0) or 0, model=model, kind="input")
+            TOKENS.inc(getattr(usage, "output_tokens", 0) or 0, model=model, kind="output")
+
+
+@asynccontextmanager
+async def _counted(client: LLMClient, limiter):
+    async with limiter:
+        client._in_flight += 1
+        try:
+            yield
+        finally:
+            client._in_flight -= 1
+
+
+def _stream_usage(stream):
+    """Token usage of a (possibly partially read) message stream, if known."""
+    try:
+        return stream.current_message_snapshot.usage
+    except Exception:
+        return None
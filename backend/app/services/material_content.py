@@ -0,0 +1,130 @@
+"""
+Content-addressed store for extracted material text.
+
+Identical uploads (the same PDF bytes, or the same pasted text up to
+whitespace) share a single material_contents row. The upload route looks
+the hash up first: on a hit the material is completed immediately, with no
+extraction and no new copy of the text; on a miss the ingestion worker
+stores the extracted text under the hash once processing succeeds.
+
+PDF content also keeps a page index (character offset of every page), so
+page ranges can be read without loading the whole document.
+"""
+
+from typing import List, Optional
+import hashlib
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.material_content import MaterialContent
+from app.services.text_normalizer import NormalizedText
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOKUPS = metrics.counter("material_content_lookups_total", "Content store lookups on upload by result")
+
+
+def text_content_hash(text: str) -> str:
+    """
+    SHA-256 of pasted text after whitespace normalization.
+
+    Runs of whitespace (including line breaks) collapse to one space, so
+    the same text pasted with different wrapping or indentation matches.
+    """
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def check_page_range(page_offsets: Optional[List[int]], first_page: int, last_page: int) -> None:
+    """
+    Validate a 1-based, inclusive page range against a page index.
+
+    Raises:
+        ValueError: If there is no page index or the range is out of bounds
+    """
+    if not page_offsets:
+        raise ValueError("Page ranges are only available for processed PDF materials")
+
+    page_count = len(page_offsets) - 1
+    if first_page < 1 or first_page > last_page or last_page > page_count:
+        raise ValueError(f"Invalid page range {first_page}-{last_page}: material has {page_count} pages")
+
+
+class MaterialContentStore:
+    """Lookup and insert of shared material text."""
+
+    def get(self, db: Session, content_hash: str) -> Optional[MaterialContent]:
+        """
+        Find stored content by hash, counting the hit or miss.
+
+        Args:
+            db: Database session
+            content_hash: Hex SHA-256 of the upload
+
+        Returns:
+            MaterialContent or None
+        """
+        content = db.get(MaterialContent, content_hash)
+        LOOKUPS.inc(result="hit" if content is not None else "miss")
+        return content
+
+    def put(self, db: Session, content_hash: str, source: str, document: NormalizedText) -> None:
+        """
+        Store normalized text under its hash (no-op if already present).
+
+        Concurrent uploads of the same document may both miss and both
+        extract; the first to commit wins and the other reuses its row.
+        Does not commit.
+        """
+        db.execute(
+            insert(MaterialContent)
+            .values(
+                content_hash=content_hash,
+                source=source,
+                extracted_text=document.text,
+                word_count=document.word_count,
+                page_offsets=document.page_offsets,
+                paragraph_offsets=document.paragraph_offsets,
+            )
+            .on_conflict_do_nothing(index_elements=[MaterialContent.content_hash])
+        )
+
+    def get_page_offsets(self, db: Session, content_hash: str) -> Optional[List[int]]:
+        """Page index of stored content, or None if it has no pages (pasted text)."""
+        return db.execute(
+            select(MaterialContent.page_offsets).where(MaterialContent.content_hash == content_hash)
+        ).scalar_one_or_none()
+
+    def read_pages(
+        self,
+        db: Session,
+        content_hash: str,
+        page_offsets: List[int],
+        first_page: int,
+        last_page: int,
+    ) -> List[str]:
+        """
+        Texts of pages first_page..last_page (1-based, inclusive).
+
+        Only the requested span of the document is transferred from the
+        database (substr on the stored text).
+        """
+        start = page_offsets[first_page - 1]
+        end = page_offsets[last_page]
+        segment = db.execute(
+            select(func.substr(MaterialContent.extracted_text, start + 1, end - start))
+            .where(MaterialContent.content_hash == content_hash)
+        ).scalar_one() if end > start else ""
+
+        return [
+            segment[page_offsets[page] - start:page_offsets[page + 1] - start].lstrip("\n")
+            for page in range(first_page - 1, last_page)
+        ]
+
+
+# Singleton instance
+material_content_store = MaterialContentStore()
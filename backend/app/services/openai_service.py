@@ -2,17 +2,57 @@
 Anthropic Claude Service for AI-powered flashcard generation.
 
 Uses Claude Sonnet for high-quality flashcard generation from study materials.
+Requests are routed by size (see OpenAIService.route): short texts asking
+for few cards go to a faster, cheaper model, and max_tokens is sized to the
+expected response.
 """
 
 import os
 import json
-from typing import List, Dict, Optional
-from anthropic import AsyncAnthropic
+import math
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Dict, Optional
 from app.config import settings
+from app.services.llm_client import LLMClient
+from app.services.text_chunker import estimate_tokens
+from app.utils.json_stream import JSONArrayStream
+from app.utils.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+ROUTES = metrics.counter("generation_model_routes_total", "Generation requests by model tier and model")
+ROUTE_MAX_TOKENS = metrics.histogram(
+    "generation_max_tokens", "max_tokens given to generation requests by model tier",
+    buckets=(512, 1024, 2048, 4096, 8192, 16384, 32768)
+)
+ROUTE_SECONDS = metrics.histogram(
+    "generation_request_seconds", "Latency of generation requests by model tier and outcome (ok, truncated, error)"
+)
+
+# Tokens of the response that are not cards (array brackets, code fence, stray text)
+RESPONSE_OVERHEAD_TOKENS = 100
+
+# Margin over the per-card estimate (long answers, pretty-printed JSON), and the
+# smallest max_tokens given: unused max_tokens cost nothing, a cut-off response does
+OUTPUT_SAFETY_FACTOR = 1.5
+MIN_MAX_TOKENS = 1024
+
+# Version of the generation prompt; bump when _build_prompt changes so that
+# cached generations made with the old prompt are not reused
+PROMPT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Model and response budget chosen for one generation request."""
+    tier: str  # "fast" or "large"
+    model: str
+    max_tokens: int
+    input_tokens: int  # Estimated tokens of the source text
+    output_tokens: int  # Estimated tokens of the response
+
 
 class OpenAIService:
     """
@@ -21,26 +61,78 @@ class OpenAIService:
     Note: Class name kept as OpenAIService for backward compatibility.
 
     Features:
-    - High-quality generation using Claude Sonnet
+    - High-quality generation using Claude Sonnet, small requests on a fast model
     - Few-shot prompting for excellent cards
     - Structured JSON output format
-    - Error handling and retry logic
+    - Rate limiting, retries and circuit breaking (see LLMClient)
     """
 
     def __init__(self):
         """Initialize the Anthropic client."""
         api_key = os.getenv("ANTHROPIC_API_KEY") or getattr(settings, "ANTHROPIC_API_KEY", None)
 
+        if not api_key and settings.ANTHROPIC_BASE_URL:
+            api_key = "local"  # A local fake server (app.loadtest.fake_anthropic) needs no key
+
         if not api_key:
             logger.warning("ANTHROPIC_API_KEY not found in environment variables")
             self.client = None
         else:
-            self.client = AsyncAnthropic(api_key=api_key)
+            # Same interface as AsyncAnthropic (client.messages.create / .stream)
+            self.client = LLMClient.from_settings(api_key)
 
         # Model configuration
-        self.model = "claude-sonnet-4-20250514"
-        self.max_tokens = 4000
-        self.temperature = 0.7
+        self.model = settings.ANTHROPIC_MODEL
+        self.max_tokens = settings.ANTHROPIC_MAX_TOKENS
+        self.fast_model = settings.ANTHROPIC_FAST_MODEL
+        self.fast_max_tokens = settings.ANTHROPIC_FAST_MAX_TOKENS
+        self.temperature = settings.ANTHROPIC_TEMPERATURE
+
+    def route(self, text: str, count: int) -> ModelRoute:
+        """
+        Choose the model and max_tokens for generating count cards from text.
+
+        The response is estimated at ANTHROPIC_OUTPUT_TOKENS_PER_CARD per
+        card times OUTPUT_SAFETY_FACTOR (at least MIN_MAX_TOKENS); max_tokens
+        is that estimate capped by the tier's limit. The
+        fast tier takes requests within ANTHROPIC_FAST_MAX_INPUT_TOKENS and
+        ANTHROPIC_FAST_MAX_CARDS whose response fits its cap; the rest
+        (long inputs, where quality matters most) use the large model.
+        """
+        input_tokens = estimate_tokens(text)
+        output_tokens = max(
+            MIN_MAX_TOKENS,
+            math.ceil(count * settings.ANTHROPIC_OUTPUT_TOKENS_PER_CARD * OUTPUT_SAFETY_FACTOR)
+            + RESPONSE_OVERHEAD_TOKENS
+        )
+
+        if (
+            self.fast_model
+            and input_tokens <= settings.ANTHROPIC_FAST_MAX_INPUT_TOKENS
+            and count <= settings.ANTHROPIC_FAST_MAX_CARDS
+            and output_tokens <= self.fast_max_tokens
+        ):
+            tier, model, cap = "fast", self.fast_model, self.fast_max_tokens
+        else:
+            tier, model, cap = "large", self.model, self.max_tokens
+
+        return ModelRoute(tier, model, min(cap, output_tokens), input_tokens, output_tokens)
+
+    def _start_route(self, text: str, count: int) -> ModelRoute:
+        """Route a request and record the decision."""
+        route = self.route(text, count)
+        ROUTES.inc(tier=route.tier, model=route.model)
+        ROUTE_MAX_TOKENS.observe(route.max_tokens, tier=route.tier)
+        if route.output_tokens > route.max_tokens:
+            logger.warning(
+                f"{count} cards need ~{route.output_tokens} output tokens, "
+                f"over the {route.max_tokens} max_tokens of {route.model}; the response may be cut short"
+            )
+        logger.info(
+            f"Generating {count} flashcards using {route.model} "
+            f"(~{route.input_tokens} input tokens, max_tokens={route.max_tokens})"
+        )
+        return route
 
     def _build_prompt(
         self,
@@ -147,36 +239,31 @@ Genera EXACTAMENTE {count} flashcards. Retorna SOLO el array JSON:
             ValueError: If API key is not configured
             Exception: For API errors or malformed responses
         """
-        if not self.client:
-            raise ValueError(
-                "Anthropic API key not configured. Please set ANTHROPIC_API_KEY environment variable."
-            )
-
-        # Validate inputs
-        if not text or len(text.strip()) < 50:
-            raise ValueError("Text must be at least 50 characters long")
-
-        if count < 1 or count > 100:
-            raise ValueError("Count must be between 1 and 100")
+        self._validate_request(text, count)
 
         # Build prompt
         prompt = self._build_prompt(text, count, difficulty, subject)
+        route = self._start_route(text, count)
+        started = time.monotonic()
 
         try:
-            logger.info(f"Generating {count} flashcards using {self.model}")
-
             # Call Anthropic API
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
+            try:
+                response = await self.client.messages.create(
+                    model=route.model,
+                    max_tokens=route.max_tokens,
+                    temperature=self.temperature,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ]
+                )
+            except Exception:
+                _observe_route(route, started, "error")
+                raise
+            _observe_route(route, started, getattr(response, "stop_reason", None))
 
             # Extract content
             content = response.content[0].text
@@ -184,36 +271,44 @@ Genera EXACTAMENTE {count} flashcards. Retorna SOLO el array JSON:
             if not content:
                 raise Exception("Empty response from Anthropic API")
 
-            # Parse JSON
-            # Try to find JSON array in the response
-            content = content.strip()
-
-            # Handle wrapped responses
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-
-            # Parse JSON
-            try:
-                # Try direct parse first
-                flashcards = json.loads(content)
-            except json.JSONDecodeError:
-                # Try to extract array from object
-                data = json.loads(content)
-                if isinstance(data, dict):
-                    # Look for array in common keys
-                    for key in ['flashcards', 'cards', 'items', 'data']:
-                        if key in data and isinstance(data[key], list):
-                            flashcards = data[key]
-                            break
+            if getattr(response, "stop_reason", None) == "max_tokens":
+                # Cut off mid-array: keep the cards that were completed
+                flashcards = JSONArrayStream().feed(content)
+                logger.warning(
+                    f"Response truncated at max_tokens={route.max_tokens}; "
+                    f"keeping {len(flashcards)} of {count} requested cards"
+                )
+            else:
+                # Parse JSON
+                # Try to find JSON array in the response
+                content = content.strip()
+
+                # Handle wrapped responses
+                if content.startswith("```json"):
+                    content = content[7:]
+                if content.startswith("```"):
+                    content = content[3:]
+                if content.endswith("```"):
+                    content = content[:-3]
+                content = content.strip()
+
+                # Parse JSON
+                try:
+                    # Try direct parse first
+                    flashcards = json.loads(content)
+                except json.JSONDecodeError:
+                    # Try to extract array from object
+                    data = json.loads(content)
+                    if isinstance(data, dict):
+                        # Look for array in common keys
+                        for key in ['flashcards', 'cards', 'items', 'data']:
+                            if key in data and isinstance(data[key], list):
+                                flashcards = data[key]
+                                break
+                        else:
+                            raise Exception("Could not find flashcards array in response")
                     else:
-                        raise Exception("Could not find flashcards array in response")
-                else:
-                    flashcards = data
+                        flashcards = data
 
             # Validate response format
             if not isinstance(flashcards, list):
@@ -225,31 +320,9 @@ Genera EXACTAMENTE {count} flashcards. Retorna SOLO el array JSON:
             # Validate and normalize each flashcard
             validated_cards = []
             for i, card in enumerate(flashcards):
-                if not isinstance(card, dict):
-                    logger.warning(f"Skipping invalid card at index {i}: not a dict")
-                    continue
-
-                # Required fields
-                if 'question' not in card or 'answer' not in card:
-                    logger.warning(f"Skipping invalid card at index {i}: missing question or answer")
-                    continue
-
-                # Normalize card
-                normalized_card = {
-                    'question': str(card['question']).strip(),
-                    'answer': str(card['answer']).strip(),
-                    'explanation': str(card.get('explanation', '')).strip() if card.get('explanation') else None,
-                    'difficulty': min(5, max(1, int(card.get('difficulty', 3)))),
-                    'tags': card.get('tags', []) if isinstance(card.get('tags'), list) else [],
-                }
-
-                # Add AI confidence if provided
-                if ai_confidence is not None:
-                    normalized_card['ai_confidence'] = float(ai_confidence)
-                elif 'ai_confidence' in card:
-                    normalized_card['ai_confidence'] = float(card['ai_confidence'])
-
-                validated_cards.append(normalized_card)
+                normalized_card = self._normalize_card(card, i, ai_confidence)
+                if normalized_card is not None:
+                    validated_cards.append(normalized_card)
 
             if len(validated_cards) == 0:
                 raise Exception("No valid flashcards after validation")
@@ -266,6 +339,126 @@ Genera EXACTAMENTE {count} flashcards. Retorna SOLO el array JSON:
             logger.error(f"Error generating flashcards: {e}")
             raise
 
+    async def stream_flashcards(
+        self,
+        text: str,
+        count: int = 20,
+        difficulty: Optional[str] = None,
+        subject: Optional[str] = None,
+        ai_confidence: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Generate flashcards, yielding each card as soon as the model has written it.
+
+        Uses the streaming Messages API and parses the JSON array
+        incrementally (see JSONArrayStream); arguments and card shape are
+        the same as generate_flashcards.
+
+        Raises:
+            ValueError: If API key is not configured or inputs are invalid
+            Exception: For API errors, or if the response has no valid cards
+        """
+        self._validate_request(text, count)
+        prompt = self._build_prompt(text, count, difficulty, subject)
+        parser = JSONArrayStream()
+        index = 0
+        generated = 0
+        route = self._start_route(text, count)
+        started = time.monotonic()
+        stop_reason = "error"
+
+        try:
+            async with self.client.messages.stream(
+                model=route.model,
+                max_tokens=route.max_tokens,
+                temperature=self.temperature,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            ) as stream:
+                async for delta in stream.text_stream:
+                    for card in parser.feed(delta):
+                        normalized_card = self._normalize_card(card, index, ai_confidence)
+                        index += 1
+                        if normalized_card is not None:
+                            generated += 1
+                            yield normalized_card
+                    if parser.done:
+                        break
+                stop_reason = _stream_stop_reason(stream)
+        except GeneratorExit:
+            stop_reason = None  # The caller stopped reading
+            raise
+        finally:
+            _observe_route(route, started, stop_reason)
+
+        if generated == 0:
+            raise Exception("No valid flashcards in response")
+
+    def _validate_request(self, text: str, count: int) -> None:
+        """Check configuration and inputs before calling the API."""
+        if not self.client:
+            raise ValueError(
+                "Anthropic API key not configured. Please set ANTHROPIC_API_KEY environment variable."
+            )
+
+        if not text or len(text.strip()) < 50:
+            raise ValueError("Text must be at least 50 characters long")
+
+        if count < 1 or count > 100:
+            raise ValueError("Count must be between 1 and 100")
+
+    def _normalize_card(self, card, index: int, ai_confidence: Optional[float] = None) -> Optional[Dict]:
+        """
+        Validate one card from the model and normalize its fields.
+
+        Returns:
+            Card dictionary, or None (logged) if the card is invalid
+        """
+        if not isinstance(card, dict):
+            logger.warning(f"Skipping invalid card at index {index}: not a dict")
+            return None
+
+        # Required fields
+        if 'question' not in card or 'answer' not in card:
+            logger.warning(f"Skipping invalid card at index {index}: missing question or answer")
+            return None
+
+        normalized_card = {
+            'question': str(card['question']).strip(),
+            'answer': str(card['answer']).strip(),
+            'explanation': str(card.get('explanation', '')).strip() if card.get('explanation') else None,
+            'difficulty': min(5, max(1, int(card.get('difficulty', 3)))),
+            'tags': card.get('tags', []) if isinstance(card.get('tags'), list) else [],
+        }
+
+        # Add AI confidence if provided
+        if ai_confidence is not None:
+            normalized_card['ai_confidence'] = float(ai_confidence)
+        elif 'ai_confidence' in card:
+            normalized_card['ai_confidence'] = float(card['ai_confidence'])
+
+        return normalized_card
+
+
+def _observe_route(route: ModelRoute, started: float, stop_reason: Optional[str]) -> None:
+    """Record the latency of a routed request; responses cut off by max_tokens count as truncated."""
+    if stop_reason == "max_tokens":
+        logger.warning(f"Response from {route.model} hit max_tokens={route.max_tokens}")
+    outcome = {"max_tokens": "truncated", "error": "error"}.get(stop_reason, "ok")
+    ROUTE_SECONDS.observe(time.monotonic() - started, tier=route.tier, outcome=outcome)
+
+
+def _stream_stop_reason(stream) -> Optional[str]:
+    """Stop reason of a (possibly partially read) message stream, if known."""
+    try:
+        return stream.current_message_snapshot.stop_reason
+    except Exception:
+        return None
+
 
 # Singleton instance
 openai_service = OpenAIService()
@@ -0,0 +1,357 @@
+"""
+Process pool for CPU-bound PDF text extraction.
+
+PyPDF2 extraction runs in dedicated worker processes so it never blocks the
+event loop. Each job is bounded by:
+- a wall-clock timeout (SIGALRM inside the worker, with a hard deadline in
+  the parent that kills and restarts the pool if a worker stops responding)
+- an address-space cap (RLIMIT_AS) applied to every worker process
+Workers are recycled after PDF_WORKER_MAX_TASKS jobs.
+
+Restarting a pool breaks every job in flight on it, not only the one that
+timed out or whose worker died; those jobs are retried once on the fresh
+pool before failing.
+
+Large PDFs (PDF_PARALLEL_PAGE_THRESHOLD pages or more) are split into
+contiguous page ranges extracted by several workers at once; per-page
+failures are tolerated exactly as in sequential extraction.
+
+Uploads are handed to workers as a path to a temporary file on disk, never
+pickled as bytes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Callable, List, Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+from app.config import settings
+from app.services.text_normalizer import NormalizedText
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Extra time the parent waits beyond the worker's own timeout before killing it
+HARD_DEADLINE_GRACE_SECONDS = 5
+COPY_CHUNK_SIZE = 1024 * 1024
+
+JOBS = metrics.counter("pdf_extraction_jobs_total", "PDF extraction jobs by outcome")
+JOB_SECONDS = metrics.histogram("pdf_extraction_seconds", "Wall-clock time of PDF extraction jobs")
+IN_FLIGHT = metrics.gauge("pdf_extraction_in_flight", "PDF extraction jobs currently running")
+QUEUE_DEPTH = metrics.gauge("pdf_extraction_queue_depth", "PDF extraction jobs waiting for a free worker")
+PARALLEL_DOCUMENTS = metrics.counter(
+    "pdf_extraction_parallel_documents_total", "PDFs extracted as parallel page ranges"
+)
+POOL_RESTARTS = metrics.counter("pdf_extraction_pool_restarts_total", "Times the extraction pool was rebuilt")
+BROKEN_RETRIES = metrics.counter(
+    "pdf_extraction_broken_pool_retries_total", "Jobs retried after the pool broke while they were running"
+)
+
+
+class ExtractionTimeoutError(ValueError):
+    """Raised when a PDF takes longer than the configured timeout."""
+
+
+class ExtractionMemoryError(ValueError):
+    """Raised when a PDF needs more memory than a worker may use."""
+
+
+class _JobTimeout(BaseException):
+    """Raised by SIGALRM; a BaseException so per-page error handling cannot swallow it."""
+
+
+def _on_alarm(signum, frame):
+    raise _JobTimeout()
+
+
+def _init_worker(memory_limit_bytes: int) -> None:
+    """Worker initializer: cap the address space and install the timeout handler."""
+    if memory_limit_bytes > 0:
+        try:
+            import resource
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"Could not set worker memory limit: {e}")
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _with_limits(timeout_seconds: float, func: Callable, *args):
+    """Run func inside a worker process under the per-job timeout."""
+    signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        return func(*args)
+    except _JobTimeout:
+        raise ExtractionTimeoutError(
+            f"PDF processing took longer than {timeout_seconds:g} seconds and was stopped"
+        )
+    except MemoryError:
+        raise ExtractionMemoryError("PDF needs too much memory to process")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _probe(path: str, page_threshold: int) -> Tuple[int, Optional[List[Optional[str]]]]:
+    from app.services.pdf_service import pdf_service
+
+    with open(path, "rb") as pdf_file:
+        reader = pdf_service.open_reader(pdf_file)
+        num_pages = len(reader.pages)
+        if num_pages < page_threshold:
+            return num_pages, pdf_service.extract_page_texts(reader, 0, num_pages)
+        return num_pages, None
+
+
+def _extract_range(path: str, start: int, end: int) -> List[Optional[str]]:
+    from app.services.pdf_service import pdf_service
+
+    with open(path, "rb") as pdf_file:
+        reader = pdf_service.open_reader(pdf_file)
+        return pdf_service.extract_page_texts(reader, start, end)
+
+
+def _probe_job(path: str, page_threshold: int, timeout_seconds: float):
+    """
+    Validate the PDF and count its pages; documents below the parallel
+    threshold are extracted in the same job.
+    """
+    return _with_limits(timeout_seconds, _probe, path, page_threshold)
+
+
+def _range_job(path: str, start: int, end: int, timeout_seconds: float) -> List[Optional[str]]:
+    """Extract the texts of pages [start, end)."""
+    return _with_limits(timeout_seconds, _extract_range, path, start, end)
+
+
+def split_page_ranges(num_pages: int, parts: int) -> List[Tuple[int, int]]:
+    """Split [0, num_pages) into at most `parts` contiguous, near-equal ranges."""
+    parts = max(1, min(parts, num_pages))
+    size, extra = divmod(num_pages, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+class PDFExtractionPool:
+    """
+    Bounded process pool running PDF extraction jobs.
+
+    With PDF_WORKERS=0 extraction runs in a thread instead (no isolation;
+    useful for local development and tests).
+    """
+
+    def __init__(self):
+        self.workers = settings.PDF_WORKERS
+        self.timeout_seconds = settings.PDF_EXTRACTION_TIMEOUT_SECONDS
+        self.memory_limit_bytes = settings.PDF_WORKER_MEMORY_LIMIT_MB * 1024 * 1024
+        self.max_tasks_per_child = settings.PDF_WORKER_MAX_TASKS
+        self.parallel_page_threshold = settings.PDF_PARALLEL_PAGE_THRESHOLD
+        self.range_workers = settings.PDF_PARALLEL_RANGE_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._waiting = 0
+        IN_FLIGHT.callback = lambda: self._in_flight
+        QUEUE_DEPTH.callback = lambda: self._waiting
+
+    def start(self) -> None:
+        """Create the executor (worker processes are spawned on demand)."""
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_bytes,),
+                    max_tasks_per_child=self.max_tasks_per_child or None,
+                )
+                logger.info(
+                    f"PDF extraction pool started ({self.workers} workers, "
+                    f"{self.timeout_seconds}s timeout, {settings.PDF_WORKER_MEMORY_LIMIT_MB} MB cap)"
+                )
+
+    def shutdown(self) -> None:
+        """Stop the pool, cancelling queued jobs."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Kill every worker of a stuck or broken pool and start a fresh one."""
+        with self._lock:
+            if self._executor is not executor:
+                return  # Already replaced after another job's failure
+            self._executor = None
+        for process in list(getattr(executor, "_processes", {}).values()):
+            if process.is_alive():
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        POOL_RESTARTS.inc()
+        self.start()
+
+    async def extract_text(self, source: BinaryIO) -> str:
+        """
+        Extract text from a PDF file handle in worker processes.
+
+        PDFs with at least PDF_PARALLEL_PAGE_THRESHOLD pages are split into
+        page ranges extracted in parallel and reassembled in page order.
+
+        Args:
+            source: Seekable binary file handle (e.g. a spooled upload)
+
+        Returns:
+            Extracted text
+
+        Raises:
+            ValueError: Invalid PDF, timeout or memory limit exceeded
+        """
+        if self.workers <= 0:
+            return await self._run_inline(source)
+
+        path = await asyncio.to_thread(spool_to_disk, source)
+        try:
+            return await self.extract_text_from_path(path)
+        finally:
+            os.unlink(path)
+
+    async def extract_text_from_path(self, path: str) -> str:
+        """
+        Extract text from a PDF already on local disk (see extract_text).
+
+        The caller owns the file and removes it afterwards.
+        """
+        document = await self.extract_pages_from_path(path)
+        return document.text
+
+    async def extract_pages_from_path(self, path: str) -> NormalizedText:
+        """
+        Extract text from a PDF on local disk, keeping page boundaries.
+
+        Returns:
+            NormalizedText with stats and page offsets (PDFService.assemble_pages)
+
+        Raises:
+            ValueError: Invalid PDF, timeout or memory limit exceeded
+        """
+        from app.services.pdf_service import pdf_service
+
+        if self.workers <= 0:
+            _, page_texts = await self._track(asyncio.to_thread(_probe, path, sys.maxsize))
+            return await asyncio.to_thread(pdf_service.assemble_pages, page_texts)
+
+        range_workers = self.range_workers or self.workers
+        threshold = self.parallel_page_threshold if range_workers > 1 else sys.maxsize
+
+        num_pages, page_texts = await self._run(_probe_job, path, threshold, self.timeout_seconds)
+
+        if page_texts is None:
+            ranges = split_page_ranges(num_pages, range_workers)
+            logger.info(f"Extracting {num_pages} pages in {len(ranges)} parallel ranges")
+            PARALLEL_DOCUMENTS.inc()
+
+            results = await asyncio.gather(*[
+                self._run(_range_job, path, start, end, self.timeout_seconds)
+                for start, end in ranges
+            ])
+            page_texts = [text for chunk in results for text in chunk]
+
+        return await asyncio.to_thread(pdf_service.assemble_pages, page_texts)
+
+    async def _run_inline(self, source: BinaryIO) -> str:
+        from app.services.pdf_service import pdf_service
+        return await self._track(asyncio.to_thread(pdf_service.extract_text_from_pdf, source))
+
+    async def _run(self, job: Callable, *args):
+        # Jobs queue here rather than inside the executor, so the hard
+        # deadline below only starts once a worker is free
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            return await self._track(self._submit(job, *args))
+        finally:
+            self._slots.release()
+
+    async def _submit(self, job: Callable, *args):
+        """Run job on the current executor, retrying once if the pool breaks under it."""
+        for attempt in range(2):
+            self.start()
+            executor = self._executor
+            try:
+                future = asyncio.get_running_loop().run_in_executor(executor, job, *args)
+                return await asyncio.wait_for(future, timeout=self.timeout_seconds + HARD_DEADLINE_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                # The worker ignored SIGALRM (stuck in native code): kill the pool
+                logger.error(f"PDF extraction worker unresponsive after {self.timeout_seconds}s; restarting pool")
+                self._restart(executor)
+                raise ExtractionTimeoutError(
+                    f"PDF processing took longer than {self.timeout_seconds:g} seconds and was stopped"
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OS for memory) or another
+                # job's timeout killed the pool: every job on it fails, so
+                # this one may be collateral and gets one more try
+                self._restart(executor)
+                if attempt == 0:
+                    logger.warning("PDF extraction pool broke while a job was running; retrying it on a fresh pool")
+                    BROKEN_RETRIES.inc()
+                    continue
+                logger.error("PDF extraction worker died again on retry")
+                raise ExtractionMemoryError("PDF could not be processed within the worker's resource limits")
+
+    async def _track(self, awaitable):
+        self._in_flight += 1
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await awaitable
+            outcome = "success"
+            return result
+        except (ExtractionTimeoutError, asyncio.TimeoutError):
+            outcome = "timeout"
+            raise
+        except (ExtractionMemoryError, BrokenProcessPool):
+            outcome = "memory"
+            raise
+        except ValueError:
+            outcome = "invalid"
+            raise
+        finally:
+            self._in_flight -= 1
+            JOB_SECONDS.observe(time.perf_counter() - started)
+            JOBS.inc(outcome=outcome)
+
+
+def spool_to_disk(source: BinaryIO) -> str:
+    """Copy a file handle to a named temporary file in fixed-size chunks; returns its path."""
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False) as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        return target.name
+
+
+# Singleton instance
+pdf_extraction_pool = PDFExtractionPool()
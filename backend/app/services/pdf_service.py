@@ -7,12 +7,16 @@ Handles PDF text extraction with support for:
 - Error handling for corrupted PDFs
 """
 
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 import io
 import logging
 from PyPDF2 import PdfReader
 from PyPDF2.errors import PdfReadError
 
+from app.config import settings
+from app.services.text_chunker import iter_chunks
+from app.services.text_normalizer import NormalizedText, text_normalizer
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,7 +25,7 @@ class PDFService:
     Service for processing PDF files and extracting text.
 
     Features:
-    - Extract text from PDF bytes
+    - Extract text from PDF bytes or file handles
     - Automatic chunking for large documents
     - Page-by-page processing
     - Error handling for corrupted/protected PDFs
@@ -29,19 +33,20 @@ class PDFService:
 
     def __init__(self):
         """Initialize the PDF service."""
-        self.max_file_size_bytes = 10 * 1024 * 1024  # 10 MB
-        self.chunk_size_words = 10000  # Split if more than 10k words
+        self.max_file_size_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
 
     def extract_text_from_pdf(
         self,
-        file_bytes: bytes,
+        source: Union[bytes, BinaryIO],
         max_pages: Optional[int] = None
     ) -> str:
         """
         Extract text from a PDF file.
 
         Args:
-            file_bytes: Raw bytes of the PDF file
+            source: Raw bytes of the PDF file, or a seekable binary file
+                handle (e.g. a spooled upload), which is read page by page
+                without loading the whole file into memory
             max_pages: Optional limit on number of pages to process
 
         Returns:
@@ -51,8 +56,38 @@ class PDFService:
             ValueError: If file is invalid or too large
             Exception: For PDF processing errors
         """
+        reader = self.open_reader(source)
+        num_pages = len(reader.pages)
+        logger.info(f"Processing PDF with {num_pages} pages")
+
+        # Limit pages if specified
+        pages_to_process = min(num_pages, max_pages) if max_pages else num_pages
+
+        page_texts = self.extract_page_texts(reader, 0, pages_to_process)
+        return self.assemble_text(page_texts)
+
+    def open_reader(self, source: Union[bytes, BinaryIO]) -> PdfReader:
+        """
+        Validate a PDF and open a reader on it.
+
+        Args:
+            source: Raw bytes or a seekable binary file handle
+
+        Returns:
+            PdfReader over a non-empty, unencrypted PDF
+
+        Raises:
+            ValueError: If file is invalid, too large, encrypted or empty
+        """
+        if isinstance(source, (bytes, bytearray)):
+            pdf_stream = io.BytesIO(source)
+            file_size = len(source)
+        else:
+            pdf_stream = source
+            file_size = pdf_stream.seek(0, io.SEEK_END)
+            pdf_stream.seek(0)
+
         # Validate file size
-        file_size = len(file_bytes)
         if file_size > self.max_file_size_bytes:
             max_mb = self.max_file_size_bytes / (1024 * 1024)
             raise ValueError(
@@ -64,8 +99,6 @@ class PDFService:
             raise ValueError("File is too small to be a valid PDF")
 
         try:
-            # Create PDF reader from bytes
-            pdf_stream = io.BytesIO(file_bytes)
             reader = PdfReader(pdf_stream)
 
             # Check if PDF is encrypted
@@ -73,60 +106,82 @@ class PDFService:
                 raise ValueError("PDF is password protected and cannot be processed")
 
             # Get number of pages
-            num_pages = len(reader.pages)
-            if num_pages == 0:
+            if len(reader.pages) == 0:
                 raise ValueError("PDF has no pages")
 
-            logger.info(f"Processing PDF with {num_pages} pages")
+            return reader
 
-            # Limit pages if specified
-            pages_to_process = min(num_pages, max_pages) if max_pages else num_pages
+        except PdfReadError as e:
+            logger.error(f"PDF read error: {e}")
+            raise ValueError(f"Invalid or corrupted PDF file: {str(e)}")
 
-            # Extract text from each page
-            extracted_text = []
-            pages_with_text = 0
+    def extract_page_texts(self, reader: PdfReader, start: int, end: int) -> List[Optional[str]]:
+        """
+        Extract the text of pages [start, end).
 
-            for page_num in range(pages_to_process):
-                try:
-                    page = reader.pages[page_num]
-                    text = page.extract_text()
+        Pages that fail or contain no text yield None instead of aborting
+        the document.
 
-                    if text and text.strip():
-                        extracted_text.append(text)
-                        pages_with_text += 1
-                    else:
-                        logger.warning(f"Page {page_num + 1} contains no extractable text")
+        Args:
+            reader: Reader from open_reader()
+            start: First page index (0-based)
+            end: Page index to stop before
 
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
-                    continue
+        Returns:
+            One entry per page in the range
+        """
+        page_texts = []
+        for page_num in range(start, min(end, len(reader.pages))):
+            try:
+                text = reader.pages[page_num].extract_text()
 
-            # Combine all text
-            full_text = "\n\n".join(extracted_text)
+                if text and text.strip():
+                    page_texts.append(text)
+                else:
+                    logger.warning(f"Page {page_num + 1} contains no extractable text")
+                    page_texts.append(None)
 
-            if not full_text.strip():
-                raise ValueError(
-                    "No text could be extracted from the PDF. "
-                    "It may be scanned images or use unsupported encoding."
-                )
+            except Exception as e:
+                logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+                page_texts.append(None)
 
-            # Clean up text
-            full_text = self._clean_text(full_text)
+        return page_texts
 
-            logger.info(
-                f"Successfully extracted text from {pages_with_text}/{pages_to_process} pages "
-                f"({len(full_text)} characters, ~{len(full_text.split())} words)"
-            )
+    def assemble_text(self, page_texts: List[Optional[str]]) -> str:
+        """
+        Join per-page texts (in page order) into the cleaned document text.
 
-            return full_text
+        Raises:
+            ValueError: If no page contained text
+        """
+        return self.assemble_pages(page_texts).text
 
-        except PdfReadError as e:
-            logger.error(f"PDF read error: {e}")
-            raise ValueError(f"Invalid or corrupted PDF file: {str(e)}")
+    def assemble_pages(self, page_texts: List[Optional[str]]) -> NormalizedText:
+        """
+        Join per-page texts into the normalized document text, keeping page boundaries.
+
+        Normalization, word count and paragraph/page offsets are computed
+        in a single pass (see TextNormalizer.normalize_pages).
+
+        Returns:
+            NormalizedText with one page offset per page plus the end
+
+        Raises:
+            ValueError: If no page contained text
+        """
+        document = text_normalizer.normalize_pages(page_texts)
+        if not document.text:
+            raise ValueError(
+                "No text could be extracted from the PDF. "
+                "It may be scanned images or use unsupported encoding."
+            )
 
-        except Exception as e:
-            logger.error(f"Error processing PDF: {e}")
-            raise
+        logger.info(
+            f"Successfully extracted text from {sum(1 for text in page_texts if text)}/{len(page_texts)} pages "
+            f"({document.char_count} characters, ~{document.word_count} words)"
+        )
+
+        return document
 
     def _clean_text(self, text: str) -> str:
         """
@@ -140,59 +195,32 @@ class PDFService:
         """
         if not text:
             return ""
-
-        # Remove null bytes
-        text = text.replace('\x00', '')
-
-        # Normalize whitespace
-        lines = []
-        for line in text.split('\n'):
-            line = line.strip()
-            if line:
-                lines.append(line)
-
-        # Join lines with proper spacing
-        text = '\n'.join(lines)
-
-        # Remove excessive newlines (more than 2)
-        while '\n\n\n' in text:
-            text = text.replace('\n\n\n', '\n\n')
-
-        return text.strip()
+        return text_normalizer.normalize(text).text
 
     def chunk_text(
         self,
         text: str,
-        chunk_size_words: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None
     ) -> List[str]:
         """
         Split text into chunks if it's too long.
 
-        Useful for processing very large documents that exceed token limits.
+        Chunks are sized by estimated tokens and cut on paragraph/sentence
+        boundaries (see text_chunker.iter_chunks, which yields them lazily).
 
         Args:
             text: Text to chunk
-            chunk_size_words: Words per chunk (default: 10000)
+            max_tokens: Estimated tokens per chunk (default: chunk_token_budget())
+            overlap_tokens: Tokens repeated between consecutive chunks
 
         Returns:
             List of text chunks
         """
-        chunk_size = chunk_size_words or self.chunk_size_words
+        chunks = [chunk.text for chunk in iter_chunks(text, max_tokens, overlap_tokens)]
 
-        words = text.split()
-        total_words = len(words)
-
-        if total_words <= chunk_size:
-            return [text]
-
-        # Split into chunks
-        chunks = []
-        for i in range(0, total_words, chunk_size):
-            chunk_words = words[i:i + chunk_size]
-            chunk_text = ' '.join(chunk_words)
-            chunks.append(chunk_text)
-
-        logger.info(f"Split text into {len(chunks)} chunks of ~{chunk_size} words each")
+        if len(chunks) > 1:
+            logger.info(f"Split text into {len(chunks)} chunks")
         return chunks
 
     def get_text_stats(self, text: str) -> dict:
@@ -205,18 +233,7 @@ class PDFService:
         Returns:
             Dictionary with stats: word_count, char_count, estimated_reading_time_minutes
         """
-        words = text.split()
-        word_count = len(words)
-        char_count = len(text)
-
-        # Estimate reading time (average 200-250 words per minute)
-        reading_time = max(1, word_count // 225)
-
-        return {
-            'word_count': word_count,
-            'char_count': char_count,
-            'estimated_reading_time_minutes': reading_time
-        }
+        return NormalizedText(text=text, word_count=len(text.split()), paragraph_offsets=[]).stats()
 
 
 # Singleton instance
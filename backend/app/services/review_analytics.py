@@ -0,0 +1,284 @@
+"""
+Review log analytics engine.
+
+Streams a user's review history (hot Postgres partitions plus archived
+months) into columnar NumPy arrays and computes, fully vectorized:
+- True retention per interval bucket (recalled = any rating but Again)
+- Rating distribution per week
+- Lapse rate of cards in the review phase
+- Time-per-card percentiles
+
+Results are cached per user until a new review arrives.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Hashable, Optional, Tuple
+import logging
+import threading
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.card_review import CardReview
+from app.services.review_partitions import iter_archived_reviews
+
+logger = logging.getLogger(__name__)
+
+# Lower edges (in days) of the interval buckets used for retention
+INTERVAL_BUCKET_EDGES = (0, 1, 2, 4, 8, 15, 31, 91, 181)
+SECONDS_PER_WEEK = 7 * 24 * 3600
+TIME_PERCENTILES = (50, 75, 90, 95)
+
+
+@dataclass
+class ReviewColumns:
+    """
+    A user's reviews as parallel column arrays.
+
+    previous_interval and time_spent use -1 for missing values;
+    reviewed_at is seconds since the Unix epoch (UTC).
+    """
+    rating: np.ndarray
+    previous_interval: np.ndarray
+    time_spent: np.ndarray
+    reviewed_at: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "ReviewColumns":
+        return cls(
+            rating=np.empty(0, dtype=np.int8),
+            previous_interval=np.empty(0, dtype=np.int32),
+            time_spent=np.empty(0, dtype=np.int32),
+            reviewed_at=np.empty(0, dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rating)
+
+
+def _bucket_label(index: int) -> str:
+    low = INTERVAL_BUCKET_EDGES[index]
+    if index + 1 == len(INTERVAL_BUCKET_EDGES):
+        return f"{low}d+"
+    high = INTERVAL_BUCKET_EDGES[index + 1] - 1
+    return f"{low}d" if low == high else f"{low}-{high}d"
+
+
+def load_review_columns(
+    db: Session,
+    user_id: uuid.UUID,
+    include_archived: bool = True,
+    batch_size: int = 100000
+) -> ReviewColumns:
+    """
+    Stream all reviews of a user into column arrays.
+
+    Only the four needed columns are selected and rows are fetched in
+    batches with a server-side cursor, each batch converted to a NumPy
+    block in one call.
+
+    Args:
+        db: Database session
+        user_id: User whose reviews to load
+        include_archived: Also read archived (dropped) monthly partitions
+        batch_size: Rows fetched per round trip
+
+    Returns:
+        ReviewColumns with every review of the user
+    """
+    blocks = []
+
+    result = db.execute(
+        select(
+            CardReview.rating,
+            func.coalesce(CardReview.previous_interval_days, -1),
+            func.coalesce(CardReview.time_spent_seconds, -1),
+            func.extract("epoch", CardReview.reviewed_at),
+        ).where(
+            CardReview.user_id == user_id
+        ).execution_options(yield_per=batch_size)
+    )
+
+    for batch in result.partitions():
+        blocks.append(np.array(batch, dtype=np.float64).reshape(-1, 4))
+
+    if include_archived:
+        for archived in iter_archived_reviews(
+            user_id=user_id,
+            columns=["rating", "previous_interval_days", "time_spent_seconds", "reviewed_at"]
+        ):
+            epoch = archived["reviewed_at"].astype("datetime64[us]").astype(np.int64) / 1e6
+            blocks.append(np.column_stack([
+                archived["rating"],
+                archived["previous_interval_days"],
+                archived["time_spent_seconds"],
+                epoch,
+            ]).astype(np.float64))
+
+    if not blocks:
+        return ReviewColumns.empty()
+
+    data = np.concatenate(blocks)
+    return ReviewColumns(
+        rating=data[:, 0].astype(np.int8),
+        previous_interval=data[:, 1].astype(np.int32),
+        time_spent=data[:, 2].astype(np.int32),
+        reviewed_at=data[:, 3],
+    )
+
+
+def compute_review_analytics(
+    columns: ReviewColumns,
+    weeks: int = 12,
+    now: Optional[datetime] = None
+) -> dict:
+    """
+    Compute review analytics from column arrays.
+
+    Args:
+        columns: Review columns from load_review_columns()
+        weeks: Number of trailing weeks in the rating distribution
+        now: Reference time (default: current UTC time)
+
+    Returns:
+        Dictionary matching the ReviewAnalytics schema
+    """
+    now = now or datetime.now(timezone.utc)
+    now_epoch = now.timestamp()
+    rating = columns.rating.astype(np.int64)
+    recalled = rating >= 2
+
+    # Retention per interval bucket (reviews with a known previous interval)
+    known = columns.previous_interval >= 0
+    bucket_index = np.searchsorted(INTERVAL_BUCKET_EDGES, columns.previous_interval[known], side="right") - 1
+    bucket_reviews = np.bincount(bucket_index, minlength=len(INTERVAL_BUCKET_EDGES))
+    bucket_recalled = np.bincount(bucket_index, weights=recalled[known], minlength=len(INTERVAL_BUCKET_EDGES))
+
+    retention_by_interval = []
+    for i, low in enumerate(INTERVAL_BUCKET_EDGES):
+        count = int(bucket_reviews[i])
+        retention_by_interval.append({
+            "label": _bucket_label(i),
+            "min_interval_days": low,
+            "max_interval_days": INTERVAL_BUCKET_EDGES[i + 1] - 1 if i + 1 < len(INTERVAL_BUCKET_EDGES) else None,
+            "reviews": count,
+            "recalled": int(bucket_recalled[i]),
+            "retention": round(float(bucket_recalled[i]) / count, 4) if count else None,
+        })
+
+    # True retention and lapse rate over reviews in the review phase
+    review_phase = columns.previous_interval >= 1
+    review_phase_count = int(review_phase.sum())
+    if review_phase_count:
+        true_retention = round(float(recalled[review_phase].mean()), 4)
+        lapse_rate = round(float((rating[review_phase] == 1).mean()), 4)
+    else:
+        true_retention = None
+        lapse_rate = None
+
+    # Weekly rating distribution, oldest week first
+    week_ago = ((now_epoch - columns.reviewed_at) // SECONDS_PER_WEEK).astype(np.int64)
+    in_window = (week_ago >= 0) & (week_ago < weeks)
+    slot = (weeks - 1 - week_ago[in_window]) * 4 + (rating[in_window] - 1)
+    counts = np.bincount(slot, minlength=weeks * 4).reshape(weeks, 4)
+
+    today = now.date()
+    rating_distribution = [
+        {
+            "week_start": today - timedelta(days=7 * (weeks - i) - 1),
+            "again": int(counts[i, 0]),
+            "hard": int(counts[i, 1]),
+            "good": int(counts[i, 2]),
+            "easy": int(counts[i, 3]),
+        }
+        for i in range(weeks)
+    ]
+
+    # Time per card
+    timed = columns.time_spent[columns.time_spent >= 0]
+    if len(timed):
+        values = np.percentile(timed, TIME_PERCENTILES)
+        time_per_card = {f"p{p}": round(float(v), 1) for p, v in zip(TIME_PERCENTILES, values)}
+        time_per_card["mean"] = round(float(timed.mean()), 1)
+    else:
+        time_per_card = None
+
+    return {
+        "total_reviews": len(columns),
+        "true_retention": true_retention,
+        "lapse_rate": lapse_rate,
+        "retention_by_interval": retention_by_interval,
+        "rating_distribution": rating_distribution,
+        "time_per_card_seconds": time_per_card,
+        "generated_at": now,
+    }
+
+
+class AnalyticsCache:
+    """
+    Small thread-safe LRU cache of analytics results.
+
+    Each entry stores the fingerprint it was computed for; a lookup with a
+    different fingerprint (e.g. a newer last review) is a miss.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fingerprint: Hashable) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, fingerprint: Hashable, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = (fingerprint, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+analytics_cache = AnalyticsCache()
+
+
+def get_review_analytics(db: Session, user_id: uuid.UUID, weeks: int = 12) -> dict:
+    """
+    Get analytics for a user, recomputing only when new reviews exist.
+
+    The fingerprint is the user's latest reviewed_at (an index-only lookup)
+    plus today's date, since weekly buckets shift with the calendar.
+    """
+    last_review = db.query(func.max(CardReview.reviewed_at)).filter(
+        CardReview.user_id == user_id
+    ).scalar()
+    fingerprint = (last_review, date.today())
+    key = (user_id, weeks)
+
+    cached = analytics_cache.get(key, fingerprint)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    columns = load_review_columns(db, user_id)
+    result = compute_review_analytics(columns, weeks=weeks)
+    logger.info(
+        f"Computed review analytics for user {user_id}: {len(columns)} reviews "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+
+    analytics_cache.put(key, fingerprint, result)
+    return result
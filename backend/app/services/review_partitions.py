@@ -0,0 +1,367 @@
+"""
+Review log partition maintenance and archival tiering.
+
+card_reviews is range-partitioned by month on reviewed_at. This module:
+- Creates upcoming monthly partitions ahead of time
+- Archives partitions older than the hot window to compressed columnar
+  files (NumPy .npz) on local disk and drops them from Postgres
+- Reads archived partitions back as column arrays for analytics
+
+Run periodically (e.g. daily from cron):
+    python -m app.services.review_partitions ensure
+    python -m app.services.review_partitions archive
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+import logging
+import os
+import re
+import uuid
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "card_reviews"
+DEFAULT_PARTITION = "card_reviews_default"
+PARTITION_NAME_RE = re.compile(r"^card_reviews_(\d{4})_(\d{2})$")
+
+# Column order used for both the SELECT when archiving and the archive file
+ARCHIVE_COLUMNS = (
+    "id",
+    "card_id",
+    "user_id",
+    "rating",
+    "previous_interval_days",
+    "new_interval_days",
+    "previous_ease_factor",
+    "new_ease_factor",
+    "time_spent_seconds",
+    "due_date",
+    "session_id",
+    "reviewed_at",
+)
+
+# Null markers for columns that cannot hold NaN/NaT natively
+NULL_INT = -1
+NULL_UUID = b"\x00" * 16
+
+
+def month_start(value: date) -> date:
+    """Return the first day of the month containing value."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Return the first day of the month `months` after value's month."""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding reviews for the given month."""
+    return f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def parse_partition_month(name: str) -> Optional[date]:
+    """Inverse of partition_name(); None for non-monthly partitions."""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def list_partitions(db: Session) -> List[str]:
+    """List the partitions currently attached to card_reviews."""
+    rows = db.execute(text(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+        ORDER BY child.relname
+        """
+    ), {"parent": PARENT_TABLE}).all()
+    return [row[0] for row in rows]
+
+
+def ensure_future_partitions(
+    db: Session,
+    months_ahead: Optional[int] = None,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Create monthly partitions from the current month up to `months_ahead`
+    months in the future, plus the default partition.
+
+    Args:
+        db: Database session
+        months_ahead: Future months to create (default: REVIEW_PARTITION_MONTHS_AHEAD)
+        today: Reference date (default: today)
+
+    Returns:
+        Names of the partitions that were created
+    """
+    months_ahead = settings.REVIEW_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or date.today())
+    existing = set(list_partitions(db))
+    created = []
+
+    for offset in range(months_ahead + 1):
+        lower = add_months(current, offset)
+        name = partition_name(lower)
+        if name in existing:
+            continue
+
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{add_months(lower, 1).isoformat()}')"
+        ))
+        created.append(name)
+
+    if DEFAULT_PARTITION not in existing:
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+        ))
+        created.append(DEFAULT_PARTITION)
+
+    db.commit()
+
+    if created:
+        logger.info(f"Created card_reviews partitions: {', '.join(created)}")
+
+    return created
+
+
+# ============ Archive format ============
+
+def _uuid_bytes(value) -> bytes:
+    if value is None:
+        return NULL_UUID
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    return uuid.UUID(str(value)).bytes
+
+
+def uuid_from_bytes(value: bytes) -> Optional[uuid.UUID]:
+    """Convert an archived UUID cell back to a UUID (None for the null marker)."""
+    # NumPy strips trailing NUL bytes from fixed-width byte strings
+    value = value.ljust(16, b"\x00")
+    return None if value == NULL_UUID else uuid.UUID(bytes=value)
+
+
+def _to_utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def rows_to_columns(rows: Sequence[Sequence]) -> Dict[str, np.ndarray]:
+    """
+    Convert review rows (in ARCHIVE_COLUMNS order) to typed column arrays.
+
+    UUIDs are stored as 16-byte strings, missing integers as -1, missing
+    floats as NaN and missing dates as NaT. Timestamps are UTC microseconds.
+    """
+    n = len(rows)
+    columns = {
+        "id": np.empty(n, dtype="S16"),
+        "card_id": np.empty(n, dtype="S16"),
+        "user_id": np.empty(n, dtype="S16"),
+        "rating": np.empty(n, dtype=np.int8),
+        "previous_interval_days": np.empty(n, dtype=np.int32),
+        "new_interval_days": np.empty(n, dtype=np.int32),
+        "previous_ease_factor": np.empty(n, dtype=np.float32),
+        "new_ease_factor": np.empty(n, dtype=np.float32),
+        "time_spent_seconds": np.empty(n, dtype=np.int32),
+        "due_date": np.empty(n, dtype="datetime64[D]"),
+        "session_id": np.empty(n, dtype="S16"),
+        "reviewed_at": np.empty(n, dtype="datetime64[us]"),
+    }
+
+    for i, row in enumerate(rows):
+        (review_id, card_id, user_id, rating, prev_interval, new_interval,
+         prev_ease, new_ease, time_spent, due, session_id, reviewed_at) = row
+
+        columns["id"][i] = _uuid_bytes(review_id)
+        columns["card_id"][i] = _uuid_bytes(card_id)
+        columns["user_id"][i] = _uuid_bytes(user_id)
+        columns["rating"][i] = rating
+        columns["previous_interval_days"][i] = NULL_INT if prev_interval is None else prev_interval
+        columns["new_interval_days"][i] = NULL_INT if new_interval is None else new_interval
+        columns["previous_ease_factor"][i] = np.nan if prev_ease is None else prev_ease
+        columns["new_ease_factor"][i] = np.nan if new_ease is None else new_ease
+        columns["time_spent_seconds"][i] = NULL_INT if time_spent is None else time_spent
+        columns["due_date"][i] = np.datetime64("NaT") if due is None else np.datetime64(due, "D")
+        columns["session_id"][i] = _uuid_bytes(session_id)
+        columns["reviewed_at"][i] = np.datetime64(_to_utc_naive(reviewed_at), "us")
+
+    return columns
+
+
+def write_archive(path: Path, columns: Dict[str, np.ndarray]) -> Path:
+    """
+    Write column arrays to a compressed .npz archive atomically.
+
+    The file is written under a temporary name and renamed into place so a
+    crash never leaves a truncated archive behind.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp.npz")
+
+    np.savez_compressed(tmp_path, **columns)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def read_archive(path: Path, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Read an archive written by write_archive(), optionally only some columns."""
+    wanted = list(columns) if columns else list(ARCHIVE_COLUMNS)
+    with np.load(path) as archive:
+        return {name: archive[name] for name in wanted}
+
+
+def archive_path(month: date, archive_dir: Optional[str] = None) -> Path:
+    """Location of the archive file for a month."""
+    base = Path(archive_dir or settings.REVIEW_ARCHIVE_DIR)
+    return base / f"{partition_name(month)}.npz"
+
+
+def iter_archived_reviews(
+    user_id: Optional[uuid.UUID] = None,
+    since: Optional[date] = None,
+    columns: Optional[Iterable[str]] = None,
+    archive_dir: Optional[str] = None
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield archived reviews month by month as column arrays.
+
+    Args:
+        user_id: Only return reviews for this user
+        since: Skip archives for months entirely before this date
+        columns: Columns to return (user_id is always read for filtering)
+        archive_dir: Archive directory (default: REVIEW_ARCHIVE_DIR)
+
+    Yields:
+        Dict of column name -> array for each archived month with matches
+    """
+    base = Path(archive_dir or settings.REVIEW_ARCHIVE_DIR)
+    if not base.is_dir():
+        return
+
+    wanted = list(columns) if columns else list(ARCHIVE_COLUMNS)
+    read_columns = list(dict.fromkeys(wanted + ["user_id"]))
+    user_key = user_id.bytes if isinstance(user_id, uuid.UUID) else (
+        uuid.UUID(str(user_id)).bytes if user_id else None
+    )
+
+    for path in sorted(base.glob(f"{PARENT_TABLE}_*.npz")):
+        month = parse_partition_month(path.name[:-len(".npz")])
+        if month is None:
+            continue
+        if since and add_months(month, 1) <= month_start(since):
+            continue
+
+        data = read_archive(path, read_columns)
+        if user_key is not None:
+            mask = data["user_id"] == user_key
+            if not mask.any():
+                continue
+            data = {name: values[mask] for name, values in data.items()}
+
+        yield {name: data[name] for name in wanted}
+
+
+# ============ Archival job ============
+
+@dataclass
+class ArchiveResult:
+    """Outcome of archiving one partition."""
+    partition: str
+    rows: int
+    path: str
+
+
+def archive_old_partitions(
+    db: Session,
+    hot_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    today: Optional[date] = None,
+    batch_size: int = 50000
+) -> List[ArchiveResult]:
+    """
+    Move monthly partitions older than the hot window to local archives.
+
+    Each partition is streamed into column arrays and written to disk; it is
+    detached and dropped only once the archive file is safely in place.
+    Past months receive no new reviews, so nothing is lost in between.
+
+    Args:
+        db: Database session
+        hot_months: Months to keep in Postgres (default: REVIEW_HOT_MONTHS)
+        archive_dir: Archive directory (default: REVIEW_ARCHIVE_DIR)
+        today: Reference date (default: today)
+        batch_size: Rows fetched per round trip while streaming
+
+    Returns:
+        One ArchiveResult per archived partition
+    """
+    hot_months = settings.REVIEW_HOT_MONTHS if hot_months is None else hot_months
+    cutoff = add_months(month_start(today or date.today()), -hot_months)
+    results = []
+
+    for name in list_partitions(db):
+        month = parse_partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+
+        result = db.execute(
+            text(f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {name} ORDER BY reviewed_at"),
+            execution_options={"yield_per": batch_size}
+        )
+        chunks = [rows_to_columns(batch) for batch in result.partitions()]
+        if chunks:
+            columns = {
+                column: np.concatenate([chunk[column] for chunk in chunks])
+                for column in ARCHIVE_COLUMNS
+            }
+        else:
+            columns = rows_to_columns([])
+
+        path = write_archive(archive_path(month, archive_dir), columns)
+        row_count = len(columns["id"])
+
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+
+        logger.info(f"Archived partition {name} ({row_count} rows) to {path}")
+        results.append(ArchiveResult(partition=name, rows=row_count, path=str(path)))
+
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    from app.utils.database import get_db_context
+
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+
+    with get_db_context() as db:
+        if command == "ensure":
+            ensure_future_partitions(db)
+        elif command == "archive":
+            archive_old_partitions(db)
+        else:
+            raise SystemExit(f"Unknown command: {command} (expected 'ensure' or 'archive')")
@@ -0,0 +1,248 @@
+"""
+Full-text search over a user's flashcards and materials.
+
+Both are matched against stored, generated tsvector columns (Spanish text
+search configuration, GIN-indexed; see the search_vector columns of
+Flashcard, MaterialContent and StudyMaterial):
+- flashcards: question (weight A), answer (B) and explanation (C)
+- materials: the shared content text, or the legacy inline text
+
+A page is found with one query over both kinds, ranked by ts_rank and
+keyset-paginated on (rank, kind, id); highlighted snippets (ts_headline,
+which re-parses the text) are then computed only for the rows of that page.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+import uuid
+
+from sqlalchemy import Float, Select, and_, cast, func, literal, literal_column, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from app.models.flashcard import Flashcard
+from app.models.material_content import MaterialContent
+from app.models.study_material import StudyMaterial
+from app.utils.cursors import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration; must match the generated search_vector columns
+SEARCH_CONFIG = "spanish"
+
+SEARCH_KINDS = ("flashcard", "material")
+
+# ts_rank normalization: divide by 1 + log(document length), then map to
+# rank / (rank + 1), so short cards and long materials rank on one scale
+RANK_NORMALIZATION = 1 | 32
+
+# ts_rank returns real (float4); ranks are compared and paged as double
+# precision, the type of the float decoded from a cursor, so that the
+# keyset position of the last row compares equal to the row itself
+RANK_TYPE = Float(53)
+
+# ts_headline parses the text again: only the start of long materials is used
+HEADLINE_MAX_CHARS = 50000
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=2, FragmentDelimiter=" … "'
+
+_CONFIG = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+
+@dataclass
+class SearchHit:
+    """One search result."""
+    kind: str  # flashcard, material
+    id: uuid.UUID
+    rank: float
+    title: str  # Question of a flashcard, filename of a material
+    snippet: str  # Matching fragments, terms wrapped in <mark></mark>
+    material_id: Optional[uuid.UUID]  # Source material of a flashcard (the material itself for materials)
+
+
+@dataclass
+class SearchPage:
+    hits: List[SearchHit]
+    next_cursor: Optional[str]
+
+
+class SearchService:
+    """Ranked, highlighted full-text search."""
+
+    def search(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        text: str,
+        kinds: Sequence[str] = SEARCH_KINDS,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> SearchPage:
+        """
+        Search the user's active flashcards and completed materials.
+
+        Args:
+            db: Database session
+            user_id: Owner of the results
+            text: Search terms (web search syntax: "phrase", or, -exclude)
+            kinds: Kinds of results to include
+            limit: Results per page
+            cursor: next_cursor of the previous page
+
+        Returns:
+            SearchPage ordered by rank (best first)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        after = _decode_position(cursor) if cursor else None
+
+        rows = db.execute(self.page_query(user_id, text, kinds, after).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        details = self._load_details(db, text, rows)
+        hits = [
+            SearchHit(kind=row.kind, id=row.id, rank=row.rank, **details[(row.kind, row.id)])
+            for row in rows
+            if (row.kind, row.id) in details
+        ]
+
+        return SearchPage(hits=hits, next_cursor=_encode_position(rows[-1]) if has_more else None)
+
+    def page_query(
+        self,
+        user_id: uuid.UUID,
+        text: str,
+        kinds: Sequence[str] = SEARCH_KINDS,
+        after: Optional[Tuple[float, str, uuid.UUID]] = None
+    ) -> Select:
+        """
+        Matching (kind, id, rank) rows in result order, starting after the
+        keyset position `after`.
+        """
+        query = _tsquery(text)
+        branches = []
+
+        if "flashcard" in kinds:
+            branches.append(
+                select(
+                    literal("flashcard").label("kind"),
+                    Flashcard.id.label("id"),
+                    cast(func.ts_rank(Flashcard.search_vector, query, RANK_NORMALIZATION), RANK_TYPE).label("rank"),
+                ).where(
+                    Flashcard.user_id == user_id,
+                    Flashcard.status == "active",
+                    Flashcard.deleted_at.is_(None),
+                    Flashcard.search_vector.bool_op("@@")(query)
+                )
+            )
+
+        if "material" in kinds:
+            vector = func.coalesce(MaterialContent.search_vector, StudyMaterial.search_vector)
+            branches.append(
+                select(
+                    literal("material").label("kind"),
+                    StudyMaterial.id.label("id"),
+                    cast(func.ts_rank(vector, query, RANK_NORMALIZATION), RANK_TYPE).label("rank"),
+                ).outerjoin(
+                    MaterialContent, MaterialContent.content_hash == StudyMaterial.content_hash
+                ).where(
+                    StudyMaterial.user_id == user_id,
+                    StudyMaterial.status == "completed",
+                    StudyMaterial.deleted_at.is_(None),
+                    or_(
+                        MaterialContent.search_vector.bool_op("@@")(query),
+                        StudyMaterial.search_vector.bool_op("@@")(query)
+                    )
+                )
+            )
+
+        if not branches:
+            raise ValueError(f"No searchable kinds in {kinds!r}")
+
+        ranked = (branches[0] if len(branches) == 1 else union_all(*branches)).subquery("ranked")
+        page = select(ranked.c.kind, ranked.c.id, ranked.c.rank)
+
+        if after is not None:
+            rank, kind, item_id = after
+            rank = literal(rank, RANK_TYPE)
+            page = page.where(or_(
+                ranked.c.rank < rank,
+                and_(ranked.c.rank == rank, tuple_(ranked.c.kind, ranked.c.id) > tuple_(kind, item_id))
+            ))
+
+        return page.order_by(ranked.c.rank.desc(), ranked.c.kind, ranked.c.id)
+
+    def _load_details(self, db: Session, text: str, rows) -> Dict[Tuple[str, uuid.UUID], dict]:
+        """Titles and highlighted snippets of one page of results (one query per kind)."""
+        query = _tsquery(text)
+        details = {}
+
+        card_ids = [row.id for row in rows if row.kind == "flashcard"]
+        if card_ids:
+            document = func.concat_ws(" — ", Flashcard.question, Flashcard.answer, Flashcard.explanation)
+            for card in db.execute(
+                select(
+                    Flashcard.id,
+                    Flashcard.question,
+                    Flashcard.material_id,
+                    func.ts_headline(_CONFIG, document, query, HEADLINE_OPTIONS).label("snippet"),
+                ).where(Flashcard.id.in_(card_ids))
+            ):
+                details[("flashcard", card.id)] = {
+                    "title": card.question,
+                    "snippet": card.snippet,
+                    "material_id": card.material_id,
+                }
+
+        material_ids = [row.id for row in rows if row.kind == "material"]
+        if material_ids:
+            document = func.left(
+                func.coalesce(MaterialContent.extracted_text, StudyMaterial.inline_text, ""),
+                HEADLINE_MAX_CHARS
+            )
+            for material in db.execute(
+                select(
+                    StudyMaterial.id,
+                    StudyMaterial.filename,
+                    func.ts_headline(_CONFIG, document, query, HEADLINE_OPTIONS).label("snippet"),
+                ).outerjoin(
+                    MaterialContent, MaterialContent.content_hash == StudyMaterial.content_hash
+                ).where(StudyMaterial.id.in_(material_ids))
+            ):
+                details[("material", material.id)] = {
+                    "title": material.filename,
+                    "snippet": material.snippet,
+                    "material_id": material.id,
+                }
+
+        return details
+
+
+def _tsquery(text: str):
+    """Parse search terms with web search syntax (never raises on bad input)."""
+    return func.websearch_to_tsquery(_CONFIG, text)
+
+
+def _encode_position(row) -> str:
+    return encode_cursor(row.rank, row.kind, str(row.id))
+
+
+def _decode_position(cursor: str) -> Tuple[float, str, uuid.UUID]:
+    """
+    Keyset position (rank, kind, id) from a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    rank, kind, item_id = decode_cursor(cursor, 3)
+    if not isinstance(rank, (int, float)) or kind not in SEARCH_KINDS:
+        raise ValueError("Malformed cursor")
+    try:
+        return float(rank), kind, uuid.UUID(item_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+# Singleton instance
+search_service = SearchService()
@@ -0,0 +1,202 @@
+"""
+UserStats rollup job.
+
+Recomputes the denormalized mastery breakdown and performance fields of
+user_stats set-wise: users are processed in id-ordered batches, each batch
+answered by one grouped card_stats aggregate (plus one grouped
+study_sessions aggregate) and written back with a bulk UPDATE.
+
+Between runs the review path keeps the breakdown current with
+apply_mastery_delta().
+
+Run periodically (e.g. nightly from cron):
+    python -m app.services.stats_rollup
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence
+import logging
+import uuid
+
+from sqlalchemy import and_, case, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.card_stats import CardStats
+from app.models.flashcard import Flashcard
+from app.models.study_session import StudySession
+from app.models.user import User
+from app.models.user_stats import UserStats
+
+logger = logging.getLogger(__name__)
+
+# mastery_level value -> UserStats column
+MASTERY_COLUMNS = {
+    "new": "cards_new",
+    "learning": "cards_learning",
+    "young": "cards_young",
+    "mature": "cards_mature",
+    "mastered": "cards_mastered",
+}
+
+
+def apply_mastery_delta(user_stats: UserStats, old_level: Optional[str], new_level: Optional[str]) -> None:
+    """
+    Move one card between mastery buckets of a UserStats row.
+
+    Pass old_level=None for a card entering the counts (created) and
+    new_level=None for a card leaving them (deleted).
+    """
+    if old_level == new_level:
+        return
+
+    if old_level in MASTERY_COLUMNS:
+        column = MASTERY_COLUMNS[old_level]
+        setattr(user_stats, column, max(0, (getattr(user_stats, column) or 0) - 1))
+
+    if new_level in MASTERY_COLUMNS:
+        column = MASTERY_COLUMNS[new_level]
+        setattr(user_stats, column, (getattr(user_stats, column) or 0) + 1)
+
+
+def _count_level(level: str):
+    return func.sum(case((CardStats.mastery_level == level, 1), else_=0))
+
+
+def compute_stats_rollup(db: Session, user_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, dict]:
+    """
+    Compute mastery breakdown and performance fields for a batch of users.
+
+    Args:
+        db: Database session
+        user_ids: Users in the batch
+
+    Returns:
+        user_id -> dict of UserStats column values (zeros for users without cards)
+    """
+    values = {
+        user_id: {
+            **{column: 0 for column in MASTERY_COLUMNS.values()},
+            "average_accuracy": None,
+            "average_daily_cards": None,
+        }
+        for user_id in user_ids
+    }
+    if not user_ids:
+        return values
+
+    # One grouped aggregate over card_stats of active cards
+    card_rows = db.execute(
+        select(
+            CardStats.user_id,
+            *[_count_level(level).label(column) for level, column in MASTERY_COLUMNS.items()],
+            func.sum(CardStats.successful_reviews).label("successful"),
+            func.sum(CardStats.total_reviews).label("total"),
+        ).join(
+            Flashcard,
+            and_(
+                Flashcard.id == CardStats.card_id,
+                Flashcard.status == "active",
+                Flashcard.deleted_at.is_(None)
+            )
+        ).where(
+            CardStats.user_id.in_(user_ids)
+        ).group_by(CardStats.user_id)
+    ).mappings().all()
+
+    for row in card_rows:
+        entry = values[row["user_id"]]
+        for column in MASTERY_COLUMNS.values():
+            entry[column] = int(row[column] or 0)
+        if row["total"]:
+            # % of reviews rated Good or Easy
+            entry["average_accuracy"] = round(100.0 * (row["successful"] or 0) / row["total"], 1)
+
+    # Average cards per day over days with any study
+    session_rows = db.execute(
+        select(
+            StudySession.user_id,
+            func.sum(StudySession.cards_studied).label("cards"),
+            func.count().label("days"),
+        ).where(
+            StudySession.user_id.in_(user_ids),
+            StudySession.cards_studied > 0
+        ).group_by(StudySession.user_id)
+    ).mappings().all()
+
+    for row in session_rows:
+        if row["days"]:
+            values[row["user_id"]]["average_daily_cards"] = int(round(row["cards"] / row["days"]))
+
+    return values
+
+
+def rollup_users(db: Session, user_ids: Sequence[uuid.UUID]) -> int:
+    """
+    Recompute and persist UserStats fields for a batch of users.
+
+    Existing rows are written with one bulk UPDATE; users without a
+    user_stats row get one inserted.
+
+    Returns:
+        Number of users written
+    """
+    values = compute_stats_rollup(db, user_ids)
+    if not values:
+        return 0
+
+    existing = set(db.scalars(
+        select(UserStats.user_id).where(UserStats.user_id.in_(list(values)))
+    ).all())
+
+    updates = [{"user_id": user_id, **row} for user_id, row in values.items() if user_id in existing]
+    inserts = [{"user_id": user_id, **row} for user_id, row in values.items() if user_id not in existing]
+
+    if updates:
+        db.execute(update(UserStats), updates)
+    if inserts:
+        db.execute(insert(UserStats), inserts)
+    db.commit()
+
+    return len(values)
+
+
+def iter_user_id_batches(db: Session, batch_size: int) -> Iterator[List[uuid.UUID]]:
+    """Yield active user ids in id order, batch_size at a time (keyset pagination)."""
+    last_id = None
+    while True:
+        query = select(User.id).where(User.deleted_at.is_(None)).order_by(User.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(User.id > last_id)
+
+        batch = list(db.scalars(query).all())
+        if not batch:
+            return
+
+        yield batch
+        last_id = batch[-1]
+
+
+def run_stats_rollup(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Recompute UserStats for every user.
+
+    Returns:
+        Number of users processed
+    """
+    batch_size = batch_size or settings.STATS_ROLLUP_BATCH_SIZE
+    processed = 0
+
+    for batch in iter_user_id_batches(db, batch_size):
+        processed += rollup_users(db, batch)
+        logger.info(f"UserStats rollup: {processed} users processed")
+
+    return processed
+
+
+if __name__ == "__main__":
+    from app.utils.database import get_db_context
+
+    logging.basicConfig(level=settings.LOG_LEVEL)
+
+    with get_db_context() as db:
+        run_stats_rollup(db)
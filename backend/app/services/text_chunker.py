@@ -0,0 +1,169 @@
+"""
+Token-aware chunking of material text for flashcard generation.
+
+Chunks are sized by an estimate of model tokens and cut on paragraph
+boundaries when possible, otherwise on sentence boundaries; only a single
+sentence longer than a whole chunk is split on whitespace. Consecutive
+chunks can share a few trailing sentences (overlap) so that facts spanning
+a cut are not lost.
+
+iter_chunks() is a generator over offsets into the original string:
+chunks are produced lazily, as slices, without tokenizing or copying the
+rest of the document.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, List, NamedTuple, Optional
+import math
+import re
+
+from app.config import settings
+
+# Rough characters per token for Spanish/English prose (errs on the side of more tokens)
+CHARS_PER_TOKEN = 3.5
+
+# Tokens reserved for the instructions and examples wrapped around a chunk
+PROMPT_OVERHEAD_TOKENS = 2000
+
+# End of a sentence: terminal punctuation, optional closing quotes/brackets, whitespace
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]»]*\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_token_budget() -> int:
+    """
+    Largest chunk, in tokens, to send in one generation request.
+
+    GENERATION_CHUNK_TOKENS, capped so that prompt, chunk and the response
+    (ANTHROPIC_MAX_TOKENS) fit in GENERATION_CONTEXT_TOKENS.
+    """
+    available = settings.GENERATION_CONTEXT_TOKENS - settings.ANTHROPIC_MAX_TOKENS - PROMPT_OVERHEAD_TOKENS
+    return max(1, min(settings.GENERATION_CHUNK_TOKENS, available))
+
+
+@dataclass
+class TextChunk:
+    """A contiguous slice of the source text."""
+    index: int
+    start: int  # Character offset in the source text
+    end: int
+    text: str
+
+    @property
+    def estimated_tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+class _Unit(NamedTuple):
+    start: int
+    end: int
+    ends_paragraph: bool
+
+
+def _iter_units(text: str, max_chars: int) -> Iterator[_Unit]:
+    """Yield sentence spans (each at most max_chars long) in order."""
+    length = len(text)
+    position = 0
+
+    while position < length:
+        # Next paragraph: up to the next blank line
+        paragraph_end = text.find("\n\n", position)
+        if paragraph_end == -1:
+            paragraph_end = length
+
+        start = position
+        sentences = []
+        for match in _SENTENCE_END.finditer(text, position, paragraph_end):
+            sentences.append((start, match.end()))
+            start = match.end()
+        if start < paragraph_end:
+            sentences.append((start, paragraph_end))
+
+        for i, (sentence_start, sentence_end) in enumerate(sentences):
+            last = i == len(sentences) - 1
+            # Oversized sentence: cut at the last whitespace that fits
+            while sentence_end - sentence_start > max_chars:
+                limit = sentence_start + max_chars
+                cut = max(text.rfind(" ", sentence_start + 1, limit), text.rfind("\n", sentence_start + 1, limit))
+                cut = cut + 1 if cut > sentence_start else limit
+                yield _Unit(sentence_start, cut, False)
+                sentence_start = cut
+            if sentence_end > sentence_start:
+                yield _Unit(sentence_start, sentence_end, last)
+
+        # Skip the blank line(s) separating paragraphs
+        position = paragraph_end
+        while position < length and text[position] == "\n":
+            position += 1
+
+
+def iter_chunks(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+) -> Iterator[TextChunk]:
+    """
+    Lazily split text into chunks of at most max_tokens (estimated).
+
+    Args:
+        text: Source text (normalized material text)
+        max_tokens: Token budget per chunk (default: chunk_token_budget())
+        overlap_tokens: Trailing tokens repeated at the start of the next
+            chunk, in whole sentences (default: GENERATION_CHUNK_OVERLAP_TOKENS;
+            capped at half a chunk)
+
+    Yields:
+        TextChunk in document order
+    """
+    max_tokens = max_tokens or chunk_token_budget()
+    if overlap_tokens is None:
+        overlap_tokens = settings.GENERATION_CHUNK_OVERLAP_TOKENS
+
+    max_chars = max(1, int(max_tokens * CHARS_PER_TOKEN))
+    overlap_chars = min(int(overlap_tokens * CHARS_PER_TOKEN), max_chars // 2)
+
+    units: List[_Unit] = []
+    carried = 0  # Leading units repeated from the previous chunk
+    index = 0
+
+    def make_chunk(first: _Unit, last: _Unit) -> TextChunk:
+        return TextChunk(index=index, start=first.start, end=last.end, text=text[first.start:last.end].strip())
+
+    for unit in _iter_units(text, max_chars):
+        units.append(unit)
+
+        while unit.end - units[0].start > max_chars:
+            # Largest prefix that fits, preferring to end on a paragraph if
+            # that still fills at least half the chunk
+            fits = [
+                k for k in range(carried + 1, len(units))
+                if units[k - 1].end - units[0].start <= max_chars
+            ]
+            if not fits:
+                # Overlap plus the next sentence does not fit: drop the overlap
+                units = units[carried:]
+                carried = 0
+                continue
+
+            cut = fits[-1]
+            for k in reversed(fits):
+                if units[k - 1].ends_paragraph and units[k - 1].end - units[0].start >= max_chars // 2:
+                    cut = k
+                    break
+
+            yield make_chunk(units[0], units[cut - 1])
+            index += 1
+
+            # Carry trailing sentences of this chunk into the next one
+            keep = cut
+            while keep > 0 and units[cut - 1].end - units[keep - 1].start <= overlap_chars:
+                keep -= 1
+            units = units[keep:]
+            carried = cut - keep
+
+    if len(units) > carried:
+        yield make_chunk(units[0], units[-1])
@@ -0,0 +1,124 @@
+"""
+Single-pass normalization of extracted and pasted text.
+
+One walk over the lines of the input does all of the cleanup and the
+bookkeeping that used to take several full-string passes:
+- removes null bytes
+- collapses runs of spaces/tabs inside a line and trims every line
+- drops empty lines, keeping one blank line where a paragraph break was
+- counts words and records where every paragraph (and PDF page) starts
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+WORDS_PER_MINUTE = 225  # Average reading speed (200-250 words per minute)
+
+
+@dataclass
+class NormalizedText:
+    """Normalized text plus the statistics and offsets gathered on the way."""
+    text: str
+    word_count: int
+    paragraph_offsets: List[int]  # Character offset where each paragraph starts
+    page_offsets: Optional[List[int]] = None  # See TextNormalizer.normalize_pages
+
+    @property
+    def char_count(self) -> int:
+        return len(self.text)
+
+    @property
+    def reading_time_minutes(self) -> int:
+        return max(1, self.word_count // WORDS_PER_MINUTE)
+
+    def stats(self) -> dict:
+        """Same shape as PDFService.get_text_stats."""
+        return {
+            "word_count": self.word_count,
+            "char_count": self.char_count,
+            "estimated_reading_time_minutes": self.reading_time_minutes,
+        }
+
+
+class TextNormalizer:
+    """Normalizes text for storage and generation."""
+
+    def normalize(self, text: str) -> NormalizedText:
+        """
+        Normalize a single text (e.g. pasted content).
+
+        Args:
+            text: Raw text
+
+        Returns:
+            NormalizedText (page_offsets is None)
+        """
+        document = self.normalize_pages([text])
+        document.page_offsets = None
+        return document
+
+    def normalize_pages(self, pages: Iterable[Optional[str]]) -> NormalizedText:
+        """
+        Normalize consecutive pages into one text, keeping page boundaries.
+
+        A page boundary counts as a line break; blank lines, within or
+        across pages, become a single paragraph break. Page i is
+        text[page_offsets[i]:page_offsets[i + 1]], starting with the
+        separator from the previous page; pages without text (None or
+        blank) are zero-length.
+
+        Args:
+            pages: Page texts in order; None for pages that failed
+
+        Returns:
+            NormalizedText with len(page_offsets) == number of pages + 1
+        """
+        parts: List[str] = []
+        append = parts.append
+        paragraph_offsets: List[int] = []
+        page_offsets: List[int] = []
+        position = 0
+        word_count = 0
+        paragraph_break = False
+
+        for page in pages:
+            page_offsets.append(position)
+            if not page:
+                continue
+            if "\x00" in page:
+                page = page.replace("\x00", "")
+
+            for line in page.split("\n"):
+                words = line.split()
+                if not words:
+                    paragraph_break = bool(parts)
+                    continue
+
+                if paragraph_break:
+                    append("\n\n")
+                    position += 2
+                    paragraph_offsets.append(position)
+                    paragraph_break = False
+                elif parts:
+                    append("\n")
+                    position += 1
+                else:
+                    paragraph_offsets.append(0)
+
+                line = " ".join(words)
+                append(line)
+                position += len(line)
+                word_count += len(words)
+
+        page_offsets.append(position)
+
+        return NormalizedText(
+            text="".join(parts),
+            word_count=word_count,
+            paragraph_offsets=paragraph_offsets,
+            page_offsets=page_offsets,
+        )
+
+
+# Singleton instance
+text_normalizer = TextNormalizer()
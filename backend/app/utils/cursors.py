@@ -0,0 +1,39 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the sort key of the last row of a page (plus its id, as a tie
+breaker), JSON-encoded and base64url'd so that clients pass it back
+unchanged. The next page then starts with a WHERE on the sort key instead
+of an OFFSET, so every page costs the same however deep the client goes.
+"""
+
+from typing import Any, List
+import base64
+import json
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode JSON-serializable values (e.g. order, sort key, id) as a cursor.
+
+    Dates and datetimes should be passed as ISO strings, UUIDs as str.
+    """
+    payload = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    """
+    Decode a cursor into the values it was encoded from.
+
+    Raises:
+        ValueError: If the cursor is malformed or does not hold `length` values
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Malformed cursor") from e
+
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Malformed cursor")
+    return values
@@ -88,6 +88,12 @@ def init_db():
     import app.models  # Import all models
     Base.metadata.create_all(bind=engine)
 
+    # card_reviews is partitioned: it cannot accept rows until partitions exist
+    if engine.dialect.name == "postgresql":
+        from app.services.review_partitions import ensure_future_partitions
+        with get_db_context() as db:
+            ensure_future_partitions(db)
+
 
 def drop_db():
     """
@@ -0,0 +1,86 @@
+"""
+Incremental parsing of a streamed JSON array.
+
+Model output arrives a few characters at a time. JSONArrayStream scans each
+piece once, tracking string and nesting state, and hands back every element
+of the top-level array as soon as its closing brace or bracket arrives, so
+the first card can be used long before the response is complete. Anything
+before the opening bracket (a ```json fence, a sentence of preamble, or the
+key of a wrapping object) is skipped, as is anything after the array.
+"""
+
+from typing import Any, List, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStream:
+    """Feed text chunks in order; get back completed array elements."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0  # Next character of the buffer to scan
+        self._element_start: Optional[int] = None
+        self._depth = 0  # Nesting depth inside the array (0 = between elements)
+        self._in_array = False
+        self._in_string = False
+        self._escaped = False
+        self.done = False  # The closing bracket of the array was seen
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Add the next piece of the document.
+
+        Returns:
+            Elements (objects or arrays) completed by this piece, in order;
+            elements that are not valid JSON are logged and skipped
+        """
+        if self.done:
+            return []
+
+        buffer = self._buffer + text
+        completed = []
+        i = self._position
+
+        while i < len(buffer):
+            char = buffer[i]
+            if not self._in_array:
+                self._in_array = char == "["
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    self.done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    element = buffer[self._element_start:i + 1]
+                    self._element_start = None
+                    try:
+                        completed.append(json.loads(element))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping malformed array element: {e}")
+            i += 1
+
+        # Keep only the unfinished element
+        if self._element_start is None:
+            self._buffer, self._position = "", 0
+        else:
+            self._buffer = buffer[self._element_start:]
+            self._position = i - self._element_start
+            self._element_start = 0
+
+        return completed
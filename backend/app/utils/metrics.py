@@ -0,0 +1,187 @@
+"""
+Minimal in-process metrics registry.
+
+Counters, gauges and histograms with optional labels, rendered in the
+Prometheus text exposition format by the /metrics endpoint.
+"""
+
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import bisect
+import threading
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    def header(self) -> str:
+        return f"# HELP {self.name} {self.help_text}\n# TYPE {self.name} {self.kind}\n"
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + "".join(
+            f"{self.name}{_format_labels(key)} {_format_value(value)}\n" for key, value in items
+        )
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        if self.callback is not None and not labels:
+            return self.callback()
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> str:
+        if self.callback is not None:
+            return self.header() + f"{self.name} {_format_value(self.callback())}\n"
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + "".join(
+            f"{self.name}{_format_labels(key)} {_format_value(value)}\n" for key, value in items
+        )
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), [0, 0.0]])
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            totals[0] += 1
+            totals[1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series[1][0] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(_label_key(labels))
+        return series[1][1] if series else 0.0
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted((key, [list(counts), list(totals)]) for key, (counts, totals) in self._series.items())
+        lines = [self.header()]
+        for key, (counts, (count, total)) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}\n"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}\n")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}\n")
+        return "".join(lines)
+
+
+class MetricsRegistry:
+    """Named collection of metrics; registering a name twice returns the existing metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str, callback: Optional[Callable[[], float]] = None) -> Gauge:
+        gauge = self._register(Gauge, name, help_text)
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "".join(metric.render() for metric in metrics)
+
+
+# Global registry
+metrics = MetricsRegistry()
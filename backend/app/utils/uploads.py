@@ -0,0 +1,130 @@
+"""
+Streaming upload helpers.
+
+- UploadSizeLimitMiddleware rejects oversized request bodies while they are
+  still arriving (Content-Length first, then a running byte count), so an
+  oversized upload is never fully received or spooled.
+- spool_upload() walks an UploadFile in fixed-size chunks, enforcing the
+  file size limit and hashing on the way, and hands back the underlying
+  spooled temporary file (memory up to 1 MB, then disk) for readers that
+  accept a file handle.
+"""
+
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Optional
+import hashlib
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB per read
+FORM_OVERHEAD_BYTES = 64 * 1024  # Multipart boundaries and small form fields
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload crosses the configured size limit."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(
+            f"File is too large. Maximum size is {max_bytes / (1024 * 1024):.0f} MB."
+        )
+
+
+@dataclass
+class SpooledUpload:
+    """An upload that passed size enforcement, rewound to the start."""
+    file: BinaryIO
+    size: int
+    sha256: str
+
+
+async def spool_upload(upload: UploadFile, max_bytes: int, chunk_size: int = CHUNK_SIZE) -> SpooledUpload:
+    """
+    Stream an uploaded file through size enforcement and hashing.
+
+    Only one chunk is held in memory at a time; the data itself stays in
+    the upload's spooled temporary file.
+
+    Args:
+        upload: Uploaded file from the request
+        max_bytes: Largest accepted file size
+        chunk_size: Bytes read per step
+
+    Returns:
+        SpooledUpload with the rewound file handle, its size and SHA-256
+
+    Raises:
+        UploadTooLargeError: As soon as more than max_bytes have been read
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+        digest.update(chunk)
+
+    await upload.seek(0)
+    return SpooledUpload(file=upload.file, size=size, sha256=digest.hexdigest())
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware capping request body size for upload endpoints.
+
+    Requests to one of `paths` whose body exceeds `max_bytes` get a 413
+    before the body is read (declared Content-Length) or as soon as the
+    running byte count crosses the limit (chunked/undeclared bodies).
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Upload is too large. Maximum size is {self.max_bytes // (1024 * 1024)} MB."
+
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > self.max_bytes:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": detail},
+                headers={"Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Surfaces through the body parser as a regular 413 response
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _content_length(scope) -> Optional[int]:
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
@@ -0,0 +1,72 @@
+"""
+Tests for the denormalized counter audit.
+
+Tests cover:
+- Drift statistics per counter
+- Counting archived reviews per user
+"""
+
+import uuid
+from datetime import date, datetime, timezone
+
+from app.services.counter_audit import CounterDrift, DriftReport, archived_review_counts
+from app.services.review_partitions import archive_path, rows_to_columns, write_archive
+
+
+class TestCounterDrift:
+    """Test drift bookkeeping."""
+
+    def test_records_drift_magnitude(self):
+        """Test checked/drifted counts and absolute drift totals."""
+        drift = CounterDrift()
+
+        assert drift.record(5, 5) is False
+        assert drift.record(3, 7) is True
+        assert drift.record(10, 8) is True
+
+        assert drift.checked == 3
+        assert drift.drifted == 2
+        assert drift.total_abs_drift == 6
+        assert drift.max_abs_drift == 4
+
+    def test_null_counter_is_drift(self):
+        """Test that a NULL counter is repaired even when the truth is zero."""
+        drift = CounterDrift()
+
+        assert drift.record(None, 0) is True
+        assert drift.total_abs_drift == 0
+
+    def test_report_to_dict(self):
+        """Test the serialized report shape."""
+        report = DriftReport(dry_run=False)
+        report.counter("user_stats.cards_new").record(1, 2)
+
+        result = report.to_dict()
+
+        assert result["dry_run"] is False
+        assert result["counters"]["user_stats.cards_new"]["drifted"] == 1
+
+
+class TestArchivedReviewCounts:
+    """Test per-user counts over review archives."""
+
+    def test_counts_across_months(self, tmp_path):
+        """Test that reviews are counted per user over every archived month."""
+        alice, bob = uuid.uuid4(), uuid.uuid4()
+
+        def row(user_id, reviewed_at):
+            return (uuid.uuid4(), uuid.uuid4(), user_id, 3, 1, 3, 2.5, 2.5, 10, None, None, reviewed_at)
+
+        for month, users in ((date(2024, 11, 1), [alice, alice, bob]), (date(2024, 12, 1), [alice])):
+            reviewed = datetime(month.year, month.month, 2, tzinfo=timezone.utc)
+            rows = [row(user_id, reviewed) for user_id in users]
+            write_archive(archive_path(month, str(tmp_path)), rows_to_columns(rows))
+
+        counts = archived_review_counts(str(tmp_path))
+
+        assert counts[alice] == 3
+        assert counts[bob] == 1
+
+    def test_missing_archive_dir(self, tmp_path):
+        """Test that a missing archive directory means no archived reviews."""
+        assert archived_review_counts(str(tmp_path / "missing")) == {}
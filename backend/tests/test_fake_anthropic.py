@@ -0,0 +1,139 @@
+"""
+Tests for the fake Anthropic API and the generation load driver.
+
+The real SDK and LLMClient talk to the fake app in process (httpx ASGI
+transport), as the backend does when ANTHROPIC_BASE_URL points at it.
+
+Tests cover:
+- Latency spec parsing and sampling
+- Plain and streamed responses with the requested number of cards
+- Injected errors with retry-after, retried by the client
+- Pipeline load test run against the fake
+"""
+
+import random
+
+import httpx
+import pytest
+from anthropic import AsyncAnthropic
+
+from app.loadtest import generate as loadtest
+from app.loadtest.fake_anthropic import FakeAnthropicConfig, LatencyDistribution, create_app
+from app.services import flashcard_generation
+from app.services.generation_cache import GenerationCache
+from app.services.llm_client import LLMClient
+from app.services.openai_service import OpenAIService
+
+TEXT = (
+    "La fotosíntesis es el proceso por el cual las plantas convierten la luz en energía química. "
+    "Ocurre en los cloroplastos y produce oxígeno como subproducto."
+)
+
+
+def _client(app) -> LLMClient:
+    """LLMClient in front of the fake app, without waits between retries."""
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    client = LLMClient(AsyncAnthropic(
+        api_key="local", base_url="http://fake-anthropic", max_retries=0, http_client=http_client
+    ))
+    client.retry_base_seconds = 0.0
+    return client
+
+
+def _service(app) -> OpenAIService:
+    service = OpenAIService()
+    service.client = _client(app)
+    return service
+
+
+class TestLatencyDistribution:
+    """Test latency specs."""
+
+    def test_parses_and_samples(self):
+        """Test that samples fall in the range each distribution describes."""
+        rng = random.Random(1)
+
+        assert LatencyDistribution("fixed:0.25").sample(rng) == 0.25
+        assert all(0.1 <= LatencyDistribution("uniform:0.1,0.3").sample(rng) <= 0.3 for _ in range(50))
+        assert all(LatencyDistribution("lognormal:1.0,0.5").sample(rng) > 0 for _ in range(50))
+
+    @pytest.mark.parametrize("spec", ["fixed", "uniform:1", "gaussian:1,2", "fixed:-1", "fixed:abc"])
+    def test_rejects_invalid_specs(self, spec):
+        """Test that malformed specs raise ValueError."""
+        with pytest.raises(ValueError):
+            LatencyDistribution(spec)
+
+
+class TestFakeMessages:
+    """Test the fake Messages API through the real client."""
+
+    async def test_generates_requested_cards(self):
+        """Test that a plain request returns as many distinct cards as the prompt asks for."""
+        service = _service(create_app())
+
+        cards = await service.generate_flashcards(TEXT, count=7)
+
+        assert len(cards) == 7
+        assert len({card["question"] for card in cards}) == 7
+
+    async def test_streams_cards(self):
+        """Test that a streamed request yields the cards through the incremental parser."""
+        service = _service(create_app())
+
+        cards = [card async for card in service.stream_flashcards(TEXT, count=4)]
+
+        assert len(cards) == 4
+
+    async def test_serves_canned_cards(self):
+        """Test that configured cards are served in turn."""
+        canned = [{"question": f"Pregunta {i}", "answer": f"Respuesta {i}"} for i in range(3)]
+        service = _service(create_app(FakeAnthropicConfig(cards=canned)))
+
+        cards = await service.generate_flashcards(TEXT, count=2)
+
+        assert [card["question"] for card in cards] == ["Pregunta 0", "Pregunta 1"]
+
+    async def test_injected_errors_are_retried(self):
+        """Test that injected 429s carry retry-after and the client retries past them."""
+        app = create_app(FakeAnthropicConfig(error_rate=0.5, error_statuses=[429], retry_after_seconds=0, seed=3))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://fake-anthropic") as http:
+            statuses = []
+            for _ in range(10):
+                response = await http.post("/v1/messages", json={"model": "m", "max_tokens": 10, "messages": []})
+                statuses.append(response.status_code)
+                if response.status_code == 429:
+                    assert response.headers["retry-after"] == "0"
+        assert set(statuses) == {200, 429}
+
+        service = _service(app)
+        service.client.max_retries = 10
+        assert len(await service.generate_flashcards(TEXT, count=3)) == 3
+        assert app.state.stats["errors"] > 0
+
+
+class TestPipelineLoadTest:
+    """Test the in-process load driver."""
+
+    async def test_runs_generations_against_fake(self, tmp_path, monkeypatch):
+        """Test that every generation succeeds and the summary counts cards and latencies."""
+        cache = GenerationCache(path=str(tmp_path / "cache.sqlite3"), enabled=True)
+        monkeypatch.setattr(flashcard_generation, "generation_cache", cache)
+        monkeypatch.setattr(flashcard_generation.openai_service, "client", _client(create_app()))
+
+        result = await loadtest.run_pipeline(generations=4, concurrency=2, card_count=5, text_chars=2000)
+        summary = result.summary()
+        cache.close()
+
+        assert summary["succeeded"] == 4
+        assert summary["failed"] == 0
+        assert summary["cards"] == 20
+        assert 0 < summary["latency_p50"] <= summary["latency_max"]
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [float(i) for i in range(1, 101)]
+
+        assert loadtest.percentile(values, 50) == 50.0
+        assert loadtest.percentile(values, 99) == 99.0
+        assert loadtest.percentile([], 95) == 0.0
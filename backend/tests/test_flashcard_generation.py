@@ -0,0 +1,273 @@
+"""
+Tests for chunked flashcard generation.
+
+Tests cover:
+- Allocation of the card count across chunks
+- Near-duplicate question removal
+- Concurrent per-chunk requests bounded by the semaphore
+- Partial and total chunk failures
+- Streaming cards as chunks produce them
+- Reuse of cached chunk results
+"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services import flashcard_generation
+from app.services.flashcard_generation import (
+    CHUNK_REQUESTS,
+    FlashcardGenerator,
+    allocate_card_counts,
+    dedupe_cards,
+)
+from app.services.generation_cache import GenerationCache
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    """Isolated generation cache per test."""
+    generation_cache = GenerationCache(path=str(tmp_path / "cache.sqlite3"), enabled=True)
+    monkeypatch.setattr(flashcard_generation, "generation_cache", generation_cache)
+    yield generation_cache
+    generation_cache.close()
+
+
+def _paragraphs(count: int) -> str:
+    return "\n\n".join(
+        f"Tema {i}: la célula número {i} tiene un núcleo y una membrana que la separa del medio."
+        for i in range(count)
+    )
+
+
+class TestAllocateCardCounts:
+    """Test largest remainder allocation."""
+
+    @pytest.mark.parametrize("weights,total,expected", [
+        ([100, 100], 10, [5, 5]),
+        ([300, 100], 10, [8, 2]),
+        ([1, 1, 1], 10, [4, 3, 3]),
+        ([5, 5, 5, 5], 2, [1, 1, 0, 0]),
+        ([], 10, []),
+        ([10, 10], 0, [0, 0]),
+    ])
+    def test_allocation(self, weights, total, expected):
+        """Test that shares are proportional and sum to the total."""
+        counts = allocate_card_counts(weights, total)
+
+        assert counts == expected
+        assert sum(counts) == (total if weights else 0)
+
+
+class TestDedupeCards:
+    """Test duplicate removal."""
+
+    def test_drops_repeated_questions(self):
+        """Test that rewordings differing only in case, accents or punctuation are dropped."""
+        cards = [
+            {"question": "¿Qué es la fotosíntesis?", "answer": "a"},
+            {"question": "que es la FOTOSINTESIS", "answer": "b"},
+            {"question": "¿Qué es la mitosis?", "answer": "c"},
+        ]
+
+        assert [card["answer"] for card in dedupe_cards(cards)] == ["a", "c"]
+
+    def test_keeps_similar_but_different_questions(self):
+        """Test that questions sharing a few words are kept."""
+        cards = [
+            {"question": "¿Cuál es la función del núcleo?", "answer": "a"},
+            {"question": "¿Cuál es la función de la membrana?", "answer": "b"},
+            {"question": "¿Qué es la célula?", "answer": "c"},
+            {"question": "¿Qué es la célula eucariota?", "answer": "d"},
+        ]
+
+        assert len(dedupe_cards(cards)) == 4
+
+
+class TestFlashcardGenerator:
+    """Test fan-out over chunks."""
+
+    @pytest.fixture
+    def small_chunks(self, monkeypatch):
+        monkeypatch.setattr(settings, "GENERATION_CHUNK_TOKENS", 60)
+        monkeypatch.setattr(settings, "GENERATION_CHUNK_OVERLAP_TOKENS", 0)
+
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        """Fake chunk generation recording peak concurrency."""
+        state = {"active": 0, "peak": 0, "requests": [], "fail": set()}
+
+        async def fake_generate(text, count, difficulty=None, subject=None, ai_confidence=None):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            state["requests"].append((text, count))
+            request = len(state["requests"])
+            try:
+                await asyncio.sleep(0.01)
+                if request in state["fail"]:
+                    raise RuntimeError("rate limited")
+                return [
+                    {"question": f"¿Qué es el concepto c{request}n{i}?", "answer": "x", "tags": []}
+                    for i in range(count)
+                ]
+            finally:
+                state["active"] -= 1
+
+        monkeypatch.setattr(flashcard_generation.openai_service, "generate_flashcards", fake_generate)
+        return state
+
+    async def test_splits_count_across_chunks(self, small_chunks, calls):
+        """Test that every chunk is requested concurrently, within the limit, for the total count."""
+        generator = FlashcardGenerator()
+        generator.concurrency = 2
+
+        cards = await generator.generate(_paragraphs(8), count=12)
+
+        assert len(calls["requests"]) > 2
+        assert sum(count for _, count in calls["requests"]) == 12
+        assert calls["peak"] == 2
+        assert len(cards) == 12
+
+    async def test_short_text_single_request(self, calls):
+        """Test that a text within one chunk is sent as a single request."""
+        cards = await FlashcardGenerator().generate(_paragraphs(2), count=5)
+
+        assert len(calls["requests"]) == 1
+        assert len(cards) == 5
+
+    async def test_partial_failure_returns_other_chunks(self, small_chunks, calls):
+        """Test that a failed chunk does not discard the cards of the others."""
+        calls["fail"] = {1}
+
+        cards = await FlashcardGenerator().generate(_paragraphs(8), count=12)
+
+        assert 0 < len(cards) < 12
+
+    async def test_all_chunks_failing_raises(self, calls):
+        """Test that the error is raised when no chunk succeeds."""
+        calls["fail"] = {1}
+
+        with pytest.raises(RuntimeError, match="rate limited"):
+            await FlashcardGenerator().generate(_paragraphs(2), count=5)
+
+    async def test_repeat_generation_uses_cache(self, small_chunks, calls):
+        """Test that the same generation is served from the cache, unless bypassed."""
+        text = _paragraphs(8)
+        first = await FlashcardGenerator().generate(text, count=12)
+        requests = len(calls["requests"])
+
+        second = await FlashcardGenerator().generate(text, count=12)
+        assert second == first
+        assert len(calls["requests"]) == requests
+
+        await FlashcardGenerator().generate(text, count=12, use_cache=False)
+        assert len(calls["requests"]) == 2 * requests
+
+    async def test_failed_chunks_are_not_cached(self, calls):
+        """Test that a failure is retried on the next generation."""
+        calls["fail"] = {1}
+        with pytest.raises(RuntimeError):
+            await FlashcardGenerator().generate(_paragraphs(2), count=5)
+
+        cards = await FlashcardGenerator().generate(_paragraphs(2), count=5)
+
+        assert len(cards) == 5
+
+    async def test_too_short_text(self):
+        """Test that text too short for any chunk is rejected."""
+        with pytest.raises(ValueError):
+            await FlashcardGenerator().generate("muy corto", count=5)
+
+
+class TestFlashcardGeneratorStream:
+    """Test streaming fan-out."""
+
+    @pytest.fixture
+    def streams(self, monkeypatch):
+        """Fake streaming chunk generation; with "fail" set, every chunk raises after its first card."""
+        state = {"fail": False, "started": 0, "produced": 0}
+
+        async def fake_stream(text, count, difficulty=None, subject=None, ai_confidence=None):
+            state["started"] += 1
+            request = state["started"]
+            for i in range(count):
+                await asyncio.sleep(0.001)
+                state["produced"] += 1
+                yield {"question": f"¿Qué es el concepto c{request}n{i}?", "answer": "x", "tags": []}
+                if state["fail"]:
+                    raise RuntimeError("connection reset")
+            # The rest of the response (closing bracket, message_stop) arrives after the last card
+            await asyncio.sleep(0.005)
+
+        monkeypatch.setattr(flashcard_generation.openai_service, "stream_flashcards", fake_stream)
+        monkeypatch.setattr(settings, "GENERATION_CHUNK_TOKENS", 60)
+        monkeypatch.setattr(settings, "GENERATION_CHUNK_OVERLAP_TOKENS", 0)
+        return state
+
+    async def test_streams_all_cards(self, streams):
+        """Test that every chunk's cards are yielded, up to the requested count."""
+        cards = [card async for card in FlashcardGenerator().stream(_paragraphs(8), count=12)]
+
+        assert len(cards) == 12
+        assert len({card["question"] for card in cards}) == 12
+
+    async def test_closing_early_cancels_chunks(self, streams):
+        """Test that closing the stream early cancels the remaining chunk requests."""
+        stream = FlashcardGenerator().stream(_paragraphs(8), count=12)
+
+        await stream.__anext__()
+        await stream.aclose()
+        produced = streams["produced"]
+        await asyncio.sleep(0.05)
+
+        assert streams["produced"] == produced < 12
+
+    async def test_cards_before_failure_are_kept(self, streams):
+        """Test that a chunk failing midway keeps the cards it already produced."""
+        streams["fail"] = True
+
+        cards = [card async for card in FlashcardGenerator().stream(_paragraphs(8), count=12)]
+
+        assert 0 < len(cards) < 12
+
+    async def test_stream_replays_cached_chunks(self, streams):
+        """Test that every chunk of a stream that reached count is cached and replayed without new requests."""
+        text = _paragraphs(8)
+        generator = FlashcardGenerator()
+        first = [card async for card in generator.stream(text, count=12)]
+        # Chunks still reading the end of their response finish in the background
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(task for task in flashcard_generation._finishing_chunks if task.get_loop() is loop))
+        started = streams["started"]
+        cached = CHUNK_REQUESTS.value(outcome="cached")
+
+        second = [card async for card in generator.stream(text, count=12)]
+
+        assert streams["started"] == started
+        assert CHUNK_REQUESTS.value(outcome="cached") == cached + len(generator.plan(text, 12))
+        assert sorted(card["question"] for card in second) == sorted(card["question"] for card in first)
+
+    async def test_cache_errors_do_not_hang(self, streams, monkeypatch):
+        """Test that an unexpected cache error fails the chunk instead of leaving the stream waiting."""
+        def broken_get(key):
+            raise RuntimeError("cache unavailable")
+
+        monkeypatch.setattr(flashcard_generation.generation_cache, "get", broken_get)
+
+        async def collect():
+            return [card async for card in FlashcardGenerator().stream(_paragraphs(2), count=5)]
+
+        with pytest.raises(RuntimeError, match="cache unavailable"):
+            await asyncio.wait_for(collect(), timeout=2)
+
+    async def test_failure_without_cards_raises(self, monkeypatch):
+        """Test that the chunk error is raised when nothing was produced."""
+        async def failing_stream(**kwargs):
+            raise ValueError("Anthropic API key not configured")
+            yield
+
+        monkeypatch.setattr(flashcard_generation.openai_service, "stream_flashcards", failing_stream)
+
+        with pytest.raises(ValueError, match="API key"):
+            [card async for card in FlashcardGenerator().stream(_paragraphs(2), count=5)]
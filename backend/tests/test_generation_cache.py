@@ -0,0 +1,156 @@
+"""
+Tests for the generation result cache.
+
+Tests cover:
+- Cache keys
+- Round trip, persistence across instances and disabling
+- LRU eviction by size, with one bound shared by every process using the file
+- Hit/miss metrics
+"""
+
+import sqlite3
+
+import pytest
+
+from app.services.generation_cache import LOOKUPS, GenerationCache, generation_cache_key
+
+CARDS = [{"question": "¿Qué es la fotosíntesis?", "answer": "Un proceso", "difficulty": 2, "tags": ["biología"]}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    generation_cache = GenerationCache(path=str(tmp_path / "cache.sqlite3"), max_bytes=10_000, enabled=True)
+    yield generation_cache
+    generation_cache.close()
+
+
+def _key(**overrides) -> str:
+    params = dict(prompt_version=1, text="texto", count=5, difficulty=None, subject=None, model="m")
+    params.update(overrides)
+    return generation_cache_key(**params)
+
+
+class TestGenerationCacheKey:
+    """Test key derivation."""
+
+    def test_deterministic(self):
+        """Test that the same request always maps to the same key."""
+        assert _key() == _key()
+
+    @pytest.mark.parametrize("override", [
+        {"prompt_version": 2}, {"text": "otro"}, {"count": 6}, {"difficulty": "hard"},
+        {"subject": "Biología"}, {"model": "other"}, {"ai_confidence": 0.85},
+    ])
+    def test_every_parameter_changes_key(self, override):
+        """Test that changing any parameter changes the key."""
+        assert _key(**override) != _key()
+
+
+class TestGenerationCache:
+    """Test storage and eviction."""
+
+    def test_round_trip(self, cache):
+        """Test that stored cards are returned unchanged."""
+        cache.put("k", CARDS)
+
+        assert cache.get("k") == CARDS
+        assert cache.get("missing") is None
+
+    def test_persists_across_instances(self, cache):
+        """Test that entries survive a restart (new instance on the same file)."""
+        cache.put("k", CARDS)
+        reopened = GenerationCache(path=cache.path, max_bytes=cache.max_bytes, enabled=True)
+
+        assert reopened.get("k") == CARDS
+        reopened.close()
+
+    def test_disabled(self, tmp_path):
+        """Test that a disabled cache stores and returns nothing."""
+        disabled = GenerationCache(path=str(tmp_path / "off.sqlite3"), enabled=False)
+        disabled.put("k", CARDS)
+
+        assert disabled.get("k") is None
+        assert not (tmp_path / "off.sqlite3").exists()
+
+    def test_evicts_least_recently_used(self, cache):
+        """Test that the size limit evicts the entries used longest ago."""
+        cards = [{"question": "q" * 3000, "answer": "a"}]
+        cache.put("first", cards)
+        cache.put("second", cards)
+        cache.get("first")  # Now more recent than "second"
+        cache.put("third", cards)
+        cache.put("fourth", cards)
+
+        assert cache.get("second") is None
+        assert cache.get("first") is not None
+        assert cache.get("fourth") is not None
+        assert cache._size <= cache.max_bytes
+
+    def test_replacing_entry_keeps_size(self, cache):
+        """Test that overwriting a key does not count its size twice."""
+        cache.put("k", CARDS)
+        size = cache._size
+        cache.put("k", CARDS)
+
+        assert cache._size == size
+
+    def test_counts_hits_and_misses(self, cache):
+        """Test that lookups are counted by result."""
+        hits, misses = LOOKUPS.value(result="hit"), LOOKUPS.value(result="miss")
+        cache.put("k", CARDS)
+
+        cache.get("k")
+        cache.get("nope")
+
+        assert LOOKUPS.value(result="hit") == hits + 1
+        assert LOOKUPS.value(result="miss") == misses + 1
+
+    def test_corrupt_entry_is_a_miss(self, cache):
+        """Test that an entry that is not valid JSON is treated as a miss."""
+        cache.put("k", CARDS)
+        cache._connect().execute("UPDATE generation_cache SET cards = '[{' WHERE key = 'k'")
+
+        assert cache.get("k") is None
+
+
+class TestSharedSizeBound:
+    """Test the size bound across processes sharing the file."""
+
+    def test_bound_holds_across_instances(self, tmp_path):
+        """Test that writes through two connections are evicted against one total."""
+        path = str(tmp_path / "shared.sqlite3")
+        first = GenerationCache(path=path, max_bytes=10_000, enabled=True)
+        second = GenerationCache(path=path, max_bytes=10_000, enabled=True)
+        cards = [{"question": "q" * 3000, "answer": "a"}]
+        try:
+            for i in range(4):
+                first.put(f"first-{i}", cards)
+                second.put(f"second-{i}", cards)
+
+            connection = first._connect()
+            stored = connection.execute("SELECT COALESCE(SUM(size), 0) FROM generation_cache").fetchone()[0]
+            assert stored <= 10_000
+            assert second._size == stored
+        finally:
+            first.close()
+            second.close()
+
+    def test_seeds_size_of_existing_file(self, tmp_path):
+        """Test that a file written before the size table existed is counted."""
+        path = str(tmp_path / "old.sqlite3")
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "CREATE TABLE generation_cache (key TEXT PRIMARY KEY, cards TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+        )
+        connection.execute("INSERT INTO generation_cache VALUES ('k', '[]', 1234, 0, 0)")
+        connection.commit()
+        connection.close()
+
+        cache = GenerationCache(path=path, max_bytes=10_000, enabled=True)
+        try:
+            assert cache.get("k") == []
+            assert cache._size == 1234
+        finally:
+            cache.close()
+
@@ -0,0 +1,352 @@
+"""
+Tests for background flashcard generation jobs.
+
+Tests cover:
+- Claim query (SKIP LOCKED, per-user running cap) and retry backoff
+- Bulk insert of generated cards and their stats
+- Worker processing: completion, invalid input, retries
+- Cancellation of running jobs and release on shutdown
+- Status events delivered to subscribers
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import generation_jobs
+from app.services.generation_jobs import (
+    ClaimedJob,
+    GenerationJobService,
+    GenerationSourceError,
+    claim_query,
+    persist_generated_cards,
+    retry_delay,
+)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Replace the database helpers with an in-memory job store."""
+    jobs = {}
+
+    def claim_next_job(worker_id, jobs_per_user):
+        for job_id, job in jobs.items():
+            if job["status"] == "queued":
+                job.update(status="running", locked_by=worker_id, attempts=job["attempts"] + 1)
+                return ClaimedJob(
+                    id=job_id, user_id=job["user_id"], material_id=uuid.uuid4(), params=job["params"],
+                    attempts=job["attempts"], max_attempts=3, created_at=datetime.now(timezone.utc)
+                )
+        return None
+
+    def owned(job_id, worker_id):
+        job = jobs[job_id]
+        return job if job["status"] == "running" and job["locked_by"] == worker_id else None
+
+    def mark_completed(job, worker_id, cards):
+        row = owned(job.id, worker_id)
+        if row is None:
+            return None
+        card_ids = [uuid.uuid4() for _ in cards]
+        row.update(status="completed", locked_by=None, card_ids=card_ids, cards_created=len(cards))
+        return card_ids
+
+    def mark_cancelled(job_id, worker_id):
+        row = owned(job_id, worker_id)
+        if row is None:
+            return False
+        row.update(status="cancelled", locked_by=None)
+        return True
+
+    def mark_failed(job_id, worker_id, message):
+        row = owned(job_id, worker_id)
+        if row is None:
+            return False
+        row.update(status="failed", locked_by=None, error_message=message)
+        return True
+
+    def mark_attempt_failed(job_id, worker_id, message):
+        row = owned(job_id, worker_id)
+        if row is None:
+            return None
+        row.update(status="queued" if row["attempts"] < 3 else "failed", locked_by=None, error_message=message)
+        return row["status"]
+
+    def load_event(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            return None
+        return {
+            "job_id": str(job_id),
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "cards_created": job.get("cards_created", 0),
+            "error_message": job.get("error_message"),
+        }
+
+    def release_jobs(worker_id):
+        released = [job for job in jobs.values() if job["status"] == "running" and job["locked_by"] == worker_id]
+        for job in released:
+            job.update(status="queued", locked_by=None, attempts=job["attempts"] - 1)
+        return len(released)
+
+    monkeypatch.setattr(generation_jobs, "claim_next_job", claim_next_job)
+    monkeypatch.setattr(generation_jobs, "_load_job_source", lambda job: (SimpleNamespace(subject_category=None), "x" * 100))
+    monkeypatch.setattr(generation_jobs, "_mark_completed", mark_completed)
+    monkeypatch.setattr(generation_jobs, "_mark_cancelled", mark_cancelled)
+    monkeypatch.setattr(generation_jobs, "_mark_failed", mark_failed)
+    monkeypatch.setattr(generation_jobs, "_mark_attempt_failed", mark_attempt_failed)
+    monkeypatch.setattr(generation_jobs, "_load_event", load_event)
+    monkeypatch.setattr(generation_jobs, "heartbeat_jobs", lambda worker_id, job_ids: [])
+    monkeypatch.setattr(generation_jobs, "requeue_stale_jobs", lambda: 0)
+    monkeypatch.setattr(generation_jobs, "release_jobs", release_jobs)
+
+    return jobs
+
+
+def _queued(store, card_count: int = 3) -> uuid.UUID:
+    job_id = uuid.uuid4()
+    store[job_id] = {"status": "queued", "attempts": 0, "user_id": uuid.uuid4(), "params": {"card_count": card_count}}
+    return job_id
+
+
+def _fake_generate(monkeypatch, generate):
+    monkeypatch.setattr(generation_jobs.flashcard_generator, "generate", generate)
+
+
+async def _until(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def service(store):
+    job_service = GenerationJobService()
+    job_service.worker_count = 2
+    job_service.poll_seconds = 0.01
+    job_service.heartbeat_seconds = 0.05
+    await job_service.start()
+    yield job_service
+    await job_service.stop()
+
+
+class TestClaimQuery:
+    """Test the job claiming statement."""
+
+    def _sql(self, query) -> str:
+        return str(query.compile(dialect=postgresql.dialect()))
+
+    def test_skips_locked_rows(self):
+        """Test that claiming locks only the job row and skips rows other workers hold."""
+        sql = self._sql(claim_query(1))
+        assert "FOR UPDATE OF generation_jobs SKIP LOCKED" in sql
+        assert "LIMIT" in sql
+
+    def test_oldest_due_queued_job_first(self):
+        """Test the claim filters due queued jobs and orders by schedule."""
+        sql = self._sql(claim_query(1))
+        assert "generation_jobs.run_after <= now()" in sql
+        assert "ORDER BY generation_jobs.run_after, generation_jobs.created_at" in sql
+
+    def test_per_user_running_cap(self):
+        """Test that users already at the running-jobs cap are skipped."""
+        query = claim_query(2)
+        sql = self._sql(query)
+        assert "count(*)" in sql
+        assert "generation_jobs_1.user_id = generation_jobs.user_id" in sql
+        assert 2 in query.compile(dialect=postgresql.dialect()).params.values()
+
+
+class TestRetryDelay:
+    """Test exponential retry backoff."""
+
+    def test_doubles_per_attempt(self, monkeypatch):
+        """Test the delay starts at the base and doubles after each failure."""
+        monkeypatch.setattr(generation_jobs.settings, "GENERATION_JOB_RETRY_SECONDS", 10)
+        assert [retry_delay(n) for n in (1, 2, 3)] == [
+            timedelta(seconds=10), timedelta(seconds=20), timedelta(seconds=40)
+        ]
+
+
+class TestPersistGeneratedCards:
+    """Test saving generated cards."""
+
+    def test_one_insert_per_table(self):
+        """Test that cards and stats are written with one multi-row INSERT each, no flushes."""
+        db = MagicMock()
+        returned = [SimpleNamespace(id=uuid.uuid4()), SimpleNamespace(id=uuid.uuid4())]
+        db.execute.return_value.all.return_value = returned
+        user_id, material_id = uuid.uuid4(), uuid.uuid4()
+        cards = [{"question": "Q1", "answer": "A1", "tags": ["bio"]}, {"question": "Q2", "answer": "A2"}]
+
+        flashcards = persist_generated_cards(db, user_id, material_id, cards)
+
+        assert flashcards == returned
+        assert db.execute.call_count == 2
+        db.add.assert_not_called()
+        db.flush.assert_not_called()
+
+        (card_insert, card_rows), (stats_insert, stats_rows) = (call.args for call in db.execute.call_args_list)
+        assert card_insert.table.name == "flashcards" and card_insert._returning
+        assert stats_insert.table.name == "card_stats" and not stats_insert._returning
+        assert [row["question"] for row in card_rows] == ["Q1", "Q2"]
+        assert all(row["user_id"] == user_id and row["status"] == "active" for row in card_rows)
+        # Stats reference the client-generated card IDs
+        assert [row["card_id"] for row in stats_rows] == [row["id"] for row in card_rows]
+
+    def test_no_cards(self):
+        """Test that an empty generation writes nothing."""
+        db = MagicMock()
+        assert persist_generated_cards(db, uuid.uuid4(), uuid.uuid4(), []) == []
+        db.execute.assert_not_called()
+
+
+class TestGenerationWorkers:
+    """Test workers running claimed jobs."""
+
+    async def test_completes_job(self, service, store, monkeypatch):
+        """Test that generated cards are saved and the job completed."""
+        async def generate(text, count, **kwargs):
+            return [{"question": f"Q{i}", "answer": "A"} for i in range(count)]
+        _fake_generate(monkeypatch, generate)
+
+        job_id = _queued(store, card_count=4)
+        service._wake()
+        await _until(lambda: store[job_id]["status"] == "completed")
+
+        assert store[job_id]["cards_created"] == 4
+        assert store[job_id]["attempts"] == 1
+
+    async def test_invalid_input_fails_without_retry(self, service, store, monkeypatch):
+        """Test that invalid input fails the job on the first attempt."""
+        async def generate(text, count, **kwargs):
+            raise ValueError("ANTHROPIC_API_KEY not configured")
+        _fake_generate(monkeypatch, generate)
+
+        job_id = _queued(store)
+        await _until(lambda: store[job_id]["status"] == "failed")
+
+        assert store[job_id]["attempts"] == 1
+        assert store[job_id]["error_message"] == "ANTHROPIC_API_KEY not configured"
+
+    async def test_source_error_fails_job(self, service, store, monkeypatch):
+        """Test that a material that became unusable fails the job."""
+        def load_source(job):
+            raise GenerationSourceError("not_found", "Study material not found")
+        monkeypatch.setattr(generation_jobs, "_load_job_source", load_source)
+
+        job_id = _queued(store)
+        await _until(lambda: store[job_id]["status"] == "failed")
+
+        assert store[job_id]["error_message"] == "Study material not found"
+
+    async def test_transient_errors_are_retried(self, service, store, monkeypatch):
+        """Test that failed attempts are queued again until one succeeds."""
+        calls = []
+
+        async def generate(text, count, **kwargs):
+            calls.append(count)
+            if len(calls) < 3:
+                raise Exception("overloaded")
+            return [{"question": "Q", "answer": "A"}]
+        _fake_generate(monkeypatch, generate)
+
+        job_id = _queued(store)
+        await _until(lambda: store[job_id]["status"] == "completed")
+
+        assert len(calls) == 3
+        assert store[job_id]["attempts"] == 3
+
+
+class TestCancellation:
+    """Test cancelling running jobs and shutting down."""
+
+    async def test_running_job_is_cancelled(self, service, store, monkeypatch):
+        """Test that a cancel request stops the generation and saves nothing."""
+        started = asyncio.Event()
+
+        async def generate(text, count, **kwargs):
+            started.set()
+            await asyncio.sleep(60)
+        _fake_generate(monkeypatch, generate)
+
+        job_id = _queued(store)
+        await asyncio.wait_for(started.wait(), timeout=2)
+        service._running[job_id].cancel()
+        await _until(lambda: store[job_id]["status"] == "cancelled")
+
+        assert "card_ids" not in store[job_id]
+        assert job_id not in service._running
+
+    async def test_heartbeat_cancels_jobs_flagged_elsewhere(self, service, store, monkeypatch):
+        """Test that a cancel requested through another process is noticed on heartbeat."""
+        started = asyncio.Event()
+
+        async def generate(text, count, **kwargs):
+            started.set()
+            await asyncio.sleep(60)
+        _fake_generate(monkeypatch, generate)
+        monkeypatch.setattr(generation_jobs, "heartbeat_jobs", lambda worker_id, job_ids: list(job_ids))
+
+        job_id = _queued(store)
+        await asyncio.wait_for(started.wait(), timeout=2)
+        await _until(lambda: store[job_id]["status"] == "cancelled")
+
+    async def test_stop_releases_running_jobs(self, store, monkeypatch):
+        """Test that shutdown puts running jobs back in the queue without using an attempt."""
+        started = asyncio.Event()
+
+        async def generate(text, count, **kwargs):
+            started.set()
+            await asyncio.sleep(60)
+        _fake_generate(monkeypatch, generate)
+
+        job_service = GenerationJobService()
+        job_service.worker_count = 1
+        job_service.poll_seconds = 0.01
+        await job_service.start()
+        job_id = _queued(store)
+        await asyncio.wait_for(started.wait(), timeout=2)
+        await job_service.stop()
+
+        assert store[job_id]["status"] == "queued"
+        assert store[job_id]["attempts"] == 0
+
+
+class TestStatusEvents:
+    """Test job status subscriptions."""
+
+    async def test_subscriber_sees_status_until_completion(self, service, store, monkeypatch):
+        """Test that subscribers receive changes and the stream ends when the job finishes."""
+        release = asyncio.Event()
+
+        async def generate(text, count, **kwargs):
+            await release.wait()
+            return [{"question": "Q", "answer": "A"}]
+        _fake_generate(monkeypatch, generate)
+
+        job_id = _queued(store)
+        statuses = []
+
+        async def collect():
+            async for event in service.subscribe(job_id, poll_seconds=0.01):
+                statuses.append(event["status"])
+                if event["status"] == "running":
+                    release.set()
+
+        await asyncio.wait_for(collect(), timeout=2)
+
+        assert statuses[-1] == "completed"
+        assert "running" in statuses
+
+    async def test_unknown_job_yields_nothing(self, store):
+        """Test that subscribing to a missing job ends at once."""
+        events = [event async for event in GenerationJobService().subscribe(uuid.uuid4())]
+        assert events == []
@@ -0,0 +1,225 @@
+"""
+Tests for asynchronous material ingestion.
+
+Tests cover:
+- Queue capacity and backpressure
+- Worker processing of pasted text and PDFs (status transitions)
+- Failure handling for invalid PDFs
+- Progress events delivered to subscribers
+- Heartbeat keeping queued materials from being recovered as stale
+"""
+
+import asyncio
+import os
+import tempfile
+import uuid
+
+import pytest
+
+from app.services import ingestion
+from app.services.ingestion import (
+    IngestionJob,
+    IngestionQueueFullError,
+    IngestionService,
+)
+from app.services.pdf_extraction_pool import PDFExtractionPool
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Replace the database helpers with an in-memory material store."""
+    materials = {}
+
+    def mark_processing(material_id):
+        if material_id not in materials:
+            return False
+        materials[material_id]["status"] = "processing"
+        return True
+
+    def mark_completed(material_id, document, content_hash=None, source="text"):
+        materials[material_id].update(
+            status="completed", text=document.text, word_count=document.word_count,
+            content_hash=content_hash, source=source, page_offsets=document.page_offsets
+        )
+
+    def mark_failed(material_id, message):
+        materials[material_id].update(status="failed", error_message=message)
+
+    def load_event(material_id):
+        material = materials.get(material_id)
+        if material is None:
+            return None
+        stage = {"pending": "queued", "processing": "extracting"}.get(material["status"], material["status"])
+        return ingestion._event(material_id, material["status"], stage, material.get("error_message"))
+
+    monkeypatch.setattr(ingestion, "_mark_processing", mark_processing)
+    monkeypatch.setattr(ingestion, "_mark_completed", mark_completed)
+    monkeypatch.setattr(ingestion, "_mark_failed", mark_failed)
+    monkeypatch.setattr(ingestion, "_load_event", load_event)
+    monkeypatch.setattr(ingestion, "recover_stale_materials", lambda: 0)
+    monkeypatch.setattr(ingestion, "touch_materials", lambda material_ids: None)
+
+    inline_pool = PDFExtractionPool()
+    inline_pool.workers = 0
+    monkeypatch.setattr(ingestion, "pdf_extraction_pool", inline_pool)
+
+    return materials
+
+
+def _pending(store) -> uuid.UUID:
+    material_id = uuid.uuid4()
+    store[material_id] = {"status": "pending"}
+    return material_id
+
+
+@pytest.fixture
+async def service(store):
+    ingestion_service = IngestionService()
+    ingestion_service.worker_count = 2
+    ingestion_service.queue_size = 5
+    await ingestion_service.start()
+    yield ingestion_service
+    await ingestion_service.stop()
+
+
+class TestIngestionQueue:
+    """Test queue capacity."""
+
+    def test_not_running_has_no_capacity(self):
+        """Test that uploads are refused before the workers are started."""
+        ingestion_service = IngestionService()
+
+        assert not ingestion_service.has_capacity()
+        with pytest.raises(IngestionQueueFullError):
+            ingestion_service.enqueue(IngestionJob(material_id=uuid.uuid4(), text="x"))
+
+    async def test_full_queue_rejects(self, store):
+        """Test that a full queue raises instead of blocking the request."""
+        ingestion_service = IngestionService()
+        ingestion_service.worker_count = 0
+        ingestion_service.queue_size = 1
+        await ingestion_service.start()
+
+        ingestion_service.enqueue(IngestionJob(material_id=_pending(store), text="x"))
+
+        assert not ingestion_service.has_capacity()
+        with pytest.raises(IngestionQueueFullError):
+            ingestion_service.enqueue(IngestionJob(material_id=_pending(store), text="x"))
+        await ingestion_service.stop()
+
+
+class TestIngestionWorkers:
+    """Test background processing."""
+
+    async def test_processes_pasted_text(self, service, store):
+        """Test that pasted text is analyzed and the material completed."""
+        material_id = _pending(store)
+
+        service.enqueue(IngestionJob(material_id=material_id, text="one two three four"))
+        await asyncio.wait_for(service._queue.join(), timeout=5)
+
+        assert store[material_id]["status"] == "completed"
+        assert store[material_id]["word_count"] == 4
+        assert service.latest_event(material_id) is None
+
+    async def test_processes_pdf_and_removes_file(self, service, store, make_pdf):
+        """Test that PDFs are extracted from disk and the temporary file deleted."""
+        material_id = _pending(store)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as pdf_file:
+            pdf_file.write(make_pdf(["Photosynthesis converts light into chemical energy"]))
+
+        service.enqueue(IngestionJob(material_id=material_id, pdf_path=pdf_file.name, content_hash="ab" * 32))
+        await asyncio.wait_for(service._queue.join(), timeout=10)
+
+        assert store[material_id]["status"] == "completed"
+        assert store[material_id]["text"] == "Photosynthesis converts light into chemical energy"
+        assert store[material_id]["content_hash"] == "ab" * 32
+        assert store[material_id]["source"] == "pdf"
+        assert store[material_id]["page_offsets"] == [0, len("Photosynthesis converts light into chemical energy")]
+        assert not os.path.exists(pdf_file.name)
+
+    async def test_invalid_pdf_fails_material(self, service, store):
+        """Test that extraction errors mark the material failed with a message."""
+        material_id = _pending(store)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as pdf_file:
+            pdf_file.write(b"not a pdf" * 50)
+
+        service.enqueue(IngestionJob(material_id=material_id, pdf_path=pdf_file.name))
+        await asyncio.wait_for(service._queue.join(), timeout=10)
+
+        assert store[material_id]["status"] == "failed"
+        assert store[material_id]["error_message"]
+        assert not os.path.exists(pdf_file.name)
+
+    async def test_deleted_material_is_skipped(self, service, store):
+        """Test that a material deleted while queued is not processed."""
+        material_id = uuid.uuid4()
+
+        service.enqueue(IngestionJob(material_id=material_id, text="gone"))
+        await asyncio.wait_for(service._queue.join(), timeout=5)
+
+        assert material_id not in store
+
+
+class TestProgressEvents:
+    """Test progress subscriptions."""
+
+    async def test_subscriber_sees_stages_until_completion(self, service, store):
+        """Test that a subscriber receives the current state, then each stage, then stops."""
+        material_id = _pending(store)
+        service.enqueue(IngestionJob(material_id=material_id, text="alpha beta gamma"))
+
+        events = [event async for event in service.subscribe(material_id, poll_seconds=0.05)]
+
+        assert events[0]["stage"] == "queued"
+        assert events[-1]["status"] == "completed"
+        assert events[-1]["word_count"] == 3
+        progress = [event["progress"] for event in events]
+        assert progress == sorted(progress)
+
+    async def test_subscribe_falls_back_to_stored_state(self, store):
+        """Test that materials processed elsewhere are reported from storage."""
+        material_id = uuid.uuid4()
+        store[material_id] = {"status": "failed", "error_message": "PDF is encrypted"}
+
+        events = [event async for event in IngestionService().subscribe(material_id)]
+
+        assert len(events) == 1
+        assert events[0]["error_message"] == "PDF is encrypted"
+
+    async def test_unknown_material_yields_nothing(self, store):
+        """Test that subscribing to a missing material ends immediately."""
+        events = [event async for event in IngestionService().subscribe(uuid.uuid4())]
+
+        assert events == []
+
+
+class TestHeartbeat:
+    """Test that live processes keep their materials fresh."""
+
+    async def test_touches_queued_and_running_materials(self, store, monkeypatch):
+        """Test that materials waiting in the queue are touched until they are processed."""
+        touched = []
+        monkeypatch.setattr(ingestion, "touch_materials", lambda material_ids: touched.append(set(material_ids)))
+
+        ingestion_service = IngestionService()
+        ingestion_service.worker_count = 0  # Jobs stay queued
+        ingestion_service.heartbeat_seconds = 0.01
+        await ingestion_service.start()
+        try:
+            material_id = _pending(store)
+            ingestion_service.enqueue(IngestionJob(material_id=material_id, text="Texto " * 20))
+            await asyncio.sleep(0.05)
+        finally:
+            await ingestion_service.stop()
+
+        assert touched and all(ids == {material_id} for ids in touched)
+
+    async def test_processed_materials_are_released(self, service, store):
+        """Test that a material is no longer held once its job finishes."""
+        material_id = _pending(store)
+        service.enqueue(IngestionJob(material_id=material_id, text="Texto de prueba " * 10))
+        await service._queue.join()
+
+        assert store[material_id]["status"] == "completed"
+        assert material_id not in service._owned
@@ -0,0 +1,72 @@
+"""
+Tests for incremental JSON array parsing.
+
+Tests cover:
+- Elements returned as soon as they close, across arbitrary chunk splits
+- Strings containing braces, brackets and escaped quotes
+- Text around the array (code fences, preamble)
+- Malformed elements
+"""
+
+import json
+
+import pytest
+
+from app.utils.json_stream import JSONArrayStream
+
+CARDS = [
+    {"question": "¿Qué es {x}?", "answer": "Un \"valor\" [entre] corchetes", "tags": ["a", "b"]},
+    {"question": "q2", "answer": "a\\b", "tags": []},
+    {"question": "q3", "answer": "a3", "difficulty": 2},
+]
+
+
+def _feed_all(parser: JSONArrayStream, text: str, size: int) -> list:
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return items
+
+
+class TestJSONArrayStream:
+    """Test incremental parsing."""
+
+    @pytest.mark.parametrize("size", [1, 2, 7, 64, 10000])
+    def test_any_split(self, size):
+        """Test that the same elements come out however the text is split."""
+        text = "```json\n" + json.dumps(CARDS, ensure_ascii=False, indent=2) + "\n```"
+        parser = JSONArrayStream()
+
+        assert _feed_all(parser, text, size) == CARDS
+        assert parser.done
+
+    def test_element_available_before_array_ends(self):
+        """Test that an object is returned as soon as its closing brace arrives."""
+        parser = JSONArrayStream()
+
+        assert parser.feed('Aquí están: [{"question": "q1", "answer": "a1"}') == [{"question": "q1", "answer": "a1"}]
+        assert parser.feed(', {"question": "q2"') == []
+        assert not parser.done
+        assert parser.feed(', "answer": "a2"}]') == [{"question": "q2", "answer": "a2"}]
+        assert parser.done
+
+    def test_wrapping_object(self):
+        """Test that the array inside {"flashcards": [...]} is found."""
+        parser = JSONArrayStream()
+
+        assert parser.feed('{"flashcards": [{"question": "q"}]}') == [{"question": "q"}]
+
+    def test_ignores_text_after_array(self):
+        """Test that nothing is parsed after the closing bracket."""
+        parser = JSONArrayStream()
+        parser.feed('[{"question": "q"}]')
+
+        assert parser.feed(' y otra cosa [{"question": "x"}]') == []
+
+    def test_skips_malformed_element(self):
+        """Test that an invalid element is skipped and parsing continues."""
+        parser = JSONArrayStream()
+
+        items = parser.feed('[{"question": "q1", oops}, {"question": "q2"}]')
+
+        assert items == [{"question": "q2"}]
@@ -0,0 +1,276 @@
+"""
+Tests for the rate-limited, retrying model API client.
+
+The client talks to a local fake Messages API (an httpx mock transport
+behind the real SDK), so status codes, headers and SSE streams go through
+the same code paths as in production.
+
+Tests cover:
+- Token bucket pacing
+- Circuit breaker states
+- Retries of 429/5xx with backoff, and no retries of client errors
+- Process-wide concurrency limit
+- Streaming requests and token metrics
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from anthropic import AsyncAnthropic, BadRequestError, RateLimitError
+
+from app.services.llm_client import (
+    TOKENS,
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMClient,
+    TokenBucket,
+)
+
+REQUEST = {
+    "model": "test-model",
+    "max_tokens": 100,
+    "messages": [{"role": "user", "content": "Genera flashcards"}],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _message(text: str = "[]", input_tokens: int = 12, output_tokens: int = 7) -> dict:
+    return {
+        "id": "msg_test",
+        "type": "message",
+        "role": "assistant",
+        "model": "test-model",
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+    }
+
+
+def _error(status_code: int, headers: dict = None) -> httpx.Response:
+    body = {"type": "error", "error": {"type": "api_error", "message": f"status {status_code}"}}
+    return httpx.Response(status_code, json=body, headers=headers or {})
+
+
+def _sse(text: str) -> httpx.Response:
+    events = [
+        ("message_start", {"type": "message_start", "message": {**_message(""), "content": []}}),
+        ("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}),
+        ("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}}),
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": 9}}),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+    body = "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events)
+    return httpx.Response(200, content=body.encode(), headers={"content-type": "text/event-stream"})
+
+
+def _client(handler) -> LLMClient:
+    """LLMClient in front of a fake API answering with handler(request)."""
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = LLMClient(AsyncAnthropic(
+        api_key="test-key", base_url="http://fake-anthropic", max_retries=0, http_client=http_client
+    ))
+    client.retry_base_seconds = 0.0  # No waiting between retries
+    return client
+
+
+class TestTokenBucket:
+    """Test request and token pacing."""
+
+    def test_allows_burst_then_waits(self):
+        """Test that a full minute's worth passes at once, then callers wait for refill."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)  # One per second
+
+        assert all(bucket.try_acquire() == 0 for _ in range(60))
+        assert bucket.try_acquire() == pytest.approx(1.0)
+
+        clock.now += 2
+        assert bucket.try_acquire() == 0
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        """Test that a request larger than the bucket is not blocked forever."""
+        clock = FakeClock()
+        bucket = TokenBucket(600, clock=clock)
+
+        assert bucket.try_acquire(5000) == 0
+        assert bucket.try_acquire(5000) == pytest.approx(60.0)
+
+    def test_zero_rate_is_unlimited(self):
+        """Test that a rate of 0 disables the limit."""
+        bucket = TokenBucket(0)
+        assert all(bucket.try_acquire(10 ** 6) == 0 for _ in range(100))
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the threshold of consecutive failures opens the circuit."""
+        breaker = CircuitBreaker(3, 30, clock=FakeClock())
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.before_call()
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_success_resets_failure_count(self):
+        """Test that failures must be consecutive."""
+        breaker = CircuitBreaker(2, 30, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+    def test_half_open_trial(self):
+        """Test that one trial call passes after the reset time and decides the state."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 30, clock=clock)
+        breaker.record_failure()
+
+        clock.now += 31
+        breaker.before_call()
+        assert breaker.state == "half_open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # Only one trial at a time
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        clock.now += 31
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        breaker.before_call()
+
+
+class TestRetries:
+    """Test retries against the fake API."""
+
+    async def test_retries_rate_limits_and_server_errors(self):
+        """Test that 429 and 529 responses are retried until the call succeeds."""
+        responses = [_error(429), _error(529), httpx.Response(200, json=_message("[1]"))]
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return responses[len(requests) - 1]
+
+        client = _client(handler)
+        message = await client.messages.create(**REQUEST)
+
+        assert message.content[0].text == "[1]"
+        assert len(requests) == 3
+        assert requests[0]["model"] == "test-model"
+
+    async def test_client_errors_are_not_retried(self):
+        """Test that a 400 fails at once and does not count against the circuit."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return _error(400)
+
+        client = _client(handler)
+        with pytest.raises(BadRequestError):
+            await client.create(**REQUEST)
+
+        assert len(calls) == 1
+        assert client.breaker.state == "closed"
+
+    async def test_gives_up_and_opens_circuit(self):
+        """Test that exhausted retries raise and repeated failures stop further calls."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return _error(429)
+
+        client = _client(handler)
+        client.max_retries = 2
+        client.breaker = CircuitBreaker(3, 30)
+
+        with pytest.raises(RateLimitError):
+            await client.create(**REQUEST)
+        assert len(calls) == 3
+        assert client.breaker.state == "open"
+
+        with pytest.raises(CircuitOpenError):
+            await client.create(**REQUEST)
+        assert len(calls) == 3  # Rejected without calling the API
+
+    def test_backoff_respects_retry_after(self):
+        """Test that jittered backoff grows with attempts and honors retry-after."""
+        client = _client(lambda request: _error(500))
+        client.retry_base_seconds = 1.0
+        client.retry_max_seconds = 8.0
+
+        assert all(0 <= client.backoff(attempt) <= min(8.0, 2 ** attempt) for attempt in range(6))
+        assert client.backoff(0, retry_after=5.0) >= 5.0
+
+
+class TestConcurrencyLimit:
+    """Test the limit on requests in flight."""
+
+    async def test_limits_requests_in_flight(self):
+        """Test that no more than max_concurrency requests reach the API at once."""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=_message())
+
+        client = _client(handler)
+        client.max_concurrency = 2
+
+        await asyncio.gather(*(client.create(**REQUEST) for _ in range(6)))
+
+        assert peak == 2
+
+
+class TestStreaming:
+    """Test streaming requests and metrics."""
+
+    async def test_stream_retries_before_response_starts(self):
+        """Test that a failed stream open is retried and text arrives from the retry."""
+        responses = [_error(503), _sse('[{"question": "Q", "answer": "A"}]')]
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return responses[len(calls) - 1]
+
+        client = _client(handler)
+        async with client.messages.stream(**REQUEST) as stream:
+            text = "".join([delta async for delta in stream.text_stream])
+
+        assert json.loads(text) == [{"question": "Q", "answer": "A"}]
+        assert len(calls) == 2
+
+    async def test_records_token_usage(self):
+        """Test that reported input and output tokens are counted per model."""
+        client = _client(lambda request: httpx.Response(200, json=_message(input_tokens=30, output_tokens=11)))
+        before = TOKENS.value(model="test-model", kind="input"), TOKENS.value(model="test-model", kind="output")
+
+        await client.create(**REQUEST)
+
+        assert TOKENS.value(model="test-model", kind="input") == before[0] + 30
+        assert TOKENS.value(model="test-model", kind="output") == before[1] + 11
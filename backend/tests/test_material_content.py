@@ -0,0 +1,106 @@
+"""
+Tests for the content-addressed material text store.
+
+Tests cover:
+- Hashing of pasted text (whitespace-insensitive)
+- Resolution of material text from shared or inline storage
+- Page offsets and page range reads
+"""
+
+import hashlib
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.material_content import MaterialContent
+from app.models.study_material import StudyMaterial
+from app.services.material_content import MaterialContentStore, check_page_range, text_content_hash
+from app.services.pdf_service import PDFService
+
+
+class TestTextContentHash:
+    """Test pasted-text hashing."""
+
+    def test_whitespace_differences_match(self):
+        """Test that wrapping and indentation do not change the hash."""
+        assert text_content_hash("The mitochondria\nis the  powerhouse") == text_content_hash(
+            "  The mitochondria is the\r\n\tpowerhouse \n"
+        )
+
+    def test_is_sha256_of_normalized_text(self):
+        """Test that the key is the hex SHA-256 of the normalized text."""
+        assert text_content_hash("a  b\nc") == hashlib.sha256(b"a b c").hexdigest()
+
+    def test_different_text_differs(self):
+        """Test that different words give different hashes."""
+        assert text_content_hash("cell wall") != text_content_hash("cell walls")
+
+
+class TestMaterialText:
+    """Test StudyMaterial.extracted_text resolution."""
+
+    def test_shared_content_preferred(self):
+        """Test that referenced content is returned instead of the inline copy."""
+        content = MaterialContent(content_hash="ab" * 32, source="pdf", extracted_text="Shared text", word_count=2)
+        material = StudyMaterial(filename="notes.pdf", content=content)
+
+        assert material.extracted_text == "Shared text"
+
+    def test_inline_text_for_legacy_materials(self):
+        """Test that materials without content keep using their own text."""
+        material = StudyMaterial(filename="old.pdf", extracted_text="Legacy text")
+
+        assert material.inline_text == "Legacy text"
+        assert material.extracted_text == "Legacy text"
+
+    def test_pending_material_is_empty(self):
+        """Test that a material without any text yet reads as empty."""
+        assert StudyMaterial(filename="pending.pdf").extracted_text == ""
+
+
+class TestPageIndex:
+    """Test per-page offsets and page range reads."""
+
+    def test_offsets_slice_pages(self):
+        """Test that offsets recover each page, with empty pages zero-length."""
+        pages = ["First page\nline", None, "", "Last page\n"]
+
+        document = PDFService().assemble_pages(pages)
+        text, offsets = document.text, document.page_offsets
+
+        assert text == "First page\nline\nLast page"
+        assert len(offsets) == len(pages) + 1
+        assert [text[offsets[i]:offsets[i + 1]].lstrip("\n") for i in range(len(pages))] == [
+            "First page\nline", "", "", "Last page"
+        ]
+
+    def test_matches_whole_document_cleaning(self):
+        """Test that per-page assembly gives the same text as assemble_text."""
+        pages = ["a\n\n\n\nb", "  c  ", None, "d"]
+
+        assert PDFService().assemble_pages(pages).text == PDFService().assemble_text(pages)
+
+    def test_check_page_range(self):
+        """Test page range validation against the page index."""
+        offsets = [0, 10, 20, 30]
+
+        check_page_range(offsets, 1, 3)
+        with pytest.raises(ValueError, match="only available"):
+            check_page_range(None, 1, 1)
+        with pytest.raises(ValueError, match="3 pages"):
+            check_page_range(offsets, 2, 4)
+        with pytest.raises(ValueError):
+            check_page_range(offsets, 3, 2)
+
+    def test_read_pages_fetches_only_the_span(self):
+        """Test that only the requested characters are selected and split by page."""
+        document = PDFService().assemble_pages(["one", "two", "three", "four"])
+        text, offsets = document.text, document.page_offsets
+        db = MagicMock()
+        db.execute.return_value.scalar_one.side_effect = lambda: text[offsets[1]:offsets[3]]
+
+        pages = MaterialContentStore().read_pages(db, "ab" * 32, offsets, 2, 3)
+
+        assert pages == ["two", "three"]
+        statement = str(db.execute.call_args[0][0].compile(compile_kwargs={"literal_binds": True}))
+        assert f"substr(material_contents.extracted_text, {offsets[1] + 1}, {offsets[3] - offsets[1]})" in statement
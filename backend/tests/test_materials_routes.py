@@ -0,0 +1,209 @@
+"""
+Tests for materials route helpers.
+
+Tests cover:
+- HTTP byte range parsing for the text endpoint
+- Deferred loading of the text column and list summaries
+- Grouped flashcard counts
+- Material flashcards query and keyset cursors
+- Uploads refused by a full ingestion queue
+"""
+
+import uuid
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+from app.models.study_material import StudyMaterial
+from app.routes import materials
+from app.routes.materials import (
+    _active_flashcard_counts,
+    _decode_flashcard_cursor,
+    _encode_flashcard_cursor,
+    _material_flashcard,
+    _material_flashcards_query,
+    _material_summary,
+    _parse_byte_range,
+    upload_material,
+)
+from app.services.ingestion import IngestionQueueFullError
+
+
+class TestParseByteRange:
+    """Test Range header parsing."""
+
+    @pytest.mark.parametrize("header,expected", [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-200", (800, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+    ])
+    def test_single_ranges(self, header, expected):
+        """Test explicit, open-ended and suffix ranges (clamped to the text)."""
+        assert _parse_byte_range(header, 1000) == expected
+
+    @pytest.mark.parametrize("header", ["items=0-10", "bytes=0-10,20-30", "bytes=abc-", "bytes=50-10", "bytes"])
+    def test_ignored_ranges(self, header):
+        """Test that unsupported or malformed ranges fall back to the full text."""
+        assert _parse_byte_range(header, 1000) is None
+
+    @pytest.mark.parametrize("header,total", [("bytes=1000-", 1000), ("bytes=0-10", 0)])
+    def test_unsatisfiable(self, header, total):
+        """Test that ranges past the end are rejected."""
+        with pytest.raises(ValueError):
+            _parse_byte_range(header, total)
+
+
+class TestMaterialSummary:
+    """Test list view projection."""
+
+    def test_text_column_is_deferred(self):
+        """Test that loading a material does not select its inline text."""
+        assert inspect(StudyMaterial).attrs.inline_text.deferred
+
+    def test_summary_has_no_text(self):
+        """Test that summaries carry the excerpt but not the full text."""
+        material = StudyMaterial(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            filename="notes.pdf",
+            word_count=1200,
+            tags=["bio"],
+            status="completed",
+            created_at=datetime.now(timezone.utc),
+        )
+
+        summary = _material_summary(material, flashcard_count=4, page_count=12, excerpt="Cells are")
+
+        data = summary.model_dump()
+        assert "extracted_text" not in data
+        assert data["excerpt"] == "Cells are"
+        assert data["page_count"] == 12
+        assert data["flashcard_count"] == 4
+
+
+class TestActiveFlashcardCounts:
+    """Test per-page flashcard counting."""
+
+    def test_single_grouped_query(self, monkeypatch):
+        """Test that a whole page of materials is counted with one GROUP BY query."""
+        material_ids = [uuid.uuid4() for _ in range(20)]
+        statements = []
+
+        def fake_all(query):
+            statements.append(str(query.statement.compile(dialect=postgresql.dialect())))
+            return [(material_ids[0], 3)]
+
+        monkeypatch.setattr(Query, "all", fake_all)
+
+        # Real query builder, never executed
+        counts = _active_flashcard_counts(Session(), material_ids)
+
+        assert counts == {material_ids[0]: 3}
+        assert len(statements) == 1
+        assert "GROUP BY flashcards.material_id" in statements[0]
+        assert "flashcards.material_id IN" in statements[0]
+
+    def test_empty_page_skips_query(self):
+        """Test that no query runs for an empty page."""
+        db = MagicMock()
+
+        assert _active_flashcard_counts(db, []) == {}
+        db.query.assert_not_called()
+
+
+class TestMaterialFlashcards:
+    """Test the material flashcards query and cursors."""
+
+    def _compile(self, query) -> str:
+        return str(query.compile(dialect=postgresql.dialect()))
+
+    def test_single_joined_query(self):
+        """Test that cards and stats come from one LEFT JOIN, without loading full rows."""
+        sql = self._compile(_material_flashcards_query(uuid.uuid4(), uuid.uuid4(), "created"))
+
+        assert sql.count("SELECT") == 1
+        assert "LEFT OUTER JOIN card_stats" in sql
+        assert "flashcards.answer" in sql
+        assert "flashcards.user_id," not in sql
+        assert "ORDER BY flashcards.created_at, flashcards.id" in sql
+
+    def test_keyset_predicate(self):
+        """Test that a cursor position becomes a row comparison, not an OFFSET."""
+        after = (2, uuid.uuid4())
+        sql = self._compile(_material_flashcards_query(uuid.uuid4(), uuid.uuid4(), "mastery", after))
+
+        assert "OFFSET" not in sql
+        assert "CASE" in sql
+        assert ") > (" in sql
+
+    @pytest.mark.parametrize("order,key", [
+        ("created", datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+        ("due", date(2024, 6, 2)),
+        ("mastery", 3),
+    ])
+    def test_cursor_round_trip(self, order, key):
+        """Test that a cursor decodes to the sort key and id of the last row."""
+        row = SimpleNamespace(sort_key=key, id=uuid.uuid4())
+
+        assert _decode_flashcard_cursor(_encode_flashcard_cursor(order, row), order) == (key, row.id)
+
+    def test_cursor_for_other_order_rejected(self):
+        """Test that a cursor cannot be reused with a different order."""
+        cursor = _encode_flashcard_cursor("mastery", SimpleNamespace(sort_key=1, id=uuid.uuid4()))
+
+        with pytest.raises(ValueError):
+            _decode_flashcard_cursor(cursor, "due")
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", "WyJkdWUiLCAxLCAiMiJd"])
+    def test_malformed_cursor_rejected(self, cursor):
+        """Test that garbage cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            _decode_flashcard_cursor(cursor, "due")
+
+    def test_card_without_stats_gets_defaults(self):
+        """Test that unreviewed cards (NULL stats columns) report as new."""
+        row = SimpleNamespace(
+            id=uuid.uuid4(), question="Q", answer="A", explanation=None, difficulty=3,
+            tags=None, status="active", material_id=uuid.uuid4(), created_at=None,
+            mastery_level=None, total_reviews=None, due_date=None, sort_key=None
+        )
+
+        card = _material_flashcard(row)
+
+        assert card.tags == []
+        assert card.stats.mastery_level == "new"
+        assert card.stats.total_reviews == 0
+
+
+class TestUploadQueueFull:
+    """Test an upload refused after the capacity pre-check."""
+
+    async def test_refused_upload_leaves_no_material(self, monkeypatch):
+        """Test that a 503 from a full queue deletes the material and does not count the upload."""
+        def enqueue(job):
+            raise IngestionQueueFullError()
+
+        monkeypatch.setattr(materials.ingestion_service, "has_capacity", lambda: True)
+        monkeypatch.setattr(materials.ingestion_service, "enqueue", enqueue)
+        monkeypatch.setattr(materials.material_content_store, "get", lambda db, content_hash: None)
+        db = MagicMock()
+
+        with pytest.raises(HTTPException) as error:
+            await upload_material(
+                file=None, text="La fotosíntesis convierte la luz en energía química. " * 3,
+                filename="notas.txt", subject_category=None, tags=None,
+                user_id=str(uuid.uuid4()), db=db
+            )
+
+        assert error.value.status_code == 503
+        material = db.add.call_args.args[0]
+        db.delete.assert_called_once_with(material)
+        db.query.assert_not_called()  # User stats untouched
@@ -6,11 +6,14 @@ Tests cover:
 - Malformed JSON handling
 - API timeout/error handling
 - Validation
+- Streaming generation (cards yielded as the JSON array arrives)
+- Model routing and max_tokens sizing by request size
 """
 
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
-from app.services.openai_service import OpenAIService, openai_service
+from app.config import settings
+from app.services.openai_service import ROUTES, OpenAIService, openai_service
 
 
 class TestOpenAIServiceSuccess:
@@ -396,3 +399,156 @@ class TestOpenAIServicePromptBuilding:
         )
 
         assert "Biology" in prompt
+
+
+class _FakeMessageStream:
+    """Async context manager standing in for client.messages.stream()."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        for piece in self.pieces:
+            yield piece
+
+
+class TestOpenAIServiceStreaming:
+    """Test streaming generation."""
+
+    def _service(self, pieces):
+        service = OpenAIService()
+        service.client = Mock()
+        service.client.messages.stream = Mock(return_value=_FakeMessageStream(pieces))
+        return service
+
+    async def test_yields_cards_as_objects_close(self):
+        """Test that each card is yielded (normalized) as soon as its object is complete."""
+        service = self._service([
+            '```json\n[{"question": " Q1 ", "answer": "A1", "difficulty": 9}',
+            ', {"question": "Q2", "ans',
+            'wer": "A2"}]\n```',
+        ])
+        received = []
+
+        async for card in service.stream_flashcards("Photosynthesis text " * 10, count=2, ai_confidence=0.85):
+            received.append(card)
+            if len(received) == 1:
+                # Second object has not been parsed yet
+                assert card["question"] == "Q1"
+
+        assert [card["question"] for card in received] == ["Q1", "Q2"]
+        assert received[0]["difficulty"] == 5
+        assert received[1]["ai_confidence"] == 0.85
+
+    async def test_skips_invalid_cards(self):
+        """Test that objects without question or answer are skipped."""
+        service = self._service(['[{"question": "Q1"}, {"question": "Q2", "answer": "A2"}]'])
+
+        cards = [card async for card in service.stream_flashcards("Photosynthesis text " * 10, count=2)]
+
+        assert [card["question"] for card in cards] == ["Q2"]
+
+    async def test_no_valid_cards_raises(self):
+        """Test that a response without any valid card raises."""
+        service = self._service(["I cannot help with that."])
+
+        with pytest.raises(Exception, match="No valid flashcards"):
+            [card async for card in service.stream_flashcards("Photosynthesis text " * 10, count=2)]
+
+    async def test_requires_api_key(self):
+        """Test that streaming without a client raises ValueError before any request."""
+        service = OpenAIService()
+        service.client = None
+
+        with pytest.raises(ValueError, match="API key"):
+            [card async for card in service.stream_flashcards("Photosynthesis text " * 10, count=2)]
+
+
+class TestModelRouting:
+    """Test model tier and max_tokens selection."""
+
+    @pytest.fixture(autouse=True)
+    def routing_settings(self, monkeypatch):
+        monkeypatch.setattr(settings, "ANTHROPIC_FAST_MAX_INPUT_TOKENS", 1000)
+        monkeypatch.setattr(settings, "ANTHROPIC_FAST_MAX_CARDS", 20)
+        monkeypatch.setattr(settings, "ANTHROPIC_OUTPUT_TOKENS_PER_CARD", 100)
+
+    def _service(self):
+        service = OpenAIService()
+        service.model = "large-model"
+        service.max_tokens = 16000
+        service.fast_model = "fast-model"
+        service.fast_max_tokens = 8000
+        return service
+
+    def test_small_request_uses_fast_model(self):
+        """Test that a short text asking for few cards goes to the fast tier with a fitted max_tokens."""
+        route = self._service().route("Photosynthesis text " * 10, count=5)
+
+        assert (route.tier, route.model) == ("fast", "fast-model")
+        assert route.max_tokens == 1024  # Floor: 5 cards * 100 * 1.5 + 100 is less
+
+    def test_max_tokens_has_safety_margin(self):
+        """Test that max_tokens leaves room beyond the per-card estimate."""
+        route = self._service().route("Photosynthesis text " * 10, count=20)
+
+        assert route.max_tokens == 20 * 100 * 1.5 + 100
+
+    def test_long_input_uses_large_model(self):
+        """Test that long texts and large card counts stay on the large model."""
+        service = self._service()
+
+        assert service.route("x" * 10000, count=5).model == "large-model"
+        assert service.route("Photosynthesis text " * 10, count=50).model == "large-model"
+
+    def test_max_tokens_capped_by_tier(self):
+        """Test that max_tokens never exceeds the tier's cap."""
+        route = self._service().route("x" * 10000, count=200)
+
+        assert route.max_tokens == 16000
+        assert route.output_tokens > route.max_tokens
+
+    def test_no_fast_model_always_large(self):
+        """Test that an empty fast model disables routing."""
+        service = self._service()
+        service.fast_model = ""
+
+        assert service.route("Photosynthesis text " * 10, count=2).model == "large-model"
+
+    async def test_request_uses_route(self):
+        """Test that the API call gets the routed model and max_tokens, and the decision is counted."""
+        service = self._service()
+        service.client = Mock()
+        service.client.messages.stream = Mock(return_value=_FakeMessageStream(['[{"question": "Q", "answer": "A"}]']))
+        before = ROUTES.value(tier="fast", model="fast-model")
+
+        cards = [card async for card in service.stream_flashcards("Photosynthesis text " * 10, count=3)]
+
+        assert len(cards) == 1
+        request = service.client.messages.stream.call_args.kwargs
+        assert request["model"] == "fast-model"
+        assert request["max_tokens"] == 1024
+        assert ROUTES.value(tier="fast", model="fast-model") == before + 1
+
+    async def test_truncated_response_keeps_complete_cards(self):
+        """Test that a response cut off by max_tokens yields the cards completed before the cut."""
+        service = self._service()
+        response = Mock()
+        response.stop_reason = "max_tokens"
+        response.content = [Mock(text=(
+            '```json\n[\n  {"question": "Q1", "answer": "A1", "difficulty": 2},\n'
+            '  {"question": "Q2", "answer": "A2"},\n  {"question": "Q3", "ans'
+        ))]
+        service.client = Mock()
+        service.client.messages.create = AsyncMock(return_value=response)
+
+        cards = await service.generate_flashcards("Photosynthesis text " * 10, count=5)
+
+        assert [card["question"] for card in cards] == ["Q1", "Q2"]
@@ -0,0 +1,171 @@
+"""
+Tests for the PDF extraction process pool and metrics registry.
+
+Tests cover:
+- Extraction in a worker process from a file handle
+- Invalid PDFs surfacing as ValueError
+- Inline (thread) mode
+- Parallel page-range extraction
+- Retrying jobs broken by a pool restart, failing only the job at fault
+- Prometheus text rendering
+"""
+
+import asyncio
+import io
+import os
+import time
+
+import pytest
+
+from app.services import pdf_extraction_pool
+from app.services.pdf_extraction_pool import (
+    BROKEN_RETRIES,
+    JOBS,
+    PARALLEL_DOCUMENTS,
+    ExtractionMemoryError,
+    ExtractionTimeoutError,
+    PDFExtractionPool,
+    split_page_ranges,
+)
+from app.utils.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def pool():
+    extraction_pool = PDFExtractionPool()
+    extraction_pool.workers = 1
+    yield extraction_pool
+    extraction_pool.shutdown()
+
+
+class TestPDFExtractionPool:
+    """Test extraction in worker processes."""
+
+    async def test_extracts_in_worker_process(self, pool, make_pdf):
+        """Test that text comes back from the worker process."""
+        text = await pool.extract_text(io.BytesIO(make_pdf(["Hola mundo", "Adios"])))
+
+        assert text == "Hola mundo\nAdios"
+
+    async def test_invalid_pdf_is_value_error(self, pool):
+        """Test that worker-side validation errors reach the caller as ValueError."""
+        failures_before = JOBS.value(outcome="invalid")
+
+        with pytest.raises(ValueError):
+            await pool.extract_text(io.BytesIO(b"not a pdf" * 50))
+
+        assert JOBS.value(outcome="invalid") == failures_before + 1
+
+    async def test_inline_mode(self, make_pdf):
+        """Test that PDF_WORKERS=0 extracts in a thread."""
+        inline_pool = PDFExtractionPool()
+        inline_pool.workers = 0
+
+        text = await inline_pool.extract_text(io.BytesIO(make_pdf(["Solo una pagina"])))
+
+        assert text == "Solo una pagina"
+
+
+class TestParallelRanges:
+    """Test page-range splitting and parallel extraction."""
+
+    def test_split_page_ranges(self):
+        """Test that ranges are contiguous, cover every page and differ by at most one."""
+        assert split_page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+        assert split_page_ranges(2, 4) == [(0, 1), (1, 2)]
+        assert split_page_ranges(5, 1) == [(0, 5)]
+
+    async def test_large_pdf_reassembled_in_order(self, make_pdf):
+        """Test that pages extracted in parallel come back in page order."""
+        extraction_pool = PDFExtractionPool()
+        extraction_pool.workers = 2
+        extraction_pool.range_workers = 3
+        extraction_pool.parallel_page_threshold = 5
+        parallel_before = PARALLEL_DOCUMENTS.value()
+
+        pages = [f"Pagina {i}" for i in range(9)]
+        try:
+            text = await extraction_pool.extract_text(io.BytesIO(make_pdf(pages)))
+        finally:
+            extraction_pool.shutdown()
+
+        assert text.split("\n") == pages
+        assert PARALLEL_DOCUMENTS.value() == parallel_before + 1
+
+
+def _sleep_job(seconds: float) -> str:
+    time.sleep(seconds)
+    return "done"
+
+
+def _exit_job(marker: str) -> str:
+    """Kill the worker process the first time (as the OS would on OOM), succeed afterwards."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return "done"
+
+
+def _always_exit_job() -> str:
+    os._exit(1)
+
+
+class TestPoolFailures:
+    """Test that a broken pool fails only the job at fault."""
+
+    async def test_dead_worker_job_retried_once(self, pool, tmp_path):
+        """Test that a job whose worker died is retried on a fresh pool."""
+        retries_before = BROKEN_RETRIES.value()
+
+        assert await pool._run(_exit_job, str(tmp_path / "died")) == "done"
+        assert BROKEN_RETRIES.value() == retries_before + 1
+
+    async def test_repeated_worker_death_is_memory_error(self, pool):
+        """Test that a job that breaks the pool again on retry fails."""
+        with pytest.raises(ExtractionMemoryError):
+            await pool._run(_always_exit_job)
+
+    async def test_timeout_does_not_fail_other_jobs(self, pool, monkeypatch):
+        """Test that killing the pool for a stuck job retries the other jobs in flight."""
+        monkeypatch.setattr(pdf_extraction_pool, "HARD_DEADLINE_GRACE_SECONDS", 0.5)
+        pool.workers = 2
+        pool.timeout_seconds = 2.0
+        await asyncio.gather(pool._run(_sleep_job, 0), pool._run(_sleep_job, 0))  # Spawn the workers
+
+        stuck = asyncio.create_task(pool._run(_sleep_job, 60))
+        await asyncio.sleep(2.0)
+        # Still running when the stuck job's hard deadline (2.5s) kills the pool
+        other = asyncio.create_task(pool._run(_sleep_job, 1.0))
+
+        with pytest.raises(ExtractionTimeoutError):
+            await stuck
+        assert await other == "done"
+
+
+class TestMetricsRegistry:
+    """Test metric rendering."""
+
+    def test_render_prometheus_text(self):
+        """Test counters with labels, callback gauges and histograms."""
+        registry = MetricsRegistry()
+        registry.counter("jobs_total", "Jobs").inc(outcome="ok")
+        registry.gauge("depth", "Depth", callback=lambda: 3)
+        histogram = registry.histogram("seconds", "Seconds", buckets=(1.0, 5.0))
+        histogram.observe(0.5)
+        histogram.observe(2.0)
+
+        text = registry.render()
+
+        assert 'jobs_total{outcome="ok"} 1' in text
+        assert "depth 3" in text
+        assert 'seconds_bucket{le="1"} 1' in text
+        assert 'seconds_bucket{le="+Inf"} 2' in text
+        assert "seconds_count 2" in text
+
+    def test_register_twice_returns_same_metric(self):
+        """Test that modules can re-register a metric by name."""
+        registry = MetricsRegistry()
+
+        assert registry.counter("a", "A") is registry.counter("a", "A")
+        with pytest.raises(ValueError):
+            registry.gauge("a", "A")
@@ -0,0 +1,132 @@
+"""
+Tests for the review analytics engine.
+
+Tests cover:
+- Retention per interval bucket and lapse rate
+- Weekly rating distribution
+- Time-per-card percentiles
+- Cache invalidation by fingerprint
+- Performance on 1M reviews
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.services.review_analytics import (
+    AnalyticsCache,
+    ReviewColumns,
+    compute_review_analytics,
+)
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _columns(ratings, intervals, times, days_ago):
+    return ReviewColumns(
+        rating=np.array(ratings, dtype=np.int8),
+        previous_interval=np.array(intervals, dtype=np.int32),
+        time_spent=np.array(times, dtype=np.int32),
+        reviewed_at=np.array([(NOW - timedelta(days=d)).timestamp() for d in days_ago]),
+    )
+
+
+class TestReviewAnalytics:
+    """Test analytics computations."""
+
+    def test_retention_and_lapse_rate(self):
+        """Test retention buckets and review-phase lapse rate."""
+        columns = _columns(
+            ratings=[1, 3, 4, 1, 2, 3],
+            intervals=[0, 0, 3, 3, 3, 40],
+            times=[5, 6, 7, 8, 9, 10],
+            days_ago=[1, 1, 2, 2, 3, 3],
+        )
+
+        result = compute_review_analytics(columns, weeks=4, now=NOW)
+        buckets = {b["label"]: b for b in result["retention_by_interval"]}
+
+        assert result["total_reviews"] == 6
+        assert buckets["0d"]["reviews"] == 2
+        assert buckets["0d"]["retention"] == 0.5
+        assert buckets["2-3d"]["reviews"] == 3
+        assert buckets["2-3d"]["recalled"] == 2
+        assert buckets["31-90d"]["retention"] == 1.0
+        assert buckets["181d+"]["retention"] is None
+        # Review phase = previous interval >= 1: ratings 4, 1, 2, 3
+        assert result["lapse_rate"] == 0.25
+        assert result["true_retention"] == 0.75
+
+    def test_weekly_rating_distribution(self):
+        """Test that reviews land in the right week, oldest week first."""
+        columns = _columns(
+            ratings=[4, 4, 1, 3],
+            intervals=[1, 1, 1, 1],
+            times=[-1, -1, -1, -1],
+            days_ago=[0, 6, 8, 100],
+        )
+
+        result = compute_review_analytics(columns, weeks=2, now=NOW)
+        weeks = result["rating_distribution"]
+
+        assert len(weeks) == 2
+        assert weeks[1]["easy"] == 2
+        assert weeks[0]["again"] == 1
+        assert weeks[0]["good"] == 0  # 100 days ago is outside the window
+        assert result["time_per_card_seconds"] is None
+
+    def test_time_percentiles_ignore_missing(self):
+        """Test that missing time values are excluded from percentiles."""
+        columns = _columns(
+            ratings=[3] * 5,
+            intervals=[1] * 5,
+            times=[10, 20, 30, 40, -1],
+            days_ago=[1] * 5,
+        )
+
+        result = compute_review_analytics(columns, now=NOW)
+
+        assert result["time_per_card_seconds"]["p50"] == 25.0
+        assert result["time_per_card_seconds"]["mean"] == 25.0
+
+    def test_million_reviews_is_fast(self):
+        """Test that computing over 1M reviews stays well under a second."""
+        rng = np.random.default_rng(42)
+        n = 1_000_000
+        columns = ReviewColumns(
+            rating=rng.integers(1, 5, n).astype(np.int8),
+            previous_interval=rng.integers(-1, 365, n).astype(np.int32),
+            time_spent=rng.integers(-1, 120, n).astype(np.int32),
+            reviewed_at=NOW.timestamp() - rng.uniform(0, 400 * 86400, n),
+        )
+
+        started = time.perf_counter()
+        result = compute_review_analytics(columns, weeks=52, now=NOW)
+        elapsed = time.perf_counter() - started
+
+        assert result["total_reviews"] == n
+        assert elapsed < 1.0
+
+
+class TestAnalyticsCache:
+    """Test analytics result cache."""
+
+    def test_fingerprint_change_is_a_miss(self):
+        """Test that a newer fingerprint invalidates the cached result."""
+        cache = AnalyticsCache(max_entries=2)
+        cache.put("user", "t1", {"total_reviews": 1})
+
+        assert cache.get("user", "t1") == {"total_reviews": 1}
+        assert cache.get("user", "t2") is None
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = AnalyticsCache(max_entries=2)
+        cache.put("a", 1, {})
+        cache.put("b", 1, {})
+        cache.get("a", 1)
+        cache.put("c", 1, {})
+
+        assert cache.get("b", 1) is None
+        assert cache.get("a", 1) == {}
@@ -0,0 +1,96 @@
+"""
+Tests for review log partition helpers and columnar archives.
+
+Tests cover:
+- Month arithmetic and partition naming
+- Archive write/read round trip
+- Filtering archived reviews by user and month
+"""
+
+import uuid
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from app.services.review_partitions import (
+    add_months,
+    month_start,
+    partition_name,
+    parse_partition_month,
+    rows_to_columns,
+    write_archive,
+    read_archive,
+    archive_path,
+    iter_archived_reviews,
+    uuid_from_bytes,
+)
+
+
+def _review_row(user_id, reviewed_at, rating=3, session_id=None, time_spent=12):
+    return (
+        uuid.uuid4(), uuid.uuid4(), user_id, rating,
+        3, 7, 2.5, 2.6, time_spent, date(2025, 1, 20), session_id, reviewed_at,
+    )
+
+
+class TestPartitionNaming:
+    """Test month helpers and partition names."""
+
+    def test_month_arithmetic(self):
+        """Test adding months across year boundaries."""
+        assert month_start(date(2025, 11, 23)) == date(2025, 11, 1)
+        assert add_months(date(2025, 11, 1), 2) == date(2026, 1, 1)
+        assert add_months(date(2025, 1, 15), -1) == date(2024, 12, 1)
+
+    def test_partition_name_round_trip(self):
+        """Test that partition names parse back to their month."""
+        name = partition_name(date(2025, 3, 1))
+
+        assert name == "card_reviews_2025_03"
+        assert parse_partition_month(name) == date(2025, 3, 1)
+        assert parse_partition_month("card_reviews_default") is None
+
+
+class TestReviewArchive:
+    """Test columnar archive files."""
+
+    def test_archive_round_trip_preserves_values_and_nulls(self, tmp_path):
+        """Test that archived columns read back with null markers intact."""
+        user_id = uuid.uuid4()
+        session_id = uuid.uuid4()
+        reviewed = datetime(2025, 1, 10, 12, 30, tzinfo=timezone.utc)
+        rows = [
+            _review_row(user_id, reviewed, rating=1, session_id=session_id),
+            _review_row(user_id, reviewed, rating=4, time_spent=None),
+        ]
+
+        path = write_archive(tmp_path / "card_reviews_2025_01.npz", rows_to_columns(rows))
+        columns = read_archive(path)
+
+        assert columns["rating"].tolist() == [1, 4]
+        assert columns["time_spent_seconds"].tolist() == [12, -1]
+        assert uuid_from_bytes(columns["session_id"][0]) == session_id
+        assert uuid_from_bytes(columns["session_id"][1]) is None
+        assert uuid_from_bytes(columns["user_id"][0]) == user_id
+        assert columns["reviewed_at"][0] == np.datetime64("2025-01-10T12:30:00")
+
+    def test_iter_archived_reviews_filters_user_and_month(self, tmp_path):
+        """Test that the reader skips other users and months before `since`."""
+        user_id = uuid.uuid4()
+        other_user = uuid.uuid4()
+
+        for month in (date(2024, 12, 1), date(2025, 1, 1)):
+            reviewed = datetime(month.year, month.month, 5, tzinfo=timezone.utc)
+            rows = [_review_row(user_id, reviewed), _review_row(other_user, reviewed)]
+            write_archive(archive_path(month, str(tmp_path)), rows_to_columns(rows))
+
+        chunks = list(iter_archived_reviews(
+            user_id=user_id,
+            since=date(2025, 1, 3),
+            columns=["rating", "reviewed_at"],
+            archive_dir=str(tmp_path)
+        ))
+
+        assert len(chunks) == 1
+        assert set(chunks[0]) == {"rating", "reviewed_at"}
+        assert len(chunks[0]["rating"]) == 1
@@ -0,0 +1,114 @@
+"""
+Tests for full-text search.
+
+Tests cover:
+- Page query: tsvector matching, ranking and keyset predicate
+- Search cursors
+- Highlighting only the rows of the returned page
+"""
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Float
+from sqlalchemy.dialects import postgresql
+
+from app.services.search import SearchService, _decode_position, _encode_position
+
+
+def _compile(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestPageQuery:
+    """Test the ranked page query."""
+
+    def test_matches_both_kinds_in_one_query(self):
+        """Test that flashcards and materials are ranked together with a UNION ALL."""
+        sql = _compile(SearchService().page_query(uuid.uuid4(), "fotosíntesis"))
+
+        assert "UNION ALL" in sql
+        assert "flashcards.search_vector @@ websearch_to_tsquery('spanish'::regconfig" in sql
+        assert "material_contents.search_vector @@" in sql
+        assert "ORDER BY ranked.rank DESC, ranked.kind, ranked.id" in sql
+        # Snippets are not computed for every match
+        assert "ts_headline" not in sql
+
+    def test_single_kind(self):
+        """Test that restricting the kind leaves out the other table."""
+        sql = _compile(SearchService().page_query(uuid.uuid4(), "célula", kinds=("flashcard",)))
+
+        assert "UNION" not in sql
+        assert "study_materials" not in sql
+
+    def test_keyset_predicate(self):
+        """Test that later pages filter on the rank of the previous page, not an OFFSET."""
+        after = (0.25, "flashcard", uuid.uuid4())
+        sql = _compile(SearchService().page_query(uuid.uuid4(), "célula", after=after))
+
+        assert "ranked.rank <" in sql
+        assert "(ranked.kind, ranked.id) >" in sql
+        assert "OFFSET" not in sql
+
+    def test_rank_compared_as_double_precision(self):
+        """Test that ts_rank (real) is cast to the cursor's float type in every branch."""
+        after = (0.25, "flashcard", uuid.uuid4())
+        query = SearchService().page_query(uuid.uuid4(), "célula", after=after)
+        sql = _compile(query)
+
+        assert sql.count("CAST(ts_rank(") == 2
+        assert sql.count("AS FLOAT(53))") >= 2
+        rank_params = [
+            param for param in query.compile(dialect=postgresql.dialect()).binds.values()
+            if param.value == 0.25
+        ]
+        assert rank_params
+        assert all(isinstance(param.type, Float) and param.type.precision == 53 for param in rank_params)
+
+
+class TestSearchCursor:
+    """Test cursor encoding."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the position of the last row."""
+        row = SimpleNamespace(rank=0.0759909, kind="material", id=uuid.uuid4())
+
+        assert _decode_position(_encode_position(row)) == (0.0759909, "material", row.id)
+
+    @pytest.mark.parametrize("cursor", ["garbage", "WzEsInVzZXIiLCJ4Il0", "WyJ4IiwibWF0ZXJpYWwiLCJ4Il0"])
+    def test_invalid_cursor(self, cursor):
+        """Test that malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            _decode_position(cursor)
+
+
+class TestSearch:
+    """Test result assembly."""
+
+    def test_highlights_only_page_rows(self):
+        """Test that snippets are loaded for the page only and results keep rank order."""
+        card_id, material_id = uuid.uuid4(), uuid.uuid4()
+        page_rows = [
+            SimpleNamespace(kind="material", id=material_id, rank=0.5),
+            SimpleNamespace(kind="flashcard", id=card_id, rank=0.4),
+            SimpleNamespace(kind="flashcard", id=uuid.uuid4(), rank=0.3),  # Beyond the limit
+        ]
+        card = SimpleNamespace(id=card_id, question="¿Qué es?", material_id=material_id, snippet="<mark>x</mark>")
+        material = SimpleNamespace(id=material_id, filename="Biología.pdf", snippet="... <mark>x</mark>")
+
+        db = MagicMock()
+        page_result = MagicMock()
+        page_result.all.return_value = page_rows
+        db.execute.side_effect = [page_result, iter([card]), iter([material])]
+
+        page = SearchService().search(db, uuid.uuid4(), "x", limit=2)
+
+        assert [hit.kind for hit in page.hits] == ["material", "flashcard"]
+        assert page.hits[1].material_id == material_id
+        assert page.hits[0].title == "Biología.pdf"
+        assert _decode_position(page.next_cursor) == (0.4, "flashcard", card_id)
+
+        snippet_query = _compile(db.execute.call_args_list[1].args[0])
+        assert "ts_headline" in snippet_query
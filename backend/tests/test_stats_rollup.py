@@ -0,0 +1,57 @@
+"""
+Tests for the UserStats rollup helpers.
+
+Tests cover:
+- Incremental mastery bucket deltas from the review path
+"""
+
+import uuid
+
+from app.models.user_stats import UserStats
+from app.services.stats_rollup import apply_mastery_delta
+
+
+def _user_stats(**counts):
+    stats = UserStats(user_id=uuid.uuid4())
+    for column in ("cards_new", "cards_learning", "cards_young", "cards_mature", "cards_mastered"):
+        setattr(stats, column, counts.get(column, 0))
+    return stats
+
+
+class TestMasteryDelta:
+    """Test moving cards between mastery buckets."""
+
+    def test_moves_card_between_levels(self):
+        """Test that a level change decrements the old bucket and increments the new one."""
+        stats = _user_stats(cards_new=2)
+
+        apply_mastery_delta(stats, "new", "learning")
+
+        assert stats.cards_new == 1
+        assert stats.cards_learning == 1
+
+    def test_same_level_is_noop(self):
+        """Test that a review that keeps the level changes nothing."""
+        stats = _user_stats(cards_young=3)
+
+        apply_mastery_delta(stats, "young", "young")
+
+        assert stats.cards_young == 3
+
+    def test_card_entering_and_leaving(self):
+        """Test None as the old/new level for created and deleted cards."""
+        stats = _user_stats()
+
+        apply_mastery_delta(stats, None, "new")
+        assert stats.cards_new == 1
+
+        apply_mastery_delta(stats, "mastered", None)
+        assert stats.cards_mastered == 0  # never negative
+
+    def test_unset_counters_start_at_zero(self):
+        """Test that counters not yet populated by the database are treated as zero."""
+        stats = UserStats(user_id=uuid.uuid4())
+
+        apply_mastery_delta(stats, "new", "mature")
+
+        assert stats.cards_mature == 1
@@ -6,6 +6,7 @@ Tests cover:
 - Submitting reviews (stats update, review record)
 - Session tracking
 - Edge cases
+- Pomodoro history range validation
 """
 
 import pytest
@@ -457,3 +458,46 @@ class TestEdgeCases:
         )
 
         assert response.status_code == 422
+
+
+class TestPomodoroHistory:
+    """Test Pomodoro history range validation."""
+
+    @pytest.fixture
+    def history_client(self, client: TestClient):
+        """Client authenticated as a fixed user, without a database."""
+        from app.utils.auth import get_current_user_id
+        from app.utils.database import get_db
+
+        app.dependency_overrides[get_current_user_id] = lambda: "00000000-0000-0000-0000-000000000001"
+        app.dependency_overrides[get_db] = lambda: None
+        yield client
+        app.dependency_overrides.clear()
+
+    def test_day_range_is_capped(self, history_client: TestClient):
+        """Test that more than a year of daily rows is rejected."""
+        response = history_client.get(
+            "/study/pomodoro/history",
+            params={"start_date": "2024-01-01", "end_date": "2025-06-01"}
+        )
+
+        assert response.status_code == 400
+        assert "bucket=day" in response.json()["detail"]
+
+    def test_end_before_start(self, history_client: TestClient):
+        """Test that an inverted range is rejected."""
+        response = history_client.get(
+            "/study/pomodoro/history",
+            params={"start_date": "2025-02-01", "end_date": "2025-01-01", "bucket": "week"}
+        )
+
+        assert response.status_code == 400
+
+    def test_invalid_bucket(self, history_client: TestClient):
+        """Test that unknown bucket sizes fail validation."""
+        response = history_client.get(
+            "/study/pomodoro/history",
+            params={"start_date": "2025-01-01", "end_date": "2025-01-31", "bucket": "year"}
+        )
+
+        assert response.status_code == 422
@@ -0,0 +1,104 @@
+"""
+Tests for the token-aware text chunker.
+
+Tests cover:
+- Token budget and estimation
+- Paragraph and sentence boundaries
+- Overlap between consecutive chunks
+- Oversized sentences and laziness
+"""
+
+import itertools
+
+from app.config import settings
+from app.services.text_chunker import (
+    CHARS_PER_TOKEN,
+    chunk_token_budget,
+    estimate_tokens,
+    iter_chunks,
+)
+
+
+def _paragraph(label: str, sentences: int) -> str:
+    return " ".join(f"{label} sentence number {i} is here." for i in range(sentences))
+
+
+class TestChunkBudget:
+    """Test token budgeting."""
+
+    def test_budget_fits_model_context(self, monkeypatch):
+        """Test that the chunk budget leaves room for prompt and response."""
+        monkeypatch.setattr(settings, "GENERATION_CONTEXT_TOKENS", 10000)
+        monkeypatch.setattr(settings, "GENERATION_CHUNK_TOKENS", 50000)
+        monkeypatch.setattr(settings, "ANTHROPIC_MAX_TOKENS", 4000)
+
+        assert chunk_token_budget() < 10000 - 4000
+
+    def test_estimate_tokens(self):
+        """Test the character-based token estimate."""
+        assert estimate_tokens("x" * 35) == 10
+        assert estimate_tokens("") == 0
+
+
+class TestIterChunks:
+    """Test chunk boundaries."""
+
+    def test_short_text_single_chunk(self):
+        """Test that text under the budget comes back whole."""
+        chunks = list(iter_chunks("Just one sentence.", max_tokens=100, overlap_tokens=0))
+
+        assert [chunk.text for chunk in chunks] == ["Just one sentence."]
+        assert chunks[0].start == 0
+
+    def test_chunks_respect_budget_and_sentences(self):
+        """Test that every chunk fits and ends on a sentence."""
+        text = "\n\n".join(_paragraph(label, 12) for label in "ABCDE")
+
+        chunks = list(iter_chunks(text, max_tokens=60, overlap_tokens=0))
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert len(chunk.text) <= 60 * CHARS_PER_TOKEN
+            assert chunk.text.endswith(".")
+        # Without overlap the chunks cover the text exactly once
+        assert " ".join(chunk.text for chunk in chunks).split() == text.split()
+
+    def test_prefers_paragraph_boundaries(self):
+        """Test that a chunk ends at a paragraph when one falls in its second half."""
+        first = _paragraph("A", 5)
+        text = first + "\n\n" + _paragraph("B", 5)
+        max_tokens = int((len(first) + 60) / CHARS_PER_TOKEN)
+
+        chunks = list(iter_chunks(text, max_tokens=max_tokens, overlap_tokens=0))
+
+        assert chunks[0].text == first
+
+    def test_overlap_repeats_trailing_sentences(self):
+        """Test that the next chunk starts with the last sentences of the previous one."""
+        text = _paragraph("A", 40)
+
+        chunks = list(iter_chunks(text, max_tokens=80, overlap_tokens=20))
+
+        assert len(chunks) > 2
+        for previous, following in zip(chunks, chunks[1:]):
+            assert following.start < previous.end
+            assert previous.text.endswith(text[following.start:previous.end].strip())
+
+    def test_oversized_sentence_split_on_whitespace(self):
+        """Test that a sentence longer than a chunk is split between words."""
+        text = " ".join(["palabra"] * 200)
+
+        chunks = list(iter_chunks(text, max_tokens=20, overlap_tokens=0))
+
+        assert all(len(chunk.text) <= 20 * CHARS_PER_TOKEN for chunk in chunks)
+        assert all(set(chunk.text.split()) == {"palabra"} for chunk in chunks)
+        assert sum(len(chunk.text.split()) for chunk in chunks) == 200
+
+    def test_lazy(self):
+        """Test that only as much text as needed is chunked."""
+        text = "\n\n".join(_paragraph(str(i), 3) for i in range(10000))
+
+        first_two = list(itertools.islice(iter_chunks(text, max_tokens=50, overlap_tokens=0), 2))
+
+        assert [chunk.index for chunk in first_two] == [0, 1]
+        assert first_two[1].end < 1000
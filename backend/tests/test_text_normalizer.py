@@ -0,0 +1,67 @@
+"""
+Tests for single-pass text normalization.
+
+Tests cover:
+- Whitespace, null byte and blank line cleanup
+- Word count, reading time and paragraph offsets
+- Page offsets across multiple pages
+"""
+
+from app.services.text_normalizer import TextNormalizer
+
+
+class TestNormalize:
+    """Test normalization of a single text."""
+
+    def test_cleans_whitespace_and_null_bytes(self):
+        """Test that lines are trimmed, inner runs collapsed and null bytes removed."""
+        document = TextNormalizer().normalize("  The\x00 cell \t membrane  \r\n  is selective\n")
+
+        assert document.text == "The cell membrane\nis selective"
+        assert document.page_offsets is None
+
+    def test_collapses_blank_lines_into_paragraph_breaks(self):
+        """Test that any run of blank lines becomes a single paragraph break."""
+        document = TextNormalizer().normalize("\n\nIntro line\n\n\n\n  \nSecond paragraph\nmore\n\n")
+
+        assert document.text == "Intro line\n\nSecond paragraph\nmore"
+        assert document.paragraph_offsets == [0, len("Intro line\n\n")]
+
+    def test_stats_computed_in_the_same_pass(self):
+        """Test word count, char count and reading time."""
+        document = TextNormalizer().normalize("word " * 450)
+
+        assert document.word_count == 450
+        assert document.char_count == len(document.text)
+        assert document.stats() == {
+            "word_count": 450,
+            "char_count": len(document.text),
+            "estimated_reading_time_minutes": 2,
+        }
+
+    def test_empty_text(self):
+        """Test that whitespace-only input normalizes to nothing."""
+        document = TextNormalizer().normalize(" \n\x00\n\t")
+
+        assert document.text == ""
+        assert document.word_count == 0
+        assert document.paragraph_offsets == []
+
+
+class TestNormalizePages:
+    """Test multi-page normalization."""
+
+    def test_page_offsets_and_paragraphs_across_pages(self):
+        """Test that pages join with line breaks and blank page ends carry paragraph breaks."""
+        pages = ["Chapter one\n\n", None, "continues here", "next page"]
+
+        document = TextNormalizer().normalize_pages(pages)
+        text, offsets = document.text, document.page_offsets
+
+        assert text == "Chapter one\n\ncontinues here\nnext page"
+        assert [text[offsets[i]:offsets[i + 1]].lstrip("\n") for i in range(len(pages))] == [
+            "Chapter one", "", "continues here", "next page"
+        ]
+        assert [text[offset:].split("\n")[0] for offset in document.paragraph_offsets] == [
+            "Chapter one", "continues here"
+        ]
@@ -0,0 +1,98 @@
+"""
+Tests for streaming upload helpers.
+
+Tests cover:
+- Chunked size enforcement and hashing of uploaded files
+- Early rejection of oversized request bodies
+- PDF extraction from file handles
+"""
+
+import hashlib
+import io
+
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from app.services.pdf_service import PDFService
+from app.utils.uploads import UploadSizeLimitMiddleware, UploadTooLargeError, spool_upload
+
+
+class TestSpoolUpload:
+    """Test chunked upload reading."""
+
+    async def test_hashes_and_rewinds(self):
+        """Test that size and SHA-256 are computed and the file is rewound."""
+        data = b"%PDF-1.4 " + b"x" * 5000
+        upload = UploadFile(file=io.BytesIO(data), filename="notes.pdf")
+
+        result = await spool_upload(upload, max_bytes=10_000, chunk_size=1024)
+
+        assert result.size == len(data)
+        assert result.sha256 == hashlib.sha256(data).hexdigest()
+        assert result.file.read() == data
+
+    async def test_rejects_when_limit_crossed(self):
+        """Test that reading stops with an error once the limit is exceeded."""
+        upload = UploadFile(file=io.BytesIO(b"x" * 5000), filename="big.pdf")
+
+        with pytest.raises(UploadTooLargeError):
+            await spool_upload(upload, max_bytes=4096, chunk_size=1024)
+
+
+class TestUploadSizeLimitMiddleware:
+    """Test request body limits."""
+
+    @pytest.fixture
+    def limited_client(self):
+        app = FastAPI()
+
+        @app.post("/upload")
+        async def upload(request: Request):
+            body = await request.body()
+            return {"received": len(body)}
+
+        @app.post("/other")
+        async def other(request: Request):
+            return {"received": len(await request.body())}
+
+        app.add_middleware(UploadSizeLimitMiddleware, max_bytes=1024, paths=["/upload"])
+        return TestClient(app)
+
+    def test_declared_length_over_limit(self, limited_client: TestClient):
+        """Test that an oversized Content-Length is rejected up front."""
+        response = limited_client.post("/upload", content=b"x" * 2048)
+
+        assert response.status_code == 413
+
+    def test_streamed_body_over_limit(self, limited_client: TestClient):
+        """Test that a chunked body is rejected once it crosses the limit."""
+        def chunks():
+            for _ in range(8):
+                yield b"x" * 512
+
+        response = limited_client.post("/upload", content=chunks())
+
+        assert response.status_code == 413
+
+    def test_within_limit_and_other_paths(self, limited_client: TestClient):
+        """Test that small bodies and unlisted paths pass through."""
+        assert limited_client.post("/upload", content=b"x" * 512).json() == {"received": 512}
+        assert limited_client.post("/other", content=b"x" * 4096).json() == {"received": 4096}
+
+
+class TestPDFFromFileHandle:
+    """Test PDF extraction input handling."""
+
+    def test_file_handle_size_limit(self):
+        """Test that the size limit applies to file handles without reading them."""
+        service = PDFService()
+        service.max_file_size_bytes = 1024
+
+        with pytest.raises(ValueError, match="too large"):
+            service.extract_text_from_pdf(io.BytesIO(b"x" * 2048))
+
+    def test_file_handle_too_small(self):
+        """Test that tiny file handles are rejected like tiny byte strings."""
+        with pytest.raises(ValueError, match="too small"):
+            PDFService().extract_text_from_pdf(io.BytesIO(b"%PDF"))
@@ -90,8 +90,11 @@ CREATE INDEX idx_study_materials_user_id ON study_materials(user_id, created_at
 CREATE INDEX idx_study_materials_status ON study_materials(status);
 CREATE INDEX idx_study_materials_subject ON study_materials(subject_category);
 
--- Full-text search index
-CREATE INDEX idx_study_materials_text_search ON study_materials USING GIN(to_tsvector('english', extracted_text));
+-- Full-text search: stored generated tsvector (content is mostly Spanish), GIN-indexed.
+-- Shared content (material_contents) has the same column; see alembic revision 3f7b8d2a6c14.
+ALTER TABLE study_materials ADD COLUMN search_vector tsvector
+  GENERATED ALWAYS AS (to_tsvector('spanish'::regconfig, left(extracted_text, 500000))) STORED;
+CREATE INDEX ix_study_materials_search_vector ON study_materials USING GIN(search_vector);
 
 -- Trigger for updated_at
 CREATE TRIGGER update_study_materials_updated_at
@@ -135,10 +138,13 @@ CREATE INDEX idx_flashcards_material_id ON flashcards(material_id);
 CREATE INDEX idx_flashcards_status ON flashcards(status);
 CREATE INDEX idx_flashcards_tags ON flashcards USING GIN(tags);
 
--- Full-text search on question and answer
-CREATE INDEX idx_flashcards_text_search ON flashcards USING GIN(
-  to_tsvector('english', question || ' ' || answer)
-);
+-- Full-text search on question, answer and explanation (weighted A/B/C)
+ALTER TABLE flashcards ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+  setweight(to_tsvector('spanish'::regconfig, question), 'A') ||
+  setweight(to_tsvector('spanish'::regconfig, answer), 'B') ||
+  setweight(to_tsvector('spanish'::regconfig, coalesce(explanation, '')), 'C')
+) STORED;
+CREATE INDEX ix_flashcards_search_vector ON flashcards USING GIN(search_vector);
 
 -- Trigger for updated_at
 CREATE TRIGGER update_flashcards_updated_at
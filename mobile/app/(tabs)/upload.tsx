@@ -153,14 +153,26 @@ export default function UploadScreen() {
       console.log('[Upload] Material ID:', uploadResponse.id);
       setMaterialId(uploadResponse.id);
 
-      // Step 2: Extract text (already done by backend)
-      setProgress(0.4);
+      // Step 2: Wait for the backend to extract and analyze the text
+      setProgress(0.3);
       setProgressMessage(
         activeTab === 'pdf' ? 'Extracting text from PDF...' : 'Processing text...'
       );
 
-      // Small delay for UX
-      await new Promise((resolve) => setTimeout(resolve, 500));
+      const processed = await materialsService.waitForProcessing(
+        uploadResponse.id,
+        (update) => {
+          // Map processing progress into the 0.3 - 0.5 band of the overall bar
+          setProgress(0.3 + update.progress * 0.2);
+          if (update.stage === 'analyzing' || update.stage === 'saving') {
+            setProgressMessage('Analyzing text...');
+          }
+        }
+      );
+
+      if (processed.status === 'failed') {
+        throw new Error(processed.error_message || 'Failed to process material');
+      }
 
       // Step 3: Generate flashcards
       setStep('generating');
@@ -172,10 +184,19 @@ export default function UploadScreen() {
         card_count: parseInt(cardCount),
       });
 
-      const generateResponse = await flashcardsService.generateFlashcards({
-        material_id: uploadResponse.id,
-        card_count: parseInt(cardCount),
-      });
+      const generateResponse = await flashcardsService.generateFlashcards(
+        {
+          material_id: uploadResponse.id,
+          card_count: parseInt(cardCount),
+        },
+        (job) => {
+          if (job.status === 'queued') {
+            setProgressMessage('Waiting for a free generator...');
+          } else if (job.status === 'running') {
+            setProgressMessage(`Generating ${cardCount} flashcards with AI...`);
+          }
+        }
+      );
 
       console.log('[Upload] Generate response received:', generateResponse);
 
@@ -19,10 +19,10 @@ import {
 } from '../../components';
 import { colors, spacing } from '../../constants';
 import { materialsService } from '../../services/materialsService';
-import type { StudyMaterial } from '../../types';
+import type { MaterialSummary } from '../../types';
 
 export default function DecksScreen() {
-  const [materials, setMaterials] = useState<StudyMaterial[]>([]);
+  const [materials, setMaterials] = useState<MaterialSummary[]>([]);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
 
@@ -50,7 +50,7 @@ export default function DecksScreen() {
     setRefreshing(false);
   }, [loadMaterials]);
 
-  const handleDeckPress = (material: StudyMaterial) => {
+  const handleDeckPress = (material: MaterialSummary) => {
     if (material.flashcard_count === 0) {
       Alert.alert(
         'No Cards',
@@ -10,8 +10,22 @@ describe('flashcardsService', () => {
   });
 
   describe('generateFlashcards', () => {
-    it('generates flashcards successfully', async () => {
-      const mockResponse = {
+    const job = (status: string, extra: object = {}) => ({
+      data: {
+        id: 'job-1',
+        material_id: 'material-123',
+        status,
+        attempts: status === 'queued' ? 0 : 1,
+        max_attempts: 3,
+        cancel_requested: false,
+        cards_created: 0,
+        error_message: null,
+        ...extra,
+      },
+    });
+
+    it('queues a job, waits for it and returns its cards', async () => {
+      const mockResults = {
         data: {
           cards: [
             {
@@ -34,21 +48,22 @@ describe('flashcardsService', () => {
         },
       };
 
-      (api.post as jest.Mock).mockResolvedValue(mockResponse);
+      (api.post as jest.Mock).mockResolvedValue(job('queued'));
+      (api.get as jest.Mock)
+        .mockResolvedValueOnce(job('completed', { cards_created: 2 }))
+        .mockResolvedValueOnce(mockResults);
 
       const result = await flashcardsService.generateFlashcards({
         material_id: 'material-123',
         card_count: 2,
       });
 
-      expect(api.post).toHaveBeenCalledWith(
-        '/flashcards/generate',
-        {
-          material_id: 'material-123',
-          card_count: 2,
-        },
-        { timeout: 90000 }
-      );
+      expect(api.post).toHaveBeenCalledWith('/flashcards/generate', {
+        material_id: 'material-123',
+        card_count: 2,
+      });
+      expect(api.get).toHaveBeenCalledWith('/flashcards/jobs/job-1');
+      expect(api.get).toHaveBeenCalledWith('/flashcards/jobs/job-1/results');
 
       expect(result.cards).toHaveLength(2);
       expect(result.count).toBe(2);
@@ -56,15 +71,10 @@ describe('flashcardsService', () => {
     });
 
     it('includes difficulty when provided', async () => {
-      const mockResponse = {
-        data: {
-          cards: [],
-          count: 0,
-          material_id: 'material-123',
-        },
-      };
-
-      (api.post as jest.Mock).mockResolvedValue(mockResponse);
+      (api.post as jest.Mock).mockResolvedValue(job('queued'));
+      (api.get as jest.Mock)
+        .mockResolvedValueOnce(job('completed'))
+        .mockResolvedValueOnce({ data: { cards: [], count: 0, material_id: 'material-123' } });
 
       await flashcardsService.generateFlashcards({
         material_id: 'material-123',
@@ -76,14 +86,14 @@ describe('flashcardsService', () => {
         '/flashcards/generate',
         expect.objectContaining({
           difficulty: 4,
-        }),
-        { timeout: 90000 }
+        })
       );
     });
 
-    it('throws error when generation fails', async () => {
-      (api.post as jest.Mock).mockRejectedValue(
-        new Error('Failed to generate flashcards')
+    it('throws the job error when generation fails', async () => {
+      (api.post as jest.Mock).mockResolvedValue(job('queued'));
+      (api.get as jest.Mock).mockResolvedValueOnce(
+        job('failed', { error_message: 'Failed to generate flashcards' })
       );
 
       await expect(
@@ -92,6 +102,20 @@ describe('flashcardsService', () => {
           card_count: 10,
         })
       ).rejects.toThrow('Failed to generate flashcards');
+      expect(api.get).not.toHaveBeenCalledWith('/flashcards/jobs/job-1/results');
+    });
+
+    it('throws error when the job cannot be queued', async () => {
+      (api.post as jest.Mock).mockRejectedValue(
+        new Error('Too many flashcard generations in progress')
+      );
+
+      await expect(
+        flashcardsService.generateFlashcards({
+          material_id: 'material-123',
+          card_count: 10,
+        })
+      ).rejects.toThrow('Too many flashcard generations in progress');
     });
   });
 
@@ -1,7 +1,7 @@
 import axios, { AxiosInstance, AxiosRequestConfig, InternalAxiosRequestConfig } from 'axios';
 import { secureStorage } from '../utils/secureStorage';
 
-const API_URL = process.env.EXPO_PUBLIC_API_URL || 'http://localhost:8000';
+export const API_URL = process.env.EXPO_PUBLIC_API_URL || 'http://localhost:8000';
 
 // Retry configuration
 const MAX_RETRIES = 3;
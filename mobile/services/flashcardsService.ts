@@ -1,11 +1,15 @@
-import { api } from './api';
+import { api, API_URL } from './api';
 import type { Flashcard, ApiResponse, PaginatedResponse } from '../types';
 import { handleApiResponse } from '../utils/apiHelpers';
+import { secureStorage } from '../utils/secureStorage';
 
 export interface GenerateFlashcardsRequest {
   material_id: string;
   card_count?: number;
   difficulty?: number;
+  page_start?: number; // PDF materials only, 1-based
+  page_end?: number; // Inclusive
+  force_refresh?: boolean; // Skip cached results of an identical request
 }
 
 export interface GenerateFlashcardsResponse {
@@ -14,6 +18,22 @@ export interface GenerateFlashcardsResponse {
   material_id: string;
 }
 
+export type GenerationJobStatus = 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+
+export interface GenerationJob {
+  id: string;
+  material_id: string;
+  status: GenerationJobStatus;
+  attempts: number;
+  max_attempts: number;
+  cancel_requested: boolean;
+  cards_created: number;
+  error_message: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 export interface UpdateFlashcardRequest {
   question?: string;
   answer?: string;
@@ -24,29 +44,147 @@ export interface UpdateFlashcardRequest {
 
 export const flashcardsService = {
   /**
-   * Generate flashcards using AI
+   * Generate flashcards using AI: queue a background job, wait for it to
+   * finish and return the created cards
    */
   async generateFlashcards(
-    request: GenerateFlashcardsRequest
+    request: GenerateFlashcardsRequest,
+    onUpdate?: (job: GenerationJob) => void
   ): Promise<GenerateFlashcardsResponse> {
     console.log('[FlashcardsService] Starting generation:', request);
     const startTime = Date.now();
 
-    const response = await api.post<GenerateFlashcardsResponse>(
-      '/flashcards/generate',
-      request,
-      {
-        timeout: 90000, // 90 seconds - should be enough for most PDFs
-      }
-    );
+    const response = await api.post<GenerationJob>('/flashcards/generate', request);
+    onUpdate?.(response.data);
+    const job = await flashcardsService.waitForGenerationJob(response.data.id, onUpdate);
+
+    if (job.status !== 'completed') {
+      throw new Error(job.error_message || `Flashcard generation ${job.status}`);
+    }
+
+    const results = await flashcardsService.getGenerationJobResults(job.id);
 
     const elapsed = ((Date.now() - startTime) / 1000).toFixed(1);
     console.log(`[FlashcardsService] Generation completed in ${elapsed}s`);
-    console.log('[FlashcardsService] Response:', response.data);
+    console.log('[FlashcardsService] Response:', results);
+
+    return results;
+  },
+
+  /**
+   * Get the status of a generation job
+   */
+  async getGenerationJob(jobId: string): Promise<GenerationJob> {
+    const response = await api.get<GenerationJob>(`/flashcards/jobs/${jobId}`);
+    return response.data;
+  },
+
+  /**
+   * Get the cards created by a completed generation job
+   */
+  async getGenerationJobResults(jobId: string): Promise<GenerateFlashcardsResponse> {
+    const response = await api.get<GenerateFlashcardsResponse>(`/flashcards/jobs/${jobId}/results`);
+    return response.data;
+  },
+
+  /**
+   * Poll a generation job until it completes, fails or is cancelled
+   */
+  async waitForGenerationJob(
+    jobId: string,
+    onUpdate?: (job: GenerationJob) => void,
+    intervalMs: number = 2000,
+    timeoutMs: number = 10 * 60 * 1000
+  ): Promise<GenerationJob> {
+    const deadline = Date.now() + timeoutMs;
 
+    while (true) {
+      const job = await flashcardsService.getGenerationJob(jobId);
+      onUpdate?.(job);
+
+      if (job.status === 'completed' || job.status === 'failed' || job.status === 'cancelled') {
+        return job;
+      }
+      if (Date.now() > deadline) {
+        throw new Error('Generation is taking longer than expected. Please check back later.');
+      }
+
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+
+  /**
+   * Cancel a queued or running generation job
+   */
+  async cancelGenerationJob(jobId: string): Promise<GenerationJob> {
+    const response = await api.post<GenerationJob>(`/flashcards/jobs/${jobId}/cancel`);
+    return response.data;
+  },
+
+  /**
+   * Queue a failed or cancelled generation job again
+   */
+  async retryGenerationJob(jobId: string): Promise<GenerationJob> {
+    const response = await api.post<GenerationJob>(`/flashcards/jobs/${jobId}/retry`);
     return response.data;
   },
 
+  /**
+   * Generate flashcards, receiving each card as soon as it is saved
+   * (Server-Sent Events). Resolves with all cards when the stream ends.
+   */
+  async generateFlashcardsStream(
+    request: GenerateFlashcardsRequest,
+    onCard: (card: Flashcard) => void
+  ): Promise<GenerateFlashcardsResponse> {
+    const token = await secureStorage.getItem('auth_token');
+
+    return new Promise((resolve, reject) => {
+      const xhr = new XMLHttpRequest();
+      const cards: Flashcard[] = [];
+      let consumed = 0;
+
+      // Handle every complete event (terminated by a blank line) received so far
+      const consumeEvents = () => {
+        const text = xhr.responseText;
+        let end = text.indexOf('\n\n', consumed);
+        while (end !== -1) {
+          const block = text.slice(consumed, end);
+          consumed = end + 2;
+          const event = /^event: (.*)$/m.exec(block)?.[1];
+          const data = /^data: (.*)$/m.exec(block)?.[1];
+
+          if (event === 'card' && data) {
+            const card: Flashcard = JSON.parse(data);
+            cards.push(card);
+            onCard(card);
+          } else if (event === 'error' && data) {
+            reject(new Error(JSON.parse(data).detail));
+          }
+          end = text.indexOf('\n\n', consumed);
+        }
+      };
+
+      xhr.open('POST', `${API_URL}/flashcards/generate/stream`);
+      xhr.setRequestHeader('Content-Type', 'application/json');
+      xhr.setRequestHeader('Accept', 'text/event-stream');
+      if (token) {
+        xhr.setRequestHeader('Authorization', `Bearer ${token}`);
+      }
+      xhr.onprogress = consumeEvents;
+      xhr.onload = () => {
+        if (xhr.status >= 400) {
+          reject(new Error(`Generation failed with status ${xhr.status}`));
+          return;
+        }
+        consumeEvents();
+        resolve({ cards, count: cards.length, material_id: request.material_id });
+      };
+      xhr.onerror = () => reject(new Error('Network error during generation'));
+      xhr.send(JSON.stringify(request));
+    });
+  },
+
   /**
    * Get all user's flashcards
    */
@@ -9,12 +9,15 @@ export { materialsService } from './materialsService';
 export { flashcardsService } from './flashcardsService';
 export { studyService } from './studyService';
 export { pomodoroService } from './pomodoroService';
+export { searchService } from './searchService';
 export * from './goalService';
 export * from './statsService';
 
 export type {
   GenerateFlashcardsRequest,
   GenerateFlashcardsResponse,
+  GenerationJob,
+  GenerationJobStatus,
   UpdateFlashcardRequest,
 } from './flashcardsService';
 export type {
@@ -22,3 +25,4 @@ export type {
   PomodoroSessionResponse,
   PomodoroSettingsResponse,
 } from './pomodoroService';
+export type { SearchParams } from './searchService';
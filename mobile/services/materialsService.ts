@@ -4,7 +4,9 @@ import type {
   ApiResponse,
   PaginatedResponse,
   MaterialFlashcardsResponse,
-  MaterialListResponse
+  MaterialFlashcardOrder,
+  MaterialListResponse,
+  MaterialPagesResponse
 } from '../types';
 
 export interface UploadMaterialRequest {
@@ -26,6 +28,16 @@ export interface UploadMaterialResponse {
   created_at: string;
 }
 
+export interface MaterialStatus {
+  id: string;
+  status: 'pending' | 'processing' | 'completed' | 'failed';
+  stage: string;
+  progress: number;
+  word_count?: number;
+  error_message?: string;
+  processed_at?: string;
+}
+
 export const materialsService = {
   /**
    * Upload a PDF file or paste text to create a study material
@@ -70,7 +82,7 @@ export const materialsService = {
     );
 
     const elapsed = ((Date.now() - startTime) / 1000).toFixed(1);
-    console.log(`[MaterialsService] Upload completed in ${elapsed}s`);
+    console.log(`[MaterialsService] Upload accepted in ${elapsed}s`);
 
     return response.data;
   },
@@ -96,13 +108,92 @@ export const materialsService = {
     return response.data;
   },
 
+  /**
+   * Get the extracted text, optionally a byte range of its UTF-8 encoding
+   */
+  async getMaterialText(id: string, range?: { start: number; end?: number }): Promise<string> {
+    const headers = range ? { Range: `bytes=${range.start}-${range.end ?? ''}` } : undefined;
+    const response = await api.get<string>(`/materials/${id}/text`, {
+      headers,
+      responseType: 'text',
+    });
+    return response.data;
+  },
+
+  /**
+   * Get the text of a page range (1-based, inclusive) of a PDF material
+   */
+  async getMaterialPages(id: string, start: number, end?: number): Promise<MaterialPagesResponse> {
+    const query = end ? `start=${start}&end=${end}` : `start=${start}`;
+    const response = await api.get<MaterialPagesResponse>(`/materials/${id}/pages?${query}`);
+    return response.data;
+  },
+
+  /**
+   * Get the background processing status of a material
+   */
+  async getMaterialStatus(id: string): Promise<MaterialStatus> {
+    const response = await api.get<MaterialStatus>(`/materials/${id}/status`);
+    return response.data;
+  },
+
+  /**
+   * Poll a freshly uploaded material until processing completes or fails
+   */
+  async waitForProcessing(
+    id: string,
+    onUpdate?: (status: MaterialStatus) => void,
+    intervalMs: number = 1000,
+    timeoutMs: number = 5 * 60 * 1000
+  ): Promise<MaterialStatus> {
+    const deadline = Date.now() + timeoutMs;
+
+    while (true) {
+      const status = await materialsService.getMaterialStatus(id);
+      onUpdate?.(status);
+
+      if (status.status === 'completed' || status.status === 'failed') {
+        return status;
+      }
+      if (Date.now() > deadline) {
+        throw new Error('Processing is taking longer than expected. Please check back later.');
+      }
+
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+
   /**
    * Get all flashcards for a specific material
    */
-  async getMaterialFlashcards(materialId: string): Promise<MaterialFlashcardsResponse> {
+  async getMaterialFlashcards(
+    materialId: string,
+    order: MaterialFlashcardOrder = 'created'
+  ): Promise<MaterialFlashcardsResponse> {
     console.log('[MaterialsService] Fetching flashcards for material:', materialId);
+    const first = await materialsService.getMaterialFlashcardsPage(materialId, { order });
+    const flashcards = [...first.flashcards];
+
+    let cursor = first.next_cursor;
+    while (cursor) {
+      const page = await materialsService.getMaterialFlashcardsPage(materialId, { order, cursor });
+      flashcards.push(...page.flashcards);
+      cursor = page.next_cursor;
+    }
+
+    return { ...first, flashcards, next_cursor: null };
+  },
+
+  /**
+   * Get one page of a material's flashcards (keyset pagination)
+   */
+  async getMaterialFlashcardsPage(
+    materialId: string,
+    params: { order?: MaterialFlashcardOrder; limit?: number; cursor?: string } = {}
+  ): Promise<MaterialFlashcardsResponse> {
     const response = await api.get<MaterialFlashcardsResponse>(
-      `/materials/${materialId}/flashcards`
+      `/materials/${materialId}/flashcards`,
+      { params }
     );
     return response.data;
   },
@@ -123,16 +123,20 @@ export const pomodoroService = {
   },
 
   /**
-   * Get Pomodoro history for a date range
+   * Get Pomodoro history for a date range.
+   * With bucket 'week' or 'month' the server aggregates per period and
+   * `date` is the first day of each period.
    */
   async getHistory(
     startDate: string,
-    endDate: string
+    endDate: string,
+    bucket: 'day' | 'week' | 'month' = 'day'
   ): Promise<PomodoroStats[]> {
     const response = await api.get<PomodoroStats[]>('/study/pomodoro/history', {
       params: {
         start_date: startDate,
         end_date: endDate,
+        bucket,
       },
     });
     return response.data;
@@ -0,0 +1,24 @@
+/**
+ * Search Service - Full-text search across flashcards and materials
+ */
+
+import { api } from './api';
+import type { SearchResponse } from '../types';
+
+export interface SearchParams {
+  type?: 'all' | 'flashcards' | 'materials';
+  limit?: number;
+  cursor?: string; // next_cursor of the previous page
+}
+
+export const searchService = {
+  /**
+   * Search flashcards and material text (ranked, best match first)
+   */
+  async search(q: string, params: SearchParams = {}): Promise<SearchResponse> {
+    const response = await api.get<SearchResponse>('/search', {
+      params: { q, ...params },
+    });
+    return response.data;
+  },
+};
@@ -47,6 +47,18 @@ export interface StudyMaterial {
   created_at: string;
   updated_at?: string;
   flashcard_count: number;
+  page_count?: number; // PDF pages (absent for pasted text)
+}
+
+// List views: no extracted_text, optional excerpt (see getMaterials)
+export interface MaterialSummary extends Omit<StudyMaterial, 'extracted_text'> {
+  excerpt?: string;
+}
+
+export interface MaterialPagesResponse {
+  material_id: string;
+  page_count: number;
+  pages: { page_number: number; text: string }[];
 }
 
 export interface MaterialFlashcard {
@@ -71,10 +83,13 @@ export interface MaterialFlashcardsResponse {
   material_name: string;
   flashcards: MaterialFlashcard[];
   total: number;
+  next_cursor?: string | null;
 }
 
+export type MaterialFlashcardOrder = 'created' | 'mastery' | 'due';
+
 export interface MaterialListResponse {
-  materials: StudyMaterial[];
+  materials: MaterialSummary[];
   total: number;
   page: number;
   page_size: number;
@@ -241,3 +256,19 @@ export interface PomodoroSettings {
   sound_enabled: boolean;
   vibration_enabled: boolean;
 }
+
+// Search types
+export interface SearchResult {
+  kind: 'flashcard' | 'material';
+  id: string;
+  title: string;
+  snippet: string; // Matching terms wrapped in <mark></mark>
+  rank: number;
+  material_id?: string | null;
+}
+
+export interface SearchResponse {
+  query: string;
+  results: SearchResult[];
+  next_cursor?: string | null;
+}